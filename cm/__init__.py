@@ -1,6 +1,6 @@
 #  MIT License
 #
-#  Copyright (c) 2022-2025 BlueWhaleMain
+#  Copyright (c) 2022-2026 BlueWhaleMain
 #
 #  Permission is hereby granted, free of charge, to any person obtaining a copy
 #  of this software and associated documentation files (the "Software"), to deal
@@ -27,10 +27,13 @@ Cipher Manager 旨在提供安全的、性能良好的、可深度定制的密
 
 * 加密存储
 """
+import importlib
+from typing import TYPE_CHECKING, Any
+
 from cm.error import CmValueError, CmTypeError
-from cm.file.base import CipherFile
-from cm.file.protect import ProtectCipherFile
-from cm.file.table_record import TableRecordCipherFile
+
+if TYPE_CHECKING:
+    from cm.file.base import CipherFile
 
 __author__ = "BlueWhaleMain"
 
@@ -39,7 +42,23 @@ version_info = (2, 0, '4')
 __version__ = ".".join([str(x) for x in version_info])
 
 
-def file_load(data: dict) -> CipherFile:
+# 按需导入的文件类型，只使用异常类型或命令行帮助时不必加载加密库与pydantic
+_LAZY_ATTRS = {
+    'CipherFile': 'cm.file.base',
+    'ProtectCipherFile': 'cm.file.protect',
+    'TableRecordCipherFile': 'cm.file.table_record',
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY_ATTRS:
+        return getattr(importlib.import_module(_LAZY_ATTRS[name]), name)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def file_load(data: dict) -> 'CipherFile':
+    from cm.file.protect import ProtectCipherFile
+    from cm.file.table_record import TableRecordCipherFile
     if 'content_type' not in data:
         raise CmTypeError('加载的数据缺少内容类型字段')
     content_type = data['content_type']
@@ -0,0 +1,414 @@
+#  MIT License
+#
+#  Copyright (c) 2026 BlueWhaleMain
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+#
+"""
+Cipher Manager 命令行
+
+不依赖图形界面，与图形界面共用同一套加解密实现，可用于脚本与定时任务：``python -m cm --help``
+
+各子命令只在执行时导入所需的模块，查看帮助与解析参数不会加载加密库。
+需要密码时默认从终端读取，也可以通过 ``--password-env`` 指定保存密码的环境变量。
+"""
+import argparse
+import getpass
+import os
+import sys
+from typing import Any, Callable
+
+from cm.error import CmBaseException, CmValueError
+
+# 退出码：存在处理失败的文件
+_EXIT_FAILED = 1
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    命令行入口
+
+    Args:
+        argv: 命令行参数，默认为sys.argv[1:]
+
+    Returns:
+        退出码
+    """
+    parser = _build_parser()
+    args = parser.parse_args(argv)
+    try:
+        return args.func(args)
+    except (CmBaseException, OSError) as e:
+        print(f'错误：{e}', file=sys.stderr)
+        return _EXIT_FAILED
+    except KeyboardInterrupt:
+        return 130
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python -m cm', description='Cipher Manager 命令行')
+    subparsers = parser.add_subparsers(required=True, metavar='command')
+
+    def add(name: str, func: Callable[[argparse.Namespace], int], help_: str) -> argparse.ArgumentParser:
+        sub = subparsers.add_parser(name, help=help_, description=help_)
+        sub.set_defaults(func=func)
+        return sub
+
+    def add_secret_args(sub: argparse.ArgumentParser) -> None:
+        sub.add_argument('--password-env', metavar='NAME', help='从指定的环境变量读取密码')
+        sub.add_argument('--key', metavar='PATH', help='密钥文件，用于RSA等以文件为密钥的加密方式')
+        sub.add_argument('--passphrase-env', metavar='NAME', help='从指定的环境变量读取密钥文件的密码')
+
+    def add_new_secret_args(sub: argparse.ArgumentParser) -> None:
+        sub.add_argument('--new-password-env', metavar='NAME', help='从指定的环境变量读取新密码，默认从终端读取两次')
+        sub.add_argument('--new-key', metavar='PATH', help='新的密钥文件，RSA须为私钥')
+        sub.add_argument('--new-passphrase-env', metavar='NAME', help='从指定的环境变量读取新密钥文件的密码')
+
+    def add_batch_args(sub: argparse.ArgumentParser) -> None:
+        sub.add_argument('-o', '--output', required=True, metavar='DIR', help='目标目录')
+        sub.add_argument('-j', '--jobs', type=int, default=0, metavar='N', help='并发进程数，默认为CPU核心数')
+        sub.add_argument('--report', metavar='CSV', help='写出逐个文件的结果报告')
+
+    sub = add('pack', _pack, '批量加密文件或目录')
+    sub.add_argument('table', help='提供加密方式与密钥的加密表格文件（.pkl）')
+    sub.add_argument('sources', nargs='+', help='源文件或目录')
+    sub.add_argument('--compress', metavar='NAME', help='加密前压缩内容：zlib、lzma或zstd，已压缩的数据自动原样存储')
+    add_batch_args(sub)
+    add_secret_args(sub)
+
+    sub = add('unpack', _unpack, '批量解密保护文件或目录')
+    sub.add_argument('sources', nargs='+', help='保护文件或目录')
+    sub.add_argument('--table', help='提供密钥的加密表格文件（.pkl），默认使用第一个保护文件自身的加密方式')
+    add_batch_args(sub)
+    add_secret_args(sub)
+
+    sub = add('verify', _verify, '解密并校验保护文件，不写出内容')
+    sub.add_argument('sources', nargs='+', help='保护文件或目录')
+    sub.add_argument('--table', help='提供密钥的加密表格文件（.pkl），默认使用第一个保护文件自身的加密方式')
+    add_secret_args(sub)
+
+    sub = add('rekey', _rekey, '更换保护文件的密码或密钥，只改写文件头，不重新加密内容')
+    sub.add_argument('sources', nargs='+', help='保护文件或目录，目录中的索引一同更换')
+    sub.add_argument('--table', help='提供密钥的加密表格文件（.pkl），默认使用第一个保护文件自身的加密方式')
+    add_secret_args(sub)
+    add_new_secret_args(sub)
+
+    sub = add('read', _read, '解密保护文件的一段内容并写到标准输出，只解密所需的块（需要CTR、GCM、ECB或非对称加密）')
+    sub.add_argument('file', help='保护文件')
+    sub.add_argument('--offset', type=int, default=0, metavar='N', help='起始位置，负数表示从末尾倒数')
+    sub.add_argument('--length', type=int, default=-1, metavar='N', help='读取的字节数，默认读取到末尾')
+    sub.add_argument('--table', help='提供密钥的加密表格文件（.pkl），默认使用保护文件自身的加密方式')
+    add_secret_args(sub)
+
+    sub = add('cat-table', _cat_table, '以CSV格式输出解密后的表格')
+    sub.add_argument('table', help='加密表格文件（.pkl）')
+    add_secret_args(sub)
+
+    sub = add('export', _export, '将解密后的表格导出为CSV文件')
+    sub.add_argument('table', help='加密表格文件（.pkl）')
+    sub.add_argument('csv', help='目标CSV文件')
+    add_secret_args(sub)
+
+    sub = add('import', _import, '从CSV文件追加记录到表格并保存')
+    sub.add_argument('table', help='加密表格文件（.pkl）')
+    sub.add_argument('csv', help='源CSV文件')
+    sub.add_argument('-j', '--jobs', type=int, default=0, metavar='N', help='加密线程数，默认为CPU核心数')
+    add_secret_args(sub)
+
+    sub = add('rekey-table', _rekey_table, '更换加密表格的密码或密钥并保存，旧表格首次更换时以数据密钥重新加密全部单元格')
+    sub.add_argument('table', help='加密表格文件（.pkl）')
+    sub.add_argument('-j', '--jobs', type=int, default=0, metavar='N', help='加解密线程数，默认为CPU核心数')
+    add_secret_args(sub)
+    add_new_secret_args(sub)
+
+    sub = add('catalog', _catalog, '查看目录中保护文件的加密索引，必要时创建或重建')
+    sub.add_argument('directory', help='目录')
+    sub.add_argument('--table', help='提供密钥的加密表格文件（.pkl），默认使用目录中第一个保护文件自身的加密方式')
+    sub.add_argument('--prefix', default='', help='源文件名前缀')
+    sub.add_argument('--contains', default='', help='源文件名包含的字符串')
+    sub.add_argument('--refresh', action='store_true', help='索引过期时重建')
+    add_secret_args(sub)
+
+    sub = add('bench', _bench, '测量当前机器上的加解密吞吐与模块导入耗时，导入超出预算时退出码为1')
+    sub.add_argument('--imports', action='store_true', help='只测量模块导入耗时')
+    return parser
+
+
+def _pack(args: argparse.Namespace) -> int:
+    from cm.batch import pack_files
+    from cm.progress import CmProgress
+    cipher_file = _load_table(args.table)
+    _unlock(cipher_file, args)
+    results = pack_files(cipher_file, args.sources, args.output, CmProgress(), args.jobs, args.report,
+                         args.compress)
+    return _summary(results)
+
+
+def _unpack(args: argparse.Namespace) -> int:
+    from cm.batch import unpack_files
+    from cm.progress import CmProgress
+    cipher_file = _load_protect_key(args.table, args.sources)
+    _unlock(cipher_file, args)
+    results = unpack_files(cipher_file, args.sources, args.output, CmProgress(), args.jobs, args.report)
+    return _summary(results)
+
+
+def _verify(args: argparse.Namespace) -> int:
+    from cm.file.catalog import PROTECT_FILE_SUFFIX
+    from cm.file.protect import ProtectCipherFile
+    from cm.progress import CmProgress
+    cipher_file = _load_protect_key(args.table, args.sources)
+    _unlock(cipher_file, args)
+    failed = 0
+    for filepath in _protect_files(args.sources, PROTECT_FILE_SUFFIX):
+        progress = CmProgress()
+        try:
+            protect_file = ProtectCipherFile.from_protect_file(filepath)
+            if not protect_file.try_unlock_from_cipher_file(cipher_file) or protect_file.locked:
+                raise CmValueError('密钥不匹配')
+            protect_file.unpack_stream(_NullWriter(), progress)
+            print(f'OK {filepath}')
+        except (CmBaseException, OSError) as e:
+            if progress.running:
+                progress.reset()
+            failed += 1
+            print(f'FAILED {filepath}：{e}')
+    return _EXIT_FAILED if failed else 0
+
+
+def _rekey(args: argparse.Namespace) -> int:
+    from cm.file.catalog import CATALOG_FILENAME, PROTECT_FILE_SUFFIX
+    from cm.file.protect import ProtectCipherFile
+    cipher_file = _load_protect_key(args.table, args.sources)
+    _unlock(cipher_file, args)
+    key, passphrase = _new_secret(cipher_file, args)
+    failed = 0
+    for filepath in _protect_files(args.sources, (PROTECT_FILE_SUFFIX, CATALOG_FILENAME)):
+        try:
+            protect_file = ProtectCipherFile.from_protect_file(filepath)
+            if not protect_file.try_unlock_from_cipher_file(cipher_file) or protect_file.locked:
+                raise CmValueError('密钥不匹配')
+            protect_file.rekey_file(key, passphrase)
+            print(f'OK {filepath}')
+        except (CmBaseException, OSError) as e:
+            failed += 1
+            print(f'FAILED {filepath}：{e}')
+    return _EXIT_FAILED if failed else 0
+
+
+def _read(args: argparse.Namespace) -> int:
+    import io
+    import shutil
+    from cm.file.protect import ProtectCipherFile
+    cipher_file = _load_protect_key(args.table, [args.file])
+    _unlock(cipher_file, args)
+    protect_file = ProtectCipherFile.from_protect_file(args.file)
+    if not protect_file.try_unlock_from_cipher_file(cipher_file) or protect_file.locked:
+        raise CmValueError('密钥不匹配')
+    with protect_file.open() as reader:
+        reader.seek(max(args.offset, -reader.size), io.SEEK_END if args.offset < 0 else io.SEEK_SET)
+        if args.length < 0:
+            shutil.copyfileobj(reader, sys.stdout.buffer)
+        else:
+            sys.stdout.buffer.write(reader.read(args.length))
+    return 0
+
+
+def _cat_table(args: argparse.Namespace) -> int:
+    import csv
+    cipher_file = _load_table(args.table)
+    _unlock(cipher_file, args)
+    csv.writer(sys.stdout).writerows(cipher_file.reader())
+    return 0
+
+
+def _export(args: argparse.Namespace) -> int:
+    import csv
+    cipher_file = _load_table(args.table)
+    _unlock(cipher_file, args)
+    with open(args.csv, 'w', encoding='utf-8', newline='') as f:
+        csv.writer(f).writerows(cipher_file.reader())
+    return 0
+
+
+def _import(args: argparse.Namespace) -> int:
+    import csv
+    cipher_file = _load_table(args.table)
+    _unlock(cipher_file, args)
+    with open(args.csv, 'r', encoding='utf-8', newline='') as f:
+        rows = [row for row in csv.reader(f) if row]
+    cipher_file.append_rows(rows, args.jobs or os.cpu_count() or 1)
+    _save_table(cipher_file, args.table)
+    print(f'已导入{len(rows)}行')
+    return 0
+
+
+def _rekey_table(args: argparse.Namespace) -> int:
+    cipher_file = _load_table(args.table)
+    _unlock(cipher_file, args)
+    key, passphrase = _new_secret(cipher_file, args)
+    migrated = cipher_file.wrapped_key is None
+    cipher_file.rekey(key, passphrase, args.jobs or os.cpu_count() or 1)
+    _save_table(cipher_file, args.table)
+    print('已更换密钥，全部单元格已用数据密钥重新加密' if migrated else '已更换密钥')
+    return 0
+
+
+def _catalog(args: argparse.Namespace) -> int:
+    from cm.file.catalog import PROTECT_FILE_SUFFIX, ProtectCatalog
+    from cm.progress import CmProgress
+    cipher_file = _load_protect_key(args.table, [args.directory])
+    _unlock(cipher_file, args)
+    catalog = ProtectCatalog.load(args.directory, cipher_file)
+    if args.refresh or not catalog.entries:
+        catalog.refresh(CmProgress())
+    elif catalog.is_stale():
+        print('索引已过期，使用--refresh重建', file=sys.stderr)
+    for filename, entry in catalog.find(args.prefix, args.contains):
+        print(f'{filename}\t{entry.name}\t{entry.total_size}')
+    return 0
+
+
+def _bench(args: argparse.Namespace) -> int:
+    if args.imports:
+        from cm.bench import print_imports
+        return 0 if print_imports() else _EXIT_FAILED
+    from cm.bench import main as bench_main
+    return bench_main()
+
+
+def _load_table(filepath: str) -> Any:
+    """读取加密表格文件"""
+    import pickle
+    from cm import file_load
+    from cm.file.table_record import TableRecordCipherFile
+    with open(filepath, 'rb') as f:
+        try:
+            data = pickle.load(f)
+        except Exception as e:
+            raise CmValueError('文件格式异常') from e
+    cipher_file = file_load(data)
+    if not isinstance(cipher_file, TableRecordCipherFile):
+        raise CmValueError('只支持加密表格文件')
+    return cipher_file
+
+
+def _save_table(cipher_file: Any, filepath: str) -> None:
+    """先写出到临时文件再替换，中途失败不会损坏原文件"""
+    import pickle
+    temp_filepath = filepath + '.tmp'
+    with open(temp_filepath, 'wb') as f:
+        pickle.dump(cipher_file.model_dump(), f)
+    os.replace(temp_filepath, filepath)
+
+
+def _load_protect_key(table: str | None, sources: list[str]) -> Any:
+    """读取提供密钥的文件，未指定加密表格时使用第一个保护文件"""
+    if table is not None:
+        return _load_table(table)
+    from cm.file.catalog import PROTECT_FILE_SUFFIX
+    from cm.file.protect import ProtectCipherFile
+    for filepath in _protect_files(sources, PROTECT_FILE_SUFFIX):
+        return ProtectCipherFile.from_protect_file(filepath)
+    raise CmValueError('没有找到保护文件')
+
+
+def _protect_files(sources: list[str], suffix: str | tuple[str, ...]) -> list[str]:
+    """展开目录中的保护文件"""
+    files = []
+    for source in sources:
+        if not os.path.isdir(source):
+            files.append(source)
+            continue
+        for root, _, names in os.walk(source):
+            files.extend(os.path.join(root, name) for name in sorted(names) if name.endswith(suffix))
+    return files
+
+
+def _unlock(cipher_file: Any, args: argparse.Namespace) -> None:
+    """解锁文件，密码与密钥文件的密码从环境变量或终端读取"""
+    if cipher_file.key_type.is_file:
+        if not args.key:
+            raise CmValueError('该加密方式需要使用--key指定密钥文件')
+        with open(args.key, 'rb') as f:
+            key = f.read()
+        if not cipher_file.validate_key(key):
+            raise CmValueError('密钥文件不正确')
+        try:
+            cipher_file.unlock(key)
+        except CmValueError:
+            cipher_file.unlock(key, _read_secret(args.passphrase_env, '密钥文件的密码：'))
+        return
+    if cipher_file.key_hash is None:
+        raise CmValueError('文件尚未设置密码')
+    password = _read_secret(args.password_env, '密码：')
+    if not cipher_file.validate_key(password):
+        raise CmValueError('密码不正确')
+    cipher_file.unlock(password)
+
+
+def _new_secret(cipher_file: Any, args: argparse.Namespace) -> tuple[str | bytes, str | None]:
+    """读取新的密码或密钥文件及其密码"""
+    if cipher_file.key_type.is_file:
+        if not args.new_key:
+            raise CmValueError('该加密方式需要使用--new-key指定新的密钥文件')
+        with open(args.new_key, 'rb') as f:
+            key = f.read()
+        passphrase = _read_secret(args.new_passphrase_env, '') if args.new_passphrase_env else None
+        return key, passphrase
+    if args.new_password_env:
+        return _read_secret(args.new_password_env, ''), None
+    password = getpass.getpass('新密码：')
+    if not password:
+        raise CmValueError('密码不能为空')
+    if getpass.getpass('再次输入新密码：') != password:
+        raise CmValueError('两次输入的密码不一致')
+    return password, None
+
+
+def _read_secret(env_name: str | None, prompt: str) -> str:
+    if env_name:
+        if env_name not in os.environ:
+            raise CmValueError(f'环境变量{env_name}不存在')
+        return os.environ[env_name]
+    return getpass.getpass(prompt)
+
+
+def _summary(results: list[Any]) -> int:
+    """输出批量处理的汇总与失败的文件"""
+    from cm.batch import BatchStatus
+    counts = {status: 0 for status in BatchStatus}
+    for result in results:
+        counts[result.status] += 1
+        if result.status == BatchStatus.FAILED:
+            print(f'FAILED {result.source}：{result.error}', file=sys.stderr)
+    print(f'完成{counts[BatchStatus.DONE]}，跳过{counts[BatchStatus.SKIPPED]}，失败{counts[BatchStatus.FAILED]}')
+    return _EXIT_FAILED if counts[BatchStatus.FAILED] else 0
+
+
+class _NullWriter:
+    """丢弃写入内容的流，仅用于校验"""
+
+    @staticmethod
+    def write(data: bytes) -> int:
+        return len(data)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
\ No newline at end of file
@@ -22,53 +22,228 @@
 #
 import base64
 import ctypes
+import functools
+import mmap
+import os
 import sys
+import threading
 from json import JSONEncoder
-
-
-def copy_bytes(data: bytes) -> bytes:
-    """深复制一段字节"""
-    return bytes.fromhex(data.hex())
-
+from typing import Self
 
 # 指示擦除是否被禁用
 erase_disabled = False
 # 指示是否尝试过擦除操作
 erase_triggered = False
 
+# 已锁定的内存页序号到锁定次数的映射：同一页可能被多个缓冲区共用，最后一个解除锁定时才解锁该页
+_locked_pages: dict[int, int] = {}
+_locked_pages_lock = threading.Lock()
+
 
 def erase(secret):
-    """擦除一个对象"""
+    """
+    擦除一个对象
+
+    只会原地清零可变的缓冲区（SecretBuffer、bytearray与可写的memoryview），
+    不可变对象无法被安全地擦除，将被忽略。
+    """
     global erase_triggered
     erase_triggered = True
     if erase_disabled:
         return
-    if sys.maxsize > 2 ^ 32:
-        offset = 24  # 64位操作系统
-    else:
-        offset = 12  # 32位操作系统
-    buffer_size = sys.getsizeof(secret) - offset
-    ctypes.memset(id(secret) + offset, 0, buffer_size)
+    if isinstance(secret, SecretBuffer):
+        secret.erase()
+    elif isinstance(secret, bytearray | memoryview):
+        _zero(secret)
 
 
-def fixed_bytes(data: bytes, unit_len: int, min_len: int = 0, max_len: int | None = None):
-    """将一段字节修整为指定大小的倍数"""
+def erase_bytes(data: bytes) -> None:
+    """
+    原地清零刚由哈希或解密产生的bytes对象
+
+    bytes不可变，只能依赖CPython的对象布局直接改写其内容，调用方须保证没有其他对象引用它。
+    空bytes与单字节bytes是解释器缓存的共享对象，不会被清零；其他解释器中不做任何事。
+    """
+    global erase_triggered
+    erase_triggered = True
+    if erase_disabled or type(data) is not bytes or len(data) < 2 or sys.implementation.name != 'cpython':
+        return
+    # 内容紧跟在对象头之后，基本大小包含末尾的一个空字节
+    ctypes.memset(id(data) + bytes.__basicsize__ - 1, 0, len(data))
+
+
+def _fixed_len(data_len: int, unit_len: int, min_len: int = 0, max_len: int | None = None) -> int:
+    """计算修整后的长度"""
     if unit_len == 0:
         raise ValueError(unit_len)
     if max_len is not None and min_len > max_len:
         raise ValueError((min_len, max_len))
-    data_len = len(data)
     extend_len = unit_len - (data_len % unit_len)
     if extend_len == unit_len and data_len > min_len:
-        return data
+        return data_len
     elif max_len is None or data_len + extend_len <= max_len:
         while data_len + extend_len < min_len:
             extend_len += unit_len
-        return data + b'\0' * extend_len
+        return data_len + extend_len
     else:
         raise ValueError(f'min_len: {min_len}, max_len: {max_len}, current_len: {data_len}')
 
 
+def fixed_bytes(data: bytes, unit_len: int, min_len: int = 0, max_len: int | None = None):
+    """将一段字节修整为指定大小的倍数"""
+    data_len = len(data)
+    size = _fixed_len(data_len, unit_len, min_len, max_len)
+    if size == data_len:
+        return data
+    return data + b'\0' * (size - data_len)
+
+
+class SecretBuffer:
+    """
+    可擦除的密钥缓冲区
+
+    基于bytearray，构建时只复制一次，之后通过只读视图直接传给加密算法而不再产生副本。
+    持有期间尺寸固定，擦除时原地清零，并尽可能锁定所在内存页以防止被交换到磁盘。
+    内存页按锁定次数计数，与其他缓冲区共用的页在全部解除锁定后才会解锁。
+    """
+    __slots__ = ('_buffer', '_view', '_memory_locked')
+
+    def __init__(self, data: 'bytes | bytearray | memoryview | str | SecretBuffer' = b'', lock_memory: bool = True):
+        """
+        Args:
+            data: 初始内容，文本将以UTF-8编码
+            lock_memory: 尝试锁定内存页，失败时忽略
+        """
+        if isinstance(data, str):
+            buffer = bytearray(data, 'utf-8')
+        elif isinstance(data, SecretBuffer):
+            buffer = bytearray(data._view)
+        else:
+            buffer = bytearray(data)
+        self._buffer = buffer
+        # 持有导出的视图，使bytearray无法被改变尺寸（重新分配会留下无法擦除的旧内存）
+        self._view = memoryview(buffer)
+        self._memory_locked = lock_memory and _lock_memory(self._view)
+
+    def __del__(self):
+        self.erase()
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def __buffer__(self, flags: int) -> memoryview:
+        return self._view.toreadonly()
+
+    @property
+    def view(self) -> memoryview:
+        """
+        Returns:
+            内容的只读视图，可直接传给加密算法与哈希函数
+        """
+        return self._view.toreadonly()
+
+    def fixed(self, unit_len: int, min_len: int = 0, max_len: int | None = None) -> Self:
+        """
+        将内容修整为指定大小的倍数，规则同fixed_bytes
+
+        Returns:
+            新的缓冲区，原缓冲区不变
+        """
+        result = self.__class__(bytearray(_fixed_len(len(self), unit_len, min_len, max_len)),
+                                self._memory_locked)
+        result._view[:len(self)] = self._view
+        return result
+
+    def erase(self) -> None:
+        """原地清零内容并解除内存锁定，可重复调用"""
+        view = getattr(self, '_view', None)
+        if view is None:
+            return
+        _zero(view)
+        if self._memory_locked:
+            _unlock_memory(view)
+            self._memory_locked = False
+
+
+def _zero(buffer: bytearray | memoryview) -> None:
+    """原地清零一个可写缓冲区"""
+    if not buffer or getattr(buffer, 'readonly', False):
+        return
+    ctypes.memset((ctypes.c_char * len(buffer)).from_buffer(buffer), 0, len(buffer))
+
+
+@functools.cache
+def _memory_function(name: str):
+    """获取系统的内存锁定函数，不支持时返回None"""
+    try:
+        if sys.platform == 'win32':
+            return getattr(ctypes.windll.kernel32, {'lock': 'VirtualLock', 'unlock': 'VirtualUnlock'}[name])
+        return getattr(ctypes.CDLL(None, use_errno=True), {'lock': 'mlock', 'unlock': 'munlock'}[name])
+    except (OSError, AttributeError):
+        return None
+
+
+def _pages(view: memoryview) -> range:
+    """缓冲区所在的内存页序号"""
+    address = ctypes.addressof(ctypes.c_char.from_buffer(view))
+    return range(address // mmap.PAGESIZE, (address + len(view) - 1) // mmap.PAGESIZE + 1)
+
+
+def _call_memory_function(name: str, pages: range) -> bool:
+    """对连续的内存页调用系统的内存锁定函数"""
+    func = _memory_function(name)
+    if func is None:
+        return False
+    result = func(ctypes.c_void_p(pages.start * mmap.PAGESIZE), ctypes.c_size_t(len(pages) * mmap.PAGESIZE))
+    return bool(result) if sys.platform == 'win32' else result == 0
+
+
+def _lock_memory(view: memoryview) -> bool:
+    """锁定缓冲区所在的内存页，并增加各页的锁定次数"""
+    if not view or _memory_function('lock') is None:
+        return False
+    pages = _pages(view)
+    with _locked_pages_lock:
+        # 系统的锁定不计数，重复锁定已锁定的页没有副作用
+        if not _call_memory_function('lock', pages):
+            return False
+        for page in pages:
+            _locked_pages[page] = _locked_pages.get(page, 0) + 1
+    return True
+
+
+def _unlock_memory(view: memoryview) -> None:
+    """减少缓冲区所在内存页的锁定次数，只解锁不再被其他缓冲区锁定的页"""
+    if not view:
+        return
+    with _locked_pages_lock:
+        unlocked = []
+        for page in _pages(view):
+            count = _locked_pages.get(page, 0)
+            if count > 1:
+                _locked_pages[page] = count - 1
+            else:
+                _locked_pages.pop(page, None)
+                unlocked.append(page)
+        # 连续的可解锁页一次解锁
+        start = 0
+        for i in range(1, len(unlocked) + 1):
+            if i == len(unlocked) or unlocked[i] != unlocked[i - 1] + 1:
+                _call_memory_function('unlock', range(unlocked[start], unlocked[i - 1] + 1))
+                start = i
+
+
+def _reset_locked_pages() -> None:
+    """子进程不继承内存锁定，也可能在其他线程持有锁时被创建"""
+    global _locked_pages_lock
+    _locked_pages.clear()
+    _locked_pages_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_locked_pages)
+
+
 class CmJsonEncoder(JSONEncoder):
     """CipherManager通用序列化器"""
 
@@ -0,0 +1,340 @@
+#  MIT License
+#
+#  Copyright (c) 2026 BlueWhaleMain
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+#
+"""
+Cipher Manager 批量加解密
+
+将目录树或文件列表批量加密为保护文件，或将保护文件批量解密。
+文件按大小从大到小调度，小文件合并为一个任务，由有界的进程池执行；
+一个进度管理器汇总全部文件的吞吐，大小与修改时间未变化的文件将被跳过，并可写出逐个文件的结果报告。
+"""
+import csv
+import os
+import time
+from concurrent.futures import Future, wait, FIRST_COMPLETED
+from enum import StrEnum
+from typing import Callable, Iterable, Sequence
+
+from pydantic import BaseModel
+
+from cm.error import CmRuntimeError, CmValueError
+from cm.file.base import CipherFile
+from cm.file.catalog import CATALOG_FILENAME, PROTECT_FILE_SUFFIX, ProtectCatalog
+from cm.file.compress import get_codec
+from cm.file.protect import ProtectCipherFile
+from cm.parallel import new_process_pool, submit_with_file
+from cm.progress import CmProgress
+from common.file import filesize_convert
+
+# 小文件合并为一个任务时的总大小上限
+_BATCH_BYTES = 8 * 1024 * 1024
+# 一个任务最多合并的文件数
+_BATCH_FILES = 64
+
+# 任务：(源文件路径, 目标路径, 源文件大小)
+_Job = tuple[str, str, int]
+
+
+class BatchStatus(StrEnum):
+    """批量处理中单个文件的结果状态"""
+    DONE = 'DONE'
+    SKIPPED = 'SKIPPED'
+    FAILED = 'FAILED'
+
+
+class BatchResult(BaseModel, defer_build=True):
+    """
+    单个文件的处理结果
+
+    Attributes:
+        source: 源文件路径
+        target: 目标文件路径，解密时为解密后的实际路径
+        status: 结果状态
+        size: 源文件大小
+        seconds: 耗时（秒）
+        error: 失败或跳过的原因
+    """
+    source: str
+    target: str
+    status: BatchStatus
+    size: int = 0
+    seconds: float = 0.0
+    error: str | None = None
+
+
+def pack_files(cipher_file: CipherFile, sources: str | Sequence[str], dist_dir: str, progress: CmProgress,
+               concurrent_count: int = 0, report_filepath: str | None = None,
+               compression: str | None = None) -> list[BatchResult]:
+    """
+    批量加密文件
+
+    Args:
+        cipher_file: 已解锁的加密方式文件
+        sources: 目录或文件路径，目录将递归加密并在目标目录中保持相对路径
+        dist_dir: 目标目录
+        progress: 进度管理器，以字节为单位
+        concurrent_count: 并发数，为0时使用CPU核心数，为1时在当前进程中执行
+        report_filepath: 结果报告（CSV）路径
+        compression: 加密前使用的压缩算法名称，为空时不压缩
+
+    Returns:
+        每个文件的处理结果
+
+    Raises:
+        CmInterrupt: 已取消
+        CmNotImplementedError: 指定的压缩算法不可用
+
+    加密后的文件修改时间与源文件一致，目标文件修改时间与记录的源文件大小均未变化时跳过，空文件无需加密也将跳过。
+    目标目录中已有索引的，加密完成后逐目录更新一次索引。
+    """
+    jobs = [(source, os.path.join(dist_dir, relpath + PROTECT_FILE_SUFFIX), os.path.getsize(source))
+            for source, relpath in _walk(sources, lambda _: True)]
+    results = _run(cipher_file, _pack_batch, jobs, progress, concurrent_count, report_filepath, compression)
+    _update_catalogs(cipher_file, results)
+    return results
+
+
+def unpack_files(cipher_file: CipherFile, sources: str | Sequence[str], dist_dir: str, progress: CmProgress,
+                 concurrent_count: int = 0, report_filepath: str | None = None) -> list[BatchResult]:
+    """
+    批量解密保护文件
+
+    Args:
+        cipher_file: 已解锁的加密方式文件
+        sources: 目录或保护文件路径，目录将递归查找扩展名为.cm-protect的文件并在目标目录中保持相对路径
+        dist_dir: 目标目录
+        progress: 进度管理器，以字节为单位
+        concurrent_count: 并发数，为0时使用CPU核心数，为1时在当前进程中执行
+        report_filepath: 结果报告（CSV）路径
+
+    Returns:
+        每个文件的处理结果
+
+    Raises:
+        CmInterrupt: 已取消
+
+    解密后的文件以记录的源文件名命名，修改时间与保护文件一致，大小与修改时间均未变化时跳过。
+    """
+    jobs = [(source, os.path.join(dist_dir, os.path.dirname(relpath)), os.path.getsize(source))
+            for source, relpath in _walk(sources, lambda name: name.endswith(PROTECT_FILE_SUFFIX))]
+    return _run(cipher_file, _unpack_batch, jobs, progress, concurrent_count, report_filepath)
+
+
+def write_report(results: Iterable[BatchResult], report_filepath: str) -> None:
+    """
+    写出CSV格式的结果报告
+
+    Args:
+        results: 处理结果
+        report_filepath: 报告路径
+    """
+    with open(report_filepath, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(BatchResult.model_fields)
+        for result in results:
+            writer.writerow(result.model_dump(mode='json').values())
+
+
+def _walk(sources: str | Sequence[str], accept: Callable[[str], bool]) -> list[tuple[str, str]]:
+    """展开目录，返回 (文件路径, 相对路径) 列表"""
+    if isinstance(sources, str):
+        sources = [sources]
+    files = []
+    for source in sources:
+        if not os.path.isdir(source):
+            files.append((source, os.path.basename(source)))
+            continue
+        for root, _, names in os.walk(source):
+            for name in names:
+                if accept(name):
+                    filepath = os.path.join(root, name)
+                    files.append((filepath, os.path.relpath(filepath, source)))
+    return files
+
+
+def _balance(jobs: list[_Job]) -> list[list[_Job]]:
+    """按大小从大到小排列任务，大文件单独成批，小文件合并，使各工作进程的负载接近"""
+    batches: list[list[_Job]] = []
+    batch: list[_Job] = []
+    batch_bytes = 0
+    for job in sorted(jobs, key=lambda item: item[2], reverse=True):
+        if batch and (batch_bytes + job[2] > _BATCH_BYTES or len(batch) >= _BATCH_FILES):
+            batches.append(batch)
+            batch, batch_bytes = [], 0
+        batch.append(job)
+        batch_bytes += job[2]
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def _run(cipher_file: CipherFile, func: Callable[[CipherFile, list[_Job], int], list[BatchResult]], jobs: list[_Job],
+         progress: CmProgress, concurrent_count: int, report_filepath: str | None,
+         compression: str | None = None) -> list[BatchResult]:
+    """
+    调度全部任务并汇总进度，工作进程共用一个保护文件实例以复用已推导的加密上下文
+
+    使用进程池时每个工作进程只用一个线程处理文件，避免进程数与线程数相乘超出CPU核心数；
+    在当前进程中执行时，单个文件仍可使用全部核心。
+    """
+    template = ProtectCipherFile.from_cipher_file(cipher_file)
+    if compression is not None:
+        # 提前检查压缩算法是否可用，而不是每个文件各失败一次
+        get_codec(compression)
+        template.compression = compression
+    batches = _balance(jobs)
+    concurrent_count = min(concurrent_count or os.cpu_count() or 1, max(len(batches), 1))
+    progress = progress.start_or_sub(sum(job[2] for job in jobs), formatter=filesize_convert, unit='字节')
+    results: list[BatchResult] = []
+    start = time.perf_counter()
+    done_bytes = 0
+
+    def collect(batch_results: list[BatchResult]) -> None:
+        nonlocal done_bytes
+        results.extend(batch_results)
+        done_bytes += sum(result.size for result in batch_results if result.status == BatchStatus.DONE)
+        speed = int(done_bytes / max(time.perf_counter() - start, 1e-9))
+        progress.step(sum(result.size for result in batch_results),
+                      last_msg=f'{len(results)}/{len(jobs)}个文件，{filesize_convert(speed)}/s')
+
+    try:
+        if concurrent_count <= 1:
+            for batch in batches:
+                collect(func(template, batch, 0))
+        else:
+            executor = new_process_pool(template, concurrent_count)
+            pending: set[Future] = set()
+            remaining = iter(batches)
+            try:
+                while True:
+                    # 限制在途任务数量，大文件在前，后续的小文件任务填补空闲的工作进程
+                    for batch in remaining:
+                        pending.add(submit_with_file(executor, func, batch, 1))
+                        if len(pending) >= concurrent_count * 2:
+                            break
+                    if not pending:
+                        break
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        collect(future.result())
+            finally:
+                executor.shutdown(wait=False, cancel_futures=True)
+        progress.complete()
+    except BaseException:
+        progress.cancel()
+        raise
+    finally:
+        if report_filepath is not None:
+            write_report(results, report_filepath)
+    return results
+
+
+def _pack_batch(protect_file: ProtectCipherFile, jobs: list[_Job], concurrent_count: int) -> list[BatchResult]:
+    """加密一批文件，concurrent_count为单个文件的线程数上限"""
+    results = []
+    for source, target, size in jobs:
+        start = time.perf_counter()
+        try:
+            stat = os.stat(source)
+            reason = None
+            if stat.st_size == 0:
+                status, reason = BatchStatus.SKIPPED, '空文件'
+            elif _packed(target, stat):
+                status = BatchStatus.SKIPPED
+            else:
+                os.makedirs(os.path.dirname(target) or '.', exist_ok=True)
+                protect_file.pack_to(source, target, CmProgress(), update_catalog=False,
+                                     concurrent_count=concurrent_count)
+                os.utime(target, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+                status = BatchStatus.DONE
+            results.append(BatchResult(source=source, target=target, status=status, size=size,
+                                       seconds=time.perf_counter() - start, error=reason))
+        except Exception as e:
+            results.append(BatchResult(source=source, target=target, status=BatchStatus.FAILED, size=size,
+                                       seconds=time.perf_counter() - start, error=str(e) or type(e).__name__))
+    return results
+
+
+def _update_catalogs(cipher_file: CipherFile, results: list[BatchResult]) -> None:
+    """更新有新加密文件且已有索引的目标目录的索引，每个目录只重建一次，无法解锁的索引保持不变"""
+    directories = {os.path.dirname(os.path.abspath(result.target)) for result in results
+                   if result.status == BatchStatus.DONE}
+    for directory in sorted(directories):
+        if not os.path.exists(os.path.join(directory, CATALOG_FILENAME)):
+            continue
+        try:
+            ProtectCatalog.load(directory, cipher_file).refresh(CmProgress())
+        except (CmValueError, CmRuntimeError):
+            pass
+
+
+def _packed(target: str, stat: os.stat_result) -> bool:
+    """目标保护文件是否对应源文件的当前状态"""
+    try:
+        if os.stat(target).st_mtime_ns != stat.st_mtime_ns:
+            return False
+        return ProtectCipherFile.from_protect_file(target).total_size == stat.st_size
+    except (OSError, CmRuntimeError, ValueError):
+        return False
+
+
+def _unpack_batch(template: ProtectCipherFile, jobs: list[_Job], concurrent_count: int) -> list[BatchResult]:
+    """解密一批保护文件，目标为所在目录，concurrent_count为单个文件的并发数上限"""
+    results = []
+    for source, target_dir, size in jobs:
+        start = time.perf_counter()
+        target = target_dir
+        try:
+            protect_file = template
+            if not template.switch_file(source):
+                protect_file = ProtectCipherFile.from_protect_file(source)
+                if not protect_file.try_unlock_from_cipher_file(template) or protect_file.locked:
+                    raise CmRuntimeError('密钥不匹配')
+            name = protect_file.decrypt_filename()
+            # 仅使用记录的文件名部分，防止写出到目标目录之外
+            name = os.path.basename(name) if name else ''
+            if name in ('', '.', '..'):
+                name = os.path.basename(source).removesuffix(PROTECT_FILE_SUFFIX)
+            target = os.path.join(target_dir, name)
+            stat = os.stat(source)
+            if _unpacked(target, stat, protect_file.total_size):
+                status = BatchStatus.SKIPPED
+            else:
+                os.makedirs(target_dir or '.', exist_ok=True)
+                protect_file.unpack_to(target, CmProgress(), concurrent_count=concurrent_count)
+                os.utime(target, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+                status = BatchStatus.DONE
+            results.append(BatchResult(source=source, target=target, status=status, size=size,
+                                       seconds=time.perf_counter() - start))
+        except Exception as e:
+            results.append(BatchResult(source=source, target=target, status=BatchStatus.FAILED, size=size,
+                                       seconds=time.perf_counter() - start, error=str(e) or type(e).__name__))
+    return results
+
+
+def _unpacked(target: str, stat: os.stat_result, total_size: int | None) -> bool:
+    """目标文件是否已从保护文件的当前状态解密"""
+    try:
+        target_stat = os.stat(target)
+    except OSError:
+        return False
+    return target_stat.st_mtime_ns == stat.st_mtime_ns and target_stat.st_size == total_size
\ No newline at end of file
@@ -0,0 +1,222 @@
+#  MIT License
+#
+#  Copyright (c) 2026 BlueWhaleMain
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+#
+"""
+Cipher Manager 性能基准
+
+用于衡量当前机器上各加密配置的吞吐与各模块的导入耗时，可直接运行：``python -m cm.bench``
+"""
+import io
+import os
+import secrets
+import subprocess
+import sys
+import time
+from typing import Sequence, Callable
+
+from cm.file.backend import list_backends, set_preferred_backend
+from cm.file.base import CipherName, HashName, cipher_module
+from cm.file.table_record import TableRecordCipherFile
+from cm.progress import CmProgress
+
+# 默认测量的加密迭代次数
+DEFAULT_ITER_COUNTS = (1, 100, 1000, 10000)
+# 默认并排测量后端时的模式
+DEFAULT_BACKEND_MODES = ('CBC', 'CTR', 'GCM')
+# 各模块在全新解释器中的导入耗时预算（秒）
+# cm只包含异常与版本信息，命令行等短命进程依赖于此；文件模块的耗时主要来自pydantic
+IMPORT_BUDGETS = {
+    'cm': 0.02,
+    'cm.file.table_record': 0.25,
+    'cm.file.protect': 0.3,
+}
+
+
+def new_bench_file(cipher_name: CipherName = CipherName.AES256, iter_count: int = 1,
+                   mode_name: str = 'CBC') -> TableRecordCipherFile:
+    """
+    创建一个已解锁的、使用随机口令的加密表格文件
+
+    Args:
+        cipher_name: 对称加密算法名称
+        iter_count: 加密迭代次数
+        mode_name: 模式名称，如CBC、CTR或GCM
+
+    Returns:
+        已解锁的文件实例，使用首选后端
+    """
+    if cipher_name.padding <= 0:
+        raise ValueError(f'unsupported cipher name: {cipher_name}')
+    cipher_args: dict = dict(mode=getattr(cipher_module(cipher_name), f'MODE_{mode_name}'))
+    if mode_name == 'CBC':
+        cipher_args['iv'] = os.urandom(cipher_name.padding)
+    cipher_file = TableRecordCipherFile(content_encoding='UTF-8', cipher_name=cipher_name, iter_count=iter_count,
+                                        key_hash_name=HashName.SHA256, cipher_args=cipher_args)
+    password = secrets.token_urlsafe(12)
+    cipher_file.set_key(password)
+    cipher_file.unlock(password)
+    return cipher_file
+
+
+def bench_cells(cipher_name: CipherName = CipherName.AES256, iter_counts: Sequence[int] = DEFAULT_ITER_COUNTS,
+                cell_len: int = 24, min_time: float = 0.2) -> list[tuple[int, float, float]]:
+    """
+    测量单元格加解密吞吐
+
+    Args:
+        cipher_name: 对称加密算法名称
+        iter_counts: 需要测量的加密迭代次数
+        cell_len: 单元格明文长度
+        min_time: 每项测量的最短耗时（秒）
+
+    Returns:
+        (加密迭代次数, 每秒加密单元格数, 每秒解密单元格数) 列表
+    """
+    cipher_file = new_bench_file(cipher_name)
+    value = secrets.token_urlsafe(cell_len)[:cell_len]
+    result = []
+    for iter_count in iter_counts:
+        cipher_file.iter_count = iter_count
+        encrypted = cipher_file._record_value_encrypt(value)
+        encrypt_rate = _rate(lambda: cipher_file._record_value_encrypt(value), min_time)
+        decrypt_rate = _rate(lambda: cipher_file._record_value_decrypt(encrypted), min_time)
+        result.append((iter_count, encrypt_rate, decrypt_rate))
+    return result
+
+
+def bench_backends(cipher_name: CipherName = CipherName.AES256, mode_names: Sequence[str] = DEFAULT_BACKEND_MODES,
+                   size: int = 4 * 1024 * 1024, chunk_size: int = 1024 * 1024,
+                   min_time: float = 0.2) -> list[tuple[str, str, float, float]]:
+    """
+    并排测量同一加密算法各可用后端的流加解密吞吐
+
+    Args:
+        cipher_name: 对称加密算法名称
+        mode_names: 需要测量的模式名称
+        size: 每次加解密的数据长度
+        chunk_size: 块大小
+        min_time: 每项测量的最短耗时（秒）
+
+    Returns:
+        (后端名称, 模式名称, 每秒加密字节数, 每秒解密字节数) 列表
+    """
+    data = os.urandom(size)
+    result = []
+    for backend in list_backends(cipher_name):
+        if not backend.available:
+            continue
+        set_preferred_backend(cipher_name, backend.name)
+        try:
+            for mode_name in mode_names:
+                cipher_file = new_bench_file(cipher_name, mode_name=mode_name)
+                encrypted = b''.join(cipher_file.encrypt_stream(io.BytesIO(data), chunk_size, CmProgress(), size))
+                decrypt_chunk_size = chunk_size + cipher_file._tag_len
+
+                def encrypt() -> None:
+                    for _ in cipher_file.encrypt_stream(io.BytesIO(data), chunk_size, CmProgress(), size):
+                        pass
+
+                def decrypt() -> None:
+                    for _ in cipher_file.decrypt_stream(io.BytesIO(encrypted), decrypt_chunk_size, CmProgress(),
+                                                        len(encrypted)):
+                        pass
+
+                result.append((backend.name, mode_name, _rate(encrypt, min_time) * size,
+                               _rate(decrypt, min_time) * size))
+        finally:
+            set_preferred_backend(cipher_name, None)
+    return result
+
+
+def bench_import(module: str = 'cm', repeat: int = 5) -> float:
+    """
+    在全新的解释器中测量导入模块的耗时
+
+    Args:
+        module: 模块名称
+        repeat: 重复次数
+
+    Returns:
+        最短耗时（秒），不含解释器自身的启动
+    """
+    code = f'import time; start = time.perf_counter(); import {module}; print(time.perf_counter() - start)'
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, (root, os.environ.get('PYTHONPATH')))))
+    return min(float(subprocess.run([sys.executable, '-c', code], env=env, check=True, capture_output=True,
+                                    text=True).stdout) for _ in range(repeat))
+
+
+def bench_imports() -> list[tuple[str, float, float]]:
+    """
+    按预算测量各模块的导入耗时
+
+    Returns:
+        (模块名称, 导入耗时, 预算) 列表，单位为秒
+    """
+    return [(module, bench_import(module), budget) for module, budget in IMPORT_BUDGETS.items()]
+
+
+def print_imports() -> bool:
+    """
+    输出各模块的导入耗时
+
+    Returns:
+        是否全部在预算之内
+    """
+    print('import ms')
+    print(f'{"module":<24} {"time":>8} {"budget":>8}')
+    within = True
+    for module, seconds, budget in bench_imports():
+        over = seconds > budget
+        within = within and not over
+        print(f'{module:<24} {seconds * 1000:>8.1f} {budget * 1000:>8.1f}{" OVER" if over else ""}')
+    return within
+
+
+def _rate(func: Callable[[], object], min_time: float) -> float:
+    """反复执行直到超过最短耗时，返回每秒执行次数"""
+    count = 0
+    start = time.perf_counter()
+    while True:
+        func()
+        count += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return count / elapsed
+
+
+def main() -> int:
+    within = print_imports()
+    for cipher_name in (CipherName.AES256, CipherName.DES3):
+        print(f'{cipher_name} cells/s')
+        print(f'{"iter_count":>10} {"encrypt":>12} {"decrypt":>12}')
+        for iter_count, encrypt_rate, decrypt_rate in bench_cells(cipher_name):
+            print(f'{iter_count:>10} {encrypt_rate:>12.1f} {decrypt_rate:>12.1f}')
+    print(f'{CipherName.AES256} backends MB/s')
+    print(f'{"backend":<14} {"mode":<6} {"encrypt":>10} {"decrypt":>10}')
+    for backend_name, mode_name, encrypt_rate, decrypt_rate in bench_backends():
+        print(f'{backend_name:<14} {mode_name:<6} {encrypt_rate / 1e6:>10.1f} {decrypt_rate / 1e6:>10.1f}')
+    return 0 if within else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
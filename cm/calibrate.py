@@ -0,0 +1,287 @@
+#  MIT License
+#
+#  Copyright (c) 2026 BlueWhaleMain
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+#
+"""
+Cipher Manager 迭代次数校准
+
+在当前机器上测量所选加密算法与哈希算法的实际开销，推算满足目标延迟的迭代次数，
+以及流加密时的块大小与并发数。
+"""
+import io
+import os
+import time
+from typing import Callable, Literal
+
+from pydantic import BaseModel
+
+from cm.base import SecretBuffer
+from cm.bench import new_bench_file
+from cm.file.base import CipherFile, CipherName, HashName, KeyType
+from cm.file.table_record import TableRecordCipherFile
+from cm.parallel import DEFAULT_BATCH_CHUNKS
+from cm.progress import CmProgress
+
+# 默认的单元格解密目标延迟（秒）
+DEFAULT_CELL_LATENCY = 0.002
+# 默认的解锁目标延迟（秒）
+DEFAULT_UNLOCK_LATENCY = 0.3
+# 默认的文件加密目标耗时（秒）
+DEFAULT_FILE_LATENCY = 10.0
+# scrypt允许占用的最大内存
+DEFAULT_SCRYPT_MAX_MEMORY = 128 * 1024 * 1024
+
+# 每次探测的最短耗时（秒）
+_PROBE_TIME = 0.02
+# 探测单元格解密时使用的明文长度
+_CELL_LEN = 32
+# 探测流加密时使用的数据长度
+_STREAM_PROBE_LEN = 1024 * 1024
+# 流加密的最小块大小，块之间互不依赖时过小的块无法抵消线程调度的开销
+MIN_STREAM_CHUNK_SIZE = 64 * 1024
+# 流加密的最大块大小
+MAX_STREAM_CHUNK_SIZE = 8 * 1024 * 1024
+# 每块的固定开销占块耗时的最大比例
+_CHUNK_OVERHEAD_RATIO = 0.01
+# 探测每块固定开销时使用的数据长度与细分块大小
+_CHUNK_PROBE_LEN = 4096
+_CHUNK_PROBE_SPLIT = 256
+# 并发时每个工作线程至少分到的块数
+_CHUNKS_PER_WORKER = 4
+# 按加密配置缓存的流加密开销：(每块固定开销, 每字节开销)，单位为秒
+_stream_costs: dict[tuple, tuple[float, float]] = {}
+
+
+class StreamTuning(BaseModel, defer_build=True):
+    """
+    流加密参数
+
+    Attributes:
+        chunk_size: 块大小
+        concurrent_count: 并发数
+        batch_chunks: 交给进程池时每个任务处理的块数
+    """
+    chunk_size: int
+    concurrent_count: int
+    batch_chunks: int
+
+
+class Calibration(BaseModel, defer_build=True):
+    """
+    校准结果
+
+    Attributes:
+        iter_count: 加密迭代次数
+        key_hash_iter_count: 密钥哈希算法迭代次数（scrypt为代价参数N）
+    """
+    iter_count: int
+    key_hash_iter_count: int
+
+
+def calibrate(cipher_name: CipherName, key_hash_name: HashName, key_type: KeyType = KeyType.PASSWORD,
+              cell_latency: float = DEFAULT_CELL_LATENCY,
+              unlock_latency: float = DEFAULT_UNLOCK_LATENCY) -> Calibration:
+    """
+    校准新文件的迭代次数
+
+    Args:
+        cipher_name: 加密算法名称
+        key_hash_name: 密钥哈希算法名称
+        key_type: 密钥类型
+        cell_latency: 单元格解密目标延迟（秒）
+        unlock_latency: 解锁目标延迟（秒）
+
+    Returns:
+        校准结果
+    """
+    return Calibration(iter_count=calibrate_iter_count(cipher_name, cell_latency),
+                       key_hash_iter_count=calibrate_key_hash_iter_count(key_hash_name, key_type, unlock_latency))
+
+
+def calibrate_iter_count(cipher_name: CipherName, cell_latency: float = DEFAULT_CELL_LATENCY,
+                         mode_name: str = 'CBC') -> int:
+    """
+    校准加密迭代次数，使单个单元格的解密耗时接近目标延迟
+
+    Args:
+        cipher_name: 加密算法名称
+        cell_latency: 单元格解密目标延迟（秒）
+        mode_name: 模式名称，如CBC或ECB
+
+    Returns:
+        加密迭代次数，非对称加密与不支持迭代的计数器模式固定为1
+    """
+    if cipher_name.padding <= 0 or mode_name in ('CTR', 'GCM'):
+        return 1
+    cipher_file = new_bench_file(cipher_name, mode_name=mode_name)
+    data = os.urandom(_CELL_LEN)
+
+    def decrypt(iter_count: int) -> None:
+        cipher_file.iter_count = iter_count
+        cipher_file._decrypt(data)
+
+    return max(int(cell_latency / _probe(decrypt)), 1)
+
+
+def calibrate_key_hash_iter_count(key_hash_name: HashName, key_type: KeyType = KeyType.PASSWORD,
+                                  unlock_latency: float = DEFAULT_UNLOCK_LATENCY,
+                                  scrypt_max_memory: int = DEFAULT_SCRYPT_MAX_MEMORY) -> int:
+    """
+    校准密钥哈希算法迭代次数，使解锁耗时接近目标延迟
+
+    Args:
+        key_hash_name: 密钥哈希算法名称
+        key_type: 密钥类型
+        unlock_latency: 解锁目标延迟（秒）
+        scrypt_max_memory: scrypt允许占用的最大内存
+
+    Returns:
+        密钥哈希算法迭代次数，scrypt为不超过内存上限的2的幂
+    """
+    cipher_file = TableRecordCipherFile(content_encoding='UTF-8', cipher_name=CipherName.AES256,
+                                        key_hash_name=key_hash_name, key_type=key_type, password_salt=os.urandom(64))
+    # 拉伸口令时，校验密钥与解锁各执行一次派生
+    derive_count = 2 if cipher_file._key_stretched else 1
+
+    def gen_key_hash(iter_count: int) -> None:
+        cipher_file.key_hash_iter_count = iter_count
+        cipher_file._gen_key_hash(SecretBuffer(b'calibrate'))
+
+    if key_hash_name == HashName.SCRYPT:
+        r = cipher_file.key_hash_args.get('r', 8)
+        seconds = _probe(gen_key_hash, 2 ** 10)
+        iter_count = 2 ** 10
+        while (iter_count * 2 * seconds * derive_count <= unlock_latency
+               and 128 * r * iter_count * 2 <= scrypt_max_memory):
+            iter_count *= 2
+        return iter_count
+    return max(int(unlock_latency / derive_count / _probe(gen_key_hash)), 1)
+
+
+def calibrate_stream_iter_count(cipher_name: CipherName, size: int, file_latency: float = DEFAULT_FILE_LATENCY) -> int:
+    """
+    校准流加密迭代次数，使整个文件的加密耗时接近目标耗时
+
+    Args:
+        cipher_name: 加密算法名称
+        size: 文件大小
+        file_latency: 文件加密目标耗时（秒）
+
+    Returns:
+        加密迭代次数，非对称加密固定为1
+    """
+    if cipher_name.padding <= 0 or size <= 0:
+        return 1
+    cipher_file = new_bench_file(cipher_name)
+    data = os.urandom(_STREAM_PROBE_LEN)
+    start = time.perf_counter()
+    cipher_file._cipher().encrypt(data)
+    seconds_per_byte = (time.perf_counter() - start) / len(data)
+    return max(int(file_latency / (seconds_per_byte * size)), 1)
+
+
+def calibrate_stream(cipher_file: CipherFile, size: int,
+                     mode: Literal['encrypt', 'decrypt'] = 'encrypt') -> StreamTuning:
+    """
+    为已解锁的文件选择流加解密的块大小与并发数
+
+    非对称加密使用允许的最大块；对称加密先测量每块的固定开销与每字节开销，
+    取固定开销不超过块耗时1%的最小块，并保证并发时每个工作线程都能分到若干块。
+    只有加密上下文声明各块互不依赖时才并发。测量结果按加密配置与后端缓存，同一配置只测量一次。
+
+    Args:
+        cipher_file: 已解锁的加密方式文件
+        size: 数据大小
+        mode: 加密或解密
+
+    Returns:
+        流加密参数
+    """
+    context = cipher_file._stream_context
+    cpu_count = os.cpu_count() or 1
+    concurrent = context.parallel
+    if context.max_crypt_len > 0:
+        chunk_size = context.decrypt_len if mode == 'decrypt' and context.decrypt_len > 0 else context.max_crypt_len
+        chunk_count = max(-(-size // chunk_size), 1)
+        concurrent_count = min(cpu_count, chunk_count)
+        batch_chunks = min(DEFAULT_BATCH_CHUNKS, max(-(-chunk_count // (concurrent_count * 2)), 1))
+        return StreamTuning(chunk_size=chunk_size, concurrent_count=concurrent_count, batch_chunks=batch_chunks)
+    overhead, per_byte = _stream_cost(cipher_file)
+    chunk_size = _next_power_of_two(int(overhead / _CHUNK_OVERHEAD_RATIO / per_byte))
+    # 小文件的块不小于一个分组，分组长度为2的幂，块大小因此总是分组长度的整数倍
+    chunk_size = min(max(chunk_size, MIN_STREAM_CHUNK_SIZE), MAX_STREAM_CHUNK_SIZE,
+                     max(_next_power_of_two(size), context.padding))
+    concurrent_count = 1
+    if concurrent:
+        concurrent_count = min(cpu_count, max(-(-size // MIN_STREAM_CHUNK_SIZE), 1))
+        if concurrent_count > 1:
+            chunk_size = max(min(chunk_size, _next_power_of_two(size // (concurrent_count * _CHUNKS_PER_WORKER))),
+                             MIN_STREAM_CHUNK_SIZE)
+    return StreamTuning(chunk_size=chunk_size, concurrent_count=concurrent_count, batch_chunks=DEFAULT_BATCH_CHUNKS)
+
+
+def clear_stream_cache() -> None:
+    """清除缓存的流加密开销，硬件或负载变化后重新测量"""
+    _stream_costs.clear()
+
+
+def _stream_cost(cipher_file: CipherFile) -> tuple[float, float]:
+    """测量并缓存流加密的每块固定开销与每字节开销（秒）"""
+    context = cipher_file._stream_context
+    # 加密算法实例的类型区分同一算法的不同后端
+    key = (cipher_file.cipher_name, cipher_file.cipher_args.get('mode'), cipher_file.iter_count,
+           type(context), type(context.new()), context.padding, context.tag_len)
+    if key in _stream_costs:
+        return _stream_costs[key]
+    data = os.urandom(_CHUNK_PROBE_LEN)
+
+    def crypt(chunk_size: int) -> Callable[[int], None]:
+        def run(count: int) -> None:
+            for _ in range(count):
+                for _ in cipher_file.encrypt_stream(io.BytesIO(data), chunk_size, CmProgress(), len(data)):
+                    pass
+
+        return run
+
+    whole = _probe(crypt(_CHUNK_PROBE_LEN))
+    split = _probe(crypt(_CHUNK_PROBE_SPLIT))
+    count = _CHUNK_PROBE_LEN // _CHUNK_PROBE_SPLIT
+    overhead = max((split - whole) / (count - 1), 0.0)
+    per_byte = max(whole - overhead, whole / 2) / _CHUNK_PROBE_LEN
+    _stream_costs[key] = overhead, per_byte
+    return overhead, per_byte
+
+
+def _next_power_of_two(value: int) -> int:
+    """不小于给定值的最小的2的幂"""
+    return 1 << max(value - 1, 0).bit_length()
+
+
+def _probe(func: Callable[[int], object], start: int = 1) -> float:
+    """成倍增加迭代次数直到单次调用超过最短耗时，返回每次迭代的平均耗时（秒）"""
+    iter_count = start
+    while True:
+        begin = time.perf_counter()
+        func(iter_count)
+        elapsed = time.perf_counter() - begin
+        if elapsed >= _PROBE_TIME:
+            return elapsed / iter_count
+        iter_count *= 2
@@ -1,6 +1,6 @@
 #  MIT License
 #
-#  Copyright (c) 2022-2025 BlueWhaleMain
+#  Copyright (c) 2022-2026 BlueWhaleMain
 #
 #  Permission is hereby granted, free of charge, to any person obtaining a copy
 #  of this software and associated documentation files (the "Software"), to deal
@@ -56,3 +56,18 @@ class CmNotImplementedError(CmRuntimeError, NotImplementedError):
 
 class CmMissingSecretError(CmRuntimeError):
     """CipherManager缺少凭据错误"""
+
+
+class CmDamagedError(CmRuntimeError):
+    """
+    CipherManager数据损坏错误
+
+    Attributes:
+        start: 损坏范围的起始偏移
+        end: 损坏范围的结束偏移（不含）
+    """
+
+    def __init__(self, message: str, start: int, end: int):
+        super().__init__(message)
+        self.start = start
+        self.end = end
\ No newline at end of file
@@ -0,0 +1,253 @@
+#  MIT License
+#
+#  Copyright (c) 2026 BlueWhaleMain
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+#
+"""
+加密算法后端
+
+同一个加密算法名称可以注册多个实现，实现模块提供与pycryptodome相同的new接口与MODE_*常量，首次使用时才导入。
+后端声明分组长度、填充长度以及各模式是否可以并发、随机访问，流加解密据此选择串行、并发或随机访问的处理方式。
+分组加密后端另外声明各算法由口令修整的最短密钥长度，非对称加密后端声明每块的填充开销，加密上下文据此推导。
+
+不同后端对同一算法的输出必须逐字节一致，文件中只记录算法名称与参数，不记录后端，
+可以通过环境变量CM_CIPHER_BACKEND或set_preferred_backend选择首选后端。
+"""
+import importlib
+import os
+from typing import Any, Callable, Iterable, Mapping
+
+from cm.error import CmNotImplementedError
+
+# 选择首选后端的环境变量，进程池的工作进程同样继承
+BACKEND_ENV = 'CM_CIPHER_BACKEND'
+# PKCS#1 OAEP未指定哈希算法时使用SHA-1的摘要长度
+_OAEP_DEFAULT_DIGEST_SIZE = 20
+
+
+class CipherBackend:
+    """
+    加密算法后端
+
+    Attributes:
+        name: 后端名称
+        module_name: 实现模块名称
+        block_size: 分组长度，0表示不是分组加密
+        padding: 填充长度，-1为不支持填充
+        parallel_modes: 各块互不依赖、可以并发处理的模式名称，空字符串表示没有模式参数的算法（如RSA）
+        seekable_modes: 可以从任意块开始解密的模式名称
+        min_key_lens: 分组加密算法名称到由口令修整的最短密钥长度的映射
+        overhead: 非对称加密由算法参数计算每块填充开销的函数，分组加密为空
+    """
+    __slots__ = ('name', 'module_name', 'block_size', 'padding', 'parallel_modes', 'seekable_modes', 'min_key_lens',
+                 'overhead', '_module', '_mode_names')
+
+    def __init__(self, name: str, module_name: str, block_size: int = 0, padding: int = -1,
+                 parallel_modes: Iterable[str] = (), seekable_modes: Iterable[str] = (),
+                 min_key_lens: Mapping[str, int] | None = None,
+                 overhead: Callable[[dict[str, Any]], int] | None = None):
+        """
+        Args:
+            name: 后端名称
+            module_name: 实现模块名称
+            block_size: 分组长度，0表示不是分组加密
+            padding: 填充长度，-1为不支持填充
+            parallel_modes: 各块互不依赖、可以并发处理的模式名称
+            seekable_modes: 可以从任意块开始解密的模式名称
+            min_key_lens: 分组加密算法名称到由口令修整的最短密钥长度的映射
+            overhead: 非对称加密由算法参数计算每块填充开销的函数
+        """
+        self.name = name
+        self.module_name = module_name
+        self.block_size = block_size
+        self.padding = padding
+        self.parallel_modes = frozenset(parallel_modes)
+        self.seekable_modes = frozenset(seekable_modes)
+        self.min_key_lens = dict(min_key_lens or {})
+        self.overhead = overhead
+        self._module: Any | None = None
+        self._mode_names: dict[int, str] | None = None
+
+    def __repr__(self) -> str:
+        return f'{self.__class__.__name__}({self.name!r}, {self.module_name!r})'
+
+    @property
+    def available(self) -> bool:
+        """实现模块及其依赖是否可以导入"""
+        try:
+            self.load()
+            return True
+        except CmNotImplementedError:
+            return False
+
+    def load(self) -> Any:
+        """
+        导入实现模块
+
+        Returns:
+            实现模块，首次调用时导入
+
+        Raises:
+            CmNotImplementedError: 缺少依赖
+        """
+        if self._module is None:
+            try:
+                self._module = importlib.import_module(self.module_name)
+            except ImportError as e:
+                raise CmNotImplementedError(f'cipher backend {self.name} is not available: {e}') from e
+        return self._module
+
+    def mode_name(self, cipher_args: dict[str, Any]) -> str:
+        """
+        Args:
+            cipher_args: 加密算法自定义参数
+
+        Returns:
+            模式名称（如CBC），没有模式参数时为空字符串，未知的模式为其数值
+        """
+        if 'mode' not in cipher_args:
+            return ''
+        if self._mode_names is None:
+            module = self.load()
+            self._mode_names = {getattr(module, attr): attr.removeprefix('MODE_')
+                                for attr in dir(module) if attr.startswith('MODE_')}
+        mode = cipher_args['mode']
+        return self._mode_names.get(mode, str(mode))
+
+    def parallel(self, cipher_args: dict[str, Any]) -> bool:
+        """使用给定参数时各块是否互不依赖、可以并发处理"""
+        return self.mode_name(cipher_args) in self.parallel_modes
+
+    def seekable(self, cipher_args: dict[str, Any]) -> bool:
+        """使用给定参数时是否可以从任意块开始解密"""
+        return self.mode_name(cipher_args) in self.seekable_modes
+
+    def min_key_len(self, cipher_name: str) -> int:
+        """
+        Args:
+            cipher_name: 加密算法名称
+
+        Returns:
+            由口令修整的最短密钥长度
+
+        Raises:
+            CmNotImplementedError: 后端没有实现该分组加密算法
+        """
+        if cipher_name not in self.min_key_lens:
+            raise CmNotImplementedError(f'cipher backend {self.name} does not support block cipher {cipher_name}')
+        return self.min_key_lens[cipher_name]
+
+
+def _oaep_overhead(cipher_args: dict[str, Any]) -> int:
+    """PKCS#1 OAEP每块的填充开销，为哈希摘要长度的两倍加2"""
+    hash_algo = cipher_args.get('hashAlgo')
+    return 2 * (hash_algo.digest_size if hash_algo is not None else _OAEP_DEFAULT_DIGEST_SIZE) + 2
+
+
+# 加密算法名称到已注册后端的映射，按注册顺序排列
+_backends: dict[str, list[CipherBackend]] = {}
+# 加密算法名称到首选后端名称的映射
+_preferred: dict[str, str] = {}
+
+
+def register_backend(cipher_names: Iterable[str], backend: CipherBackend) -> None:
+    """
+    注册加密算法后端，同名后端将被替换
+
+    Args:
+        cipher_names: 后端实现的加密算法名称
+        backend: 后端
+    """
+    for cipher_name in cipher_names:
+        backends = _backends.setdefault(cipher_name, [])
+        backends[:] = [b for b in backends if b.name != backend.name] + [backend]
+
+
+def list_backends(cipher_name: str) -> list[CipherBackend]:
+    """
+    Args:
+        cipher_name: 加密算法名称
+
+    Returns:
+        该算法已注册的全部后端，包括不可用的
+    """
+    return list(_backends.get(cipher_name, ()))
+
+
+def set_preferred_backend(cipher_name: str, name: str | None) -> None:
+    """
+    设置首选后端，优先于环境变量
+
+    Args:
+        cipher_name: 加密算法名称
+        name: 后端名称，为None时恢复默认
+    """
+    if name is None:
+        _preferred.pop(cipher_name, None)
+    else:
+        _preferred[cipher_name] = name
+
+
+def get_backend(cipher_name: str, name: str | None = None) -> CipherBackend:
+    """
+    选择加密算法后端
+
+    Args:
+        cipher_name: 加密算法名称
+        name: 后端名称，为None时依次使用首选后端、环境变量指定的后端与首个可用的后端
+
+    Returns:
+        加密算法后端
+
+    Raises:
+        CmNotImplementedError: 未注册的加密算法或后端，或指定的后端不可用
+    """
+    backends = _backends.get(cipher_name)
+    if not backends:
+        raise CmNotImplementedError(f'unknown cipher name: {cipher_name}')
+    names = [name] if name is not None else [n for n in (_preferred.get(cipher_name), os.environ.get(BACKEND_ENV))
+                                             if n]
+    for backend_name in names:
+        for backend in backends:
+            if backend.name == backend_name and (name is not None or backend.available):
+                return backend
+        if name is not None:
+            raise CmNotImplementedError(f'unknown cipher backend {name} for {cipher_name}')
+    for backend in backends:
+        if backend.available:
+            return backend
+    raise CmNotImplementedError(f'no cipher backend is available for {cipher_name}')
+
+
+# 各AES算法由口令修整的密钥长度即其密钥长度
+_AES_KEY_LENS = {'AES-128': 16, 'AES-192': 24, 'AES-256': 32}
+
+register_backend(('DES',), CipherBackend('pycryptodome', 'Crypto.Cipher.DES', 8, 8, ('ECB',), ('ECB',),
+                                         {'DES': 8}))
+register_backend(('DES3',), CipherBackend('pycryptodome', 'Crypto.Cipher.DES3', 8, 8, ('ECB',), ('ECB',),
+                                          {'DES3': 16}))
+register_backend(_AES_KEY_LENS, CipherBackend('pycryptodome', 'Crypto.Cipher.AES', 16, 16, ('ECB', 'CTR', 'GCM'),
+                                              ('ECB', 'CTR', 'GCM'), _AES_KEY_LENS))
+register_backend(_AES_KEY_LENS, CipherBackend('cryptography', 'cm.file.cryptography_aes', 16, 16,
+                                              ('ECB', 'CTR', 'GCM'), ('ECB', 'CTR', 'GCM'), _AES_KEY_LENS))
+register_backend(('PKCS1-OAEP',), CipherBackend('pycryptodome', 'Crypto.Cipher.PKCS1_OAEP', 0, -1, ('',), ('',),
+                                                overhead=_oaep_overhead))
+register_backend(('PKCS1-5',), CipherBackend('pycryptodome', 'Crypto.Cipher.PKCS1_v1_5', 0, -1, ('',), ('',),
+                                             overhead=lambda _: 11))
\ No newline at end of file
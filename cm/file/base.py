@@ -20,26 +20,39 @@
 #  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 #  SOFTWARE.
 #
+import ctypes
+import functools
+import hashlib
+import hmac
+import importlib
 from collections.abc import Callable
 from concurrent.futures import ThreadPoolExecutor, Future
 from enum import StrEnum
 from tempfile import TemporaryFile
+from types import ModuleType
 from typing import Any, BinaryIO, AnyStr, Iterable, Literal
 
-import Crypto.Util
-from Crypto.Cipher import DES, DES3, AES, PKCS1_OAEP, PKCS1_v1_5
-from Crypto.Hash import SHA1, SHA256, SHA512, BLAKE2b
-from Crypto.PublicKey import RSA
-from Crypto.PublicKey.RSA import RsaKey
 from Crypto.Random import get_random_bytes
 from pydantic import BaseModel
 
 from cm import CmValueError
-from cm.base import erase, fixed_bytes, copy_bytes
-from cm.error import CmNotImplementedError, CmRuntimeError, CmMissingSecretError
+from cm.base import erase, erase_bytes, fixed_bytes, SecretBuffer
+from cm.error import CmNotImplementedError, CmRuntimeError, CmMissingSecretError, CmDamagedError
+from cm.file.backend import CipherBackend, get_backend, list_backends
+from cm.file.context import CipherContext, NonceCipherContext
 from cm.progress import CmProgress
 from common.file import filesize_convert
 
+# 由主密钥导出密钥哈希时的用途标识
+_KEY_HASH_INFO = b'cm-key-hash'
+# 由主密钥导出加密密钥时的用途标识
+_CIPHER_KEY_INFO = b'cm-cipher-key'
+# 决定密钥与加密上下文的字段
+_KEY_FIELDS = ('cipher_name', 'cipher_args', 'iter_count', 'key_type', 'key_hash', 'key_hash_name', 'key_hash_args',
+               'key_hash_iter_count', 'password_salt', 'password_salt_len')
+# 非对称加密的数据密钥长度，内容以AES-256-GCM加密
+_ASYMMETRIC_DATA_KEY_LEN = 32
+
 
 class CipherName(StrEnum):
     """加密算法名称枚举"""
@@ -56,14 +69,29 @@ class CipherName(StrEnum):
         """
         加密算法的填充长度
 
-        -1为不支持填充
+        -1为不支持填充，由加密算法后端声明，不需要导入实现模块
         :return: 填充长度
         """
-        if self == self.DES or self == self.DES3:
+        backends = list_backends(self)
+        return backends[0].padding if backends else -1
+
+    @property
+    def key_size(self) -> int:
+        """
+        加密算法的最大密钥长度
+
+        0为密钥不是字节
+        :return: 密钥长度
+        """
+        if self == self.DES:
             return 8
-        if self == self.AES128 or self == self.AES192 or self == self.AES256:
+        if self == self.AES128:
             return 16
-        return -1
+        if self == self.DES3 or self == self.AES192:
+            return 24
+        if self == self.AES256:
+            return 32
+        return 0
 
 
 class HashName(StrEnum):
@@ -72,6 +100,16 @@ class HashName(StrEnum):
     SHA256 = 'SHA256'
     SHA512 = 'SHA512'
     BLAKE2B = 'BLAKE2b'
+    PBKDF2_HMAC_SHA256 = 'PBKDF2-HMAC-SHA256'
+    PBKDF2_HMAC_SHA512 = 'PBKDF2-HMAC-SHA512'
+    SCRYPT = 'scrypt'
+
+    @property
+    def is_kdf(self) -> bool:
+        """
+        :return: 是密钥派生函数，迭代在一次原生调用中完成，口令类型的密钥同时经其拉伸为加密密钥
+        """
+        return self == self.PBKDF2_HMAC_SHA256 or self == self.PBKDF2_HMAC_SHA512 or self == self.SCRYPT
 
 
 class KeyType(StrEnum):
@@ -94,7 +132,60 @@ class KeyType(StrEnum):
         return self != self.PASSWORD
 
 
-class CipherFile(BaseModel):
+# 密钥哈希算法的实现模块，首次使用时才导入，密钥派生函数由hashlib提供
+_HASH_MODULES: dict[HashName, str] = {
+    HashName.SHA1: 'Crypto.Hash.SHA1',
+    HashName.SHA256: 'Crypto.Hash.SHA256',
+    HashName.SHA512: 'Crypto.Hash.SHA512',
+    HashName.BLAKE2B: 'Crypto.Hash.BLAKE2b',
+}
+# RSA密钥的实现模块
+_RSA_MODULE = 'Crypto.PublicKey.RSA'
+
+
+def cipher_module(cipher_name: CipherName) -> ModuleType:
+    """
+    加载加密算法首选后端的实现模块
+
+    Args:
+        cipher_name: 加密算法名称
+
+    Returns:
+        实现模块，首次调用时导入
+
+    Raises:
+        CmNotImplementedError: 未注册的加密算法或没有可用的后端
+    """
+    return get_backend(cipher_name).load()
+
+
+@functools.cache
+def hash_module(hash_name: HashName) -> ModuleType:
+    """
+    加载密钥哈希算法的实现模块
+
+    Args:
+        hash_name: 哈希算法名称
+
+    Returns:
+        实现模块，首次调用时导入
+
+    Raises:
+        CmNotImplementedError: 未注册的哈希算法或密钥派生函数
+    """
+    if hash_name not in _HASH_MODULES:
+        raise CmNotImplementedError(f'unknown key_hash_name: {hash_name}')
+    return importlib.import_module(_HASH_MODULES[hash_name])
+
+
+@functools.cache
+def _raw_api_backend() -> str:
+    """pycryptodome调用原生库的方式，安装了cffi时为cffi，否则为ctypes"""
+    from Crypto.Util import _raw_api
+    return _raw_api.backend
+
+
+class CipherFile(BaseModel, defer_build=True):
     """
     加密方式文件
 
@@ -107,10 +198,11 @@ class CipherFile(BaseModel):
         key_type: 密钥类型，默认为PASSWORD
         key_hash: 密钥哈希，用于验证文件是否与密钥相关联
         key_hash_name: 密钥哈希算法，用于指示哈希值如何计算
-        key_hash_args: 密钥哈希算法自定义参数
-        key_hash_iter_count: 密钥哈希算法迭代次数，默认为1
+        key_hash_args: 密钥哈希算法自定义参数，scrypt支持r与p
+        key_hash_iter_count: 密钥哈希算法迭代次数，默认为1，scrypt为代价参数N，必须是2的幂
         password_salt: 密钥盐值
         password_salt_len: 用于生成密钥盐值的长度
+        wrapped_key: 经当前密钥加密的随机数据密钥，存在时内容以数据密钥加密，更换密钥只需重新包装，旧文件为空
     """
     content_type: str
     content_encoding: str
@@ -124,15 +216,14 @@ class CipherFile(BaseModel):
     key_hash_iter_count: int | None = 1
     password_salt: bytes | None = None
     password_salt_len: int | None = 16
+    wrapped_key: bytes | None = None
 
-    # 密钥缓存，可能是密钥实体或字节
+    # 密钥缓存，可能是密钥实体或可擦除的密钥缓冲区
     __key: Any | None = None
-    # 支持的最大块加密长度，0表示没有限制
-    _max_crypt_len: int = 0
-    # 解密块所需的长度，0表示没有定义
-    _decrypt_len: int = 0
-    # 指示当前不支持解密，默认无限制
-    _cant_decrypt: bool = False
+    # 加密上下文缓存，随密钥一同失效
+    __context: CipherContext | None = None
+    # 数据密钥的加密上下文缓存，随密钥或数据密钥一同失效
+    __data_context: CipherContext | None = None
 
     def __del__(self):
         self.lock()
@@ -145,7 +236,63 @@ class CipherFile(BaseModel):
 
     @_key.setter
     def _key(self, key: Any):
+        if isinstance(key, SecretBuffer):
+            # 各自持有副本，避免另一实例锁定时擦除共享的缓冲区
+            key = SecretBuffer(key)
         self.__key = key
+        self._close_context()
+
+    @property
+    def _context(self) -> CipherContext:
+        """加密上下文，未在解锁时推导的（如直接设置密钥）将在首次使用时推导"""
+        if self.__context is None:
+            try:
+                self.__context = self._build_context()
+            except ValueError as e:
+                raise CmValueError(e) from e
+        return self.__context
+
+    def _close_context(self):
+        """丢弃加密上下文并擦除其持有的密钥"""
+        self._close_data_context()
+        if self.__context is not None:
+            self.__context.close()
+            self.__context = None
+
+    def _close_data_context(self):
+        """丢弃数据密钥的加密上下文，包装的数据密钥改变时调用"""
+        if self.__data_context is not None:
+            self.__data_context.close()
+            self.__data_context = None
+
+    @property
+    def _stream_context(self) -> CipherContext:
+        """内容（流与单元格）使用的加密上下文，存在数据密钥时首次使用以当前密钥解开，否则为密钥的加密上下文"""
+        if self.wrapped_key is None:
+            return self._context
+        if self.__data_context is None:
+            self.__data_context = self._build_data_context(self._unwrap_data_key())
+        return self.__data_context
+
+    @property
+    def _max_crypt_len(self) -> int:
+        """流支持的最大块加密长度，0表示没有限制"""
+        return self._stream_context.max_crypt_len
+
+    @property
+    def _decrypt_len(self) -> int:
+        """流解密块所需的长度，0表示没有定义"""
+        return self._stream_context.decrypt_len
+
+    @property
+    def _cant_decrypt(self) -> bool:
+        """指示当前不支持解密"""
+        return self._context.cant_decrypt
+
+    @property
+    def _tag_len(self) -> int:
+        """流中每个块附带的认证标签长度，解密时每块需多读取该长度"""
+        return self._stream_context.tag_len
 
     @property
     def locked(self):
@@ -159,13 +306,26 @@ class CipherFile(BaseModel):
         """
         return self.__key is None
 
+    def same_key(self, other: 'CipherFile') -> bool:
+        """
+        与另一个文件的密钥相关字段是否完全相同
+
+        Args:
+            other: 另一个加密方式文件
+
+        Returns:
+            相同时两者可以使用同一个密钥，推导出的加密上下文也相同
+        """
+        return all(getattr(self, field) == getattr(other, field) for field in _KEY_FIELDS)
+
     def lock(self):
         """锁定当前对象。"""
+        self._close_context()
         if self.__key is not None:
             erase(self.__key)
             self.__key = None
 
-    def unlock(self, key: AnyStr | None = None, passphrase: str | None = None):
+    def unlock(self, key: AnyStr | SecretBuffer | None = None, passphrase: str | None = None):
         """
         使用密钥解锁当前对象。
 
@@ -177,25 +337,26 @@ class CipherFile(BaseModel):
             CmValueError: 密钥或解锁密码不正确或无法用于加解密过程
             CmNotImplementedError: 未实现的密钥类型或加密方式
         """
+        self._close_context()
         if self.key_type == KeyType.PASSWORD:
-            if isinstance(key, str):
-                self.__key = key.encode('utf-8')
-            elif isinstance(key, bytes):
-                self.__key = copy_bytes(key)
-            try:
-                self._cipher()
-            except ValueError as e:
-                raise CmValueError(e) from e
+            if isinstance(key, str | bytes | SecretBuffer):
+                secret = SecretBuffer(key)
+                erase(self.__key)
+                self.__key = secret
         elif self.key_type == KeyType.RSA_KEYSTORE:
             try:
+                if isinstance(key, SecretBuffer):
+                    key = bytes(key.view)
                 assert isinstance(key, str | bytes), f'key type {type(key)} is not supported'
-                self.__key = RSA.importKey(key, passphrase)
+                self.__key = importlib.import_module(_RSA_MODULE).importKey(key, passphrase)
             except ValueError as e:
                 raise CmValueError(e) from e
         else:
             raise CmNotImplementedError(f"unknown key_type: {self.key_type}")
+        # 仅在解锁时推导一次，后续加解密复用
+        _ = self._context
 
-    def set_key(self, key: AnyStr | None) -> bool:
+    def set_key(self, key: AnyStr | SecretBuffer | None) -> bool:
         """
         设置密钥，仅用于初始化。
 
@@ -210,16 +371,52 @@ class CipherFile(BaseModel):
         if self.password_salt is None and self.key_type.need_salt_protect:
             assert self.password_salt_len is not None, 'password salt len is null'
             self.password_salt = get_random_bytes(self.password_salt_len)
-        if isinstance(key, str):
-            key = key.encode('utf-8')
-        elif isinstance(key, bytes):
-            key = copy_bytes(key)
-        else:
+        if not isinstance(key, str | bytes | SecretBuffer):
             return False
-        self.key_hash = self._gen_key_hash(key)
+        key = SecretBuffer(key)
+        try:
+            self.key_hash = self._gen_key_hash(key)
+        finally:
+            key.erase()
         return True
 
-    def validate_key(self, key: AnyStr | None) -> bool:
+    def rekey(self, key: AnyStr | SecretBuffer, passphrase: str | None = None) -> None:
+        """
+        更换密钥，只以新密钥重新包装数据密钥，不重新加密内容，耗时与内容大小无关
+
+        Args:
+            key: 新密钥，类型与当前密钥相同，非对称加密须为私钥
+            passphrase: 新密钥的解锁密码（若有）
+
+        Raises:
+            CmRuntimeError: 没有数据密钥
+            CmValueError: 当前密钥无法解开数据密钥，新密钥无法用于加解密过程，或非对称加密的新密钥不是私钥
+            CmMissingSecretError: 未解锁
+
+        口令类型的密钥同时更换盐值，加密算法及其参数不变。失败时当前实例保持不变，成功后以新密钥解锁。
+        密钥哈希由传入的密钥本身计算，以公钥更换后私钥将无法通过校验，因此非对称加密要求提供私钥。
+        """
+        if self.wrapped_key is None:
+            raise CmRuntimeError('没有数据密钥，无法只更换密钥')
+        data_key = self._unwrap_data_key()
+        other = type(self)(**self.model_dump(include={'content_type', 'content_encoding', *_KEY_FIELDS}))
+        try:
+            other.key_hash = None
+            other.password_salt = None
+            if not other.set_key(key):
+                raise CmValueError('不支持的密钥')
+            other.unlock(key, passphrase)
+            if other.key_type == KeyType.RSA_KEYSTORE and not other._key.has_private():
+                raise CmValueError('更换密钥需要私钥')
+            other._wrap_data_key(data_key)
+            for field in (*_KEY_FIELDS, 'wrapped_key'):
+                setattr(self, field, getattr(other, field))
+            self._key = other._key
+        finally:
+            other.lock()
+            data_key.erase()
+
+    def validate_key(self, key: AnyStr | SecretBuffer | None) -> bool:
         """
         验证密钥是否正确，仅用于存在密钥哈希的场景。
 
@@ -231,23 +428,16 @@ class CipherFile(BaseModel):
 
         其返回仅供参考，不一定代表无法执行加解密操作。
         """
-        if isinstance(key, str):
-            key = key.encode('utf-8')
-        elif isinstance(key, bytes):
-            key = copy_bytes(key)
-        else:
+        if not isinstance(key, str | bytes | SecretBuffer):
             return self.key_hash is None
-        if self.cipher_name == CipherName.DES and len(key) > 8:
-            return False
-        elif self.cipher_name == CipherName.DES3 and len(key) > 24:
-            return False
-        elif self.cipher_name == CipherName.AES128 and len(key) > 16:
-            return False
-        elif self.cipher_name == CipherName.AES192 and len(key) > 24:
-            return False
-        elif self.cipher_name == CipherName.AES256 and len(key) > 32:
-            return False
-        return self.key_hash == self._gen_key_hash(key)
+        key = SecretBuffer(key)
+        try:
+            # 未经拉伸的口令直接用作加密密钥，不能超过算法的最大密钥长度
+            if not self._key_stretched and 0 < self.cipher_name.key_size < len(key):
+                return False
+            return self.key_hash == self._gen_key_hash(key)
+        finally:
+            key.erase()
 
     def encrypt_stream(self, stream: BinaryIO, chunk_size: int, progress: CmProgress,
                        total: int = 0, concurrent_count: int = 1) -> Iterable[bytes]:
@@ -269,7 +459,8 @@ class CipherFile(BaseModel):
 
         仅在遍历字节时产生数据。
 
-        若当前加密迭代次数大于1，将在完成迭代后产生数据，迭代过程只能被进度管理器中断。
+        若当前加密迭代次数大于1且块大小是分组长度的整数倍，每块经过全部轮次后直接产生；
+        否则将在完成迭代后产生数据，迭代过程只能被进度管理器中断。
         """
         if 0 < self._max_crypt_len < chunk_size:
             raise CmValueError('chunk_size too large')
@@ -293,20 +484,82 @@ class CipherFile(BaseModel):
         Raises:
             CmRuntimeError: 状态错误
             CmValueError: 传参错误
+            CmDamagedError: 块认证失败，附带其在流中的范围
 
         仅在遍历字节时产生数据。
 
-        若当前加密迭代次数大于1，将在完成迭代后产生数据，迭代过程只能被进度管理器中断。
+        若当前加密迭代次数大于1且块大小是分组长度的整数倍，每块经过全部轮次后直接产生；
+        否则将在完成迭代后产生数据，迭代过程只能被进度管理器中断。
+
+        计数器模式下块之间互不依赖，可以并发解密，其中GCM模式的块大小需包含认证标签。
         """
-        if self._cant_decrypt:
+        if self._stream_context.cant_decrypt:
             raise CmRuntimeError('cannot decrypt')
         if 0 < self._decrypt_len < chunk_size:
             raise CmValueError('chunk_size too large')
         return self._iter_crypt_stream('decrypt', stream, chunk_size, progress, total, concurrent_count)
 
+    def decrypt_stream_into(self, stream: BinaryIO, write_at: Callable[[int, memoryview], Any], chunk_size: int,
+                            plain_chunk_size: int, total: int, concurrent_count: int) -> Iterable[int]:
+        """
+        并发解密各块互不依赖的流，工作线程将各块的明文直接写入目标中的对应位置
+
+        Args:
+            stream: 字节流
+            write_at: 在指定位置写入明文的操作，各线程以互不重叠的范围并发调用
+            chunk_size: 块大小，GCM模式需包含认证标签
+            plain_chunk_size: 每块明文的长度，决定各块写入的位置
+            total: 明文的总字节数，超出部分（如最后一块的填充）不写入
+            concurrent_count: 解密线程并发数
+
+        Returns:
+            按顺序产出各块写入的长度，产出时该块及之前的块均已写入
+
+        Raises:
+            CmRuntimeError: 状态错误
+            CmValueError: 加密方式的块之间互相依赖（如CBC），或块大小不是分组长度的整数倍
+            CmDamagedError: 块认证失败，附带其在流中的范围
+
+        仅在遍历时执行，遇到第一个失败的块即停止，此前产出的块均已通过认证。
+        """
+        context = self._stream_context
+        if context.cant_decrypt:
+            raise CmRuntimeError('cannot decrypt')
+        if isinstance(context, NonceCipherContext):
+            decrypt = self._nonce_decryptor(context, stream, chunk_size)
+        elif context.parallel and context.padding > 0 and chunk_size % context.padding == 0:
+            rounds = max(self.iter_count, 1)
+
+            def decrypt(_: int, chunk: bytes, __: bool) -> bytes:
+                return context.decrypt(chunk, rounds)
+        else:
+            raise CmValueError('chained cipher not support concurrent')
+
+        def task(index: int, chunk: bytes, final: bool) -> int:
+            offset = index * plain_chunk_size
+            data = memoryview(decrypt(index, chunk, final))[:max(total - offset, 0)]
+            write_at(offset, data)
+            return len(data)
+
+        yield from self._crypt_stream(task, stream, chunk_size, concurrent_count)
+
     def _iter_crypt_stream(self, mode: Literal['encrypt', 'decrypt'], stream: BinaryIO, chunk_size: int,
                            progress: CmProgress, total: int = 0, concurrent_count: int = 1) -> Iterable[bytes]:
         """迭代一个流"""
+        context = self._stream_context
+        if isinstance(context, NonceCipherContext):
+            yield from self._crypt_nonce_stream(mode, context, stream, chunk_size, concurrent_count)
+            return
+        if context.padding > 0 and (self.iter_count <= 1 or chunk_size % context.padding == 0):
+            if context.parallel and concurrent_count > 1 and chunk_size % context.padding == 0:
+                # 各块互不依赖（如ECB），每块经过全部轮次后并发产生，结果与串行处理一致
+                crypt = getattr(context, mode)
+                rounds = max(self.iter_count, 1)
+                yield from self._crypt_stream(lambda _, data, __: crypt(data, rounds), stream, chunk_size,
+                                              concurrent_count)
+                return
+            yield from self._crypt_block_stream(mode, stream, chunk_size, concurrent_count)
+            return
         title = '加密' if mode == 'encrypt' else '解密'
         raw_stream = stream
         if self.iter_count > 1:
@@ -318,8 +571,8 @@ class CipherFile(BaseModel):
                                                             f'{title}迭代中，还剩{iter_count - i}步',
                                                             unit=f'区块（{chunk_size}字节）')
                 current_size = 0
-                cipher = self._cipher()
-                for chunk in self._crypt_stream(getattr(cipher, mode), stream, chunk_size, concurrent_count):
+                crypt = getattr(self._stream_context.new(), mode)
+                for chunk in self._crypt_stream(lambda _, data, __: crypt(data), stream, chunk_size, concurrent_count):
                     current_size += chunk_size
                     temp_stream.write(chunk)
                     crypt_progress.step(last_msg=f'{title}中...{filesize_convert(current_size)}'
@@ -331,128 +584,380 @@ class CipherFile(BaseModel):
                 stream.seek(0)
                 iter_progress.step()
             iter_progress.complete()
-        cipher = self._cipher()
+        crypt = getattr(self._stream_context.new(), mode)
         # 此处TemporaryFile与BinaryIO等效
         # noinspection PyTypeChecker
-        for chunk in self._crypt_stream(getattr(cipher, mode), stream, chunk_size, concurrent_count):
+        for chunk in self._crypt_stream(lambda _, data, __: crypt(data), stream, chunk_size, concurrent_count):
             yield chunk
         if stream != raw_stream:
             stream.close()
 
-    def _crypt_stream(self, func: Callable[[bytes], bytes], stream: BinaryIO, chunk_size: int,
-                      concurrent_count: int = 1) -> Iterable[bytes]:
-        """对一个流执行指定的操作"""
+    def _crypt_block_stream(self, mode: Literal['encrypt', 'decrypt'], stream: BinaryIO, chunk_size: int,
+                            concurrent_count: int = 1) -> Iterable[bytes]:
+        """
+        串行迭代分组加密的流，多轮迭代时每块依次经过全部轮次的加密算法实例后直接产生
+
+        分组加密算法的链式状态随实例跨块延续，且块大小为分组长度的整数倍时各轮的分块方式相同，
+        因此结果与逐轮处理整个流完全一致，但不再需要临时文件。
+
+        各块读入同一个预先分配的缓冲区并原地填充，不再为每块新建输入对象，加密算法也可以直接取得其地址。
+        pycryptodome以ctypes调用原生库时使用ctypes数组，以cffi调用时只接受bytearray与memoryview。
+        输出不使用output参数：在ctypes后端中可写缓冲区需要经过缓冲区协议转换，反而比新建结果更慢。
+        """
+        padding = self._stream_context.padding
+        if concurrent_count > 1:
+            raise CmValueError('chained cipher not support concurrent')
+        crypts = [getattr(self._stream_context.new(), mode) for _ in range(max(self.iter_count, 1))]
+        size = -(-chunk_size // padding) * padding
+        use_ctypes = _raw_api_backend() == 'ctypes'
+        buffer: Any = (ctypes.c_char * size)() if use_ctypes else bytearray(size)
+        view = memoryview(buffer).cast('B')
+        target = view[:chunk_size]
+        zeros = bytes(padding)
+        while read_len := self._read_full(stream, target):
+            fixed_len = -(-read_len // padding) * padding
+            view[read_len:fixed_len] = zeros[:fixed_len - read_len]
+            if fixed_len == size:
+                chunk = buffer
+            elif use_ctypes:
+                chunk = (ctypes.c_char * fixed_len).from_buffer(buffer)
+            else:
+                chunk = view[:fixed_len]
+            for crypt in crypts:
+                chunk = crypt(chunk)
+            yield chunk
+
+    @staticmethod
+    def _read_full(stream: BinaryIO, view: memoryview) -> int:
+        """读满一个缓冲区，除非到达流的末尾，返回读取的长度"""
+        total = 0
+        while total < len(view):
+            if hasattr(stream, 'readinto'):
+                read_len = stream.readinto(view[total:])
+            else:
+                data = stream.read(len(view) - total)
+                read_len = len(data)
+                view[total:total + read_len] = data
+            if not read_len:
+                break
+            total += read_len
+        return total
+
+    def _crypt_nonce_stream(self, mode: Literal['encrypt', 'decrypt'], context: NonceCipherContext,
+                            stream: BinaryIO, chunk_size: int, concurrent_count: int = 1) -> Iterable[bytes]:
+        """
+        以计数器模式迭代一个流，流以nonce前缀开头，各块可并发处理
+
+        GCM模式的流至少有一块（可以为空），解密时遇到第一个认证失败的块即停止，并报告其在流中的范围。
+        """
+        if mode == 'encrypt':
+            nonce = context.new_nonce()
+            yield nonce
+            func = functools.partial(context.encrypt_chunk, nonce)
+        else:
+            func = self._nonce_decryptor(context, stream, chunk_size)
+        empty = True
+        for chunk in self._crypt_stream(func, stream, chunk_size, concurrent_count):
+            empty = False
+            yield chunk
+        if empty and context.tag_len:
+            if mode == 'decrypt':
+                raise CmDamagedError('missing final chunk', context.nonce_len, context.nonce_len)
+            yield func(0, b'', True)
+
+    @staticmethod
+    def _nonce_decryptor(context: NonceCipherContext, stream: BinaryIO,
+                         chunk_size: int) -> Callable[[int, bytes, bool], bytes]:
+        """读取流开头的nonce前缀，返回按块序号解密的操作，认证失败时报告该块在流中的范围"""
+        nonce = stream.read(context.nonce_len)
+        if len(nonce) != context.nonce_len:
+            raise CmDamagedError('stream too short', 0, len(nonce))
+
+        def decrypt(index: int, chunk: bytes, final: bool) -> bytes:
+            try:
+                return context.decrypt_chunk(nonce, index, chunk, final)
+            except ValueError as e:
+                start = context.nonce_len + index * chunk_size
+                raise CmDamagedError(f'chunk {index} is damaged: {e}', start, start + len(chunk)) from e
+
+        return decrypt
+
+    def _crypt_stream(self, func: Callable[[int, bytes, bool], Any], stream: BinaryIO, chunk_size: int,
+                      concurrent_count: int = 1) -> Iterable[Any]:
+        """对一个流执行指定的操作，操作接收块序号、块与是否为最后一块，仅在加密上下文声明各块互不依赖时并发"""
+        context = self._stream_context
+        padding = context.padding
         if concurrent_count > 1:
-            if self.cipher_name.padding > 0:
-                raise CmValueError('padding cipher not support concurrent')
+            if not context.parallel:
+                raise CmValueError('chained cipher not support concurrent')
             with ThreadPoolExecutor(max_workers=concurrent_count) as executor:
                 futures: list[Future] = []
-                while chunk := stream.read(chunk_size):
+                for index, chunk, final in self._read_chunks(stream, chunk_size):
+                    if padding > 0:
+                        chunk = fixed_bytes(chunk, padding)
                     while len(futures) >= concurrent_count:
                         yield futures.pop(0).result()
-                    futures.append(executor.submit(func, chunk))
+                    futures.append(executor.submit(func, index, chunk, final))
                 while futures:
                     yield futures.pop(0).result()
             return
-        while chunk := stream.read(chunk_size):
-            if self.cipher_name.padding > 0:
-                chunk = fixed_bytes(chunk, self.cipher_name.padding)
-            yield func(chunk)
-
-    def _encrypt(self, data: bytes) -> bytes:
-        """加密一段字节"""
-        self._cipher()
-        if self.cipher_name.padding > 0:
-            data = fixed_bytes(data, self.cipher_name.padding)
-        for _ in range(self.iter_count):
-            try:
-                data = self._cipher().encrypt(data)
-            except ValueError as e:
-                raise CmValueError(e) from e
+        for index, chunk, final in self._read_chunks(stream, chunk_size):
+            if padding > 0:
+                chunk = fixed_bytes(chunk, padding)
+            yield func(index, chunk, final)
+
+    @staticmethod
+    def _read_chunks(stream: BinaryIO, chunk_size: int) -> Iterable[tuple[int, bytes, bool]]:
+        """按块读取一个流，预读一块以判断当前块是否为最后一块"""
+        index = 0
+        chunk = stream.read(chunk_size)
+        while chunk:
+            next_chunk = stream.read(chunk_size)
+            yield index, chunk, not next_chunk
+            index += 1
+            chunk = next_chunk
+
+    def _encrypt(self, data: bytes, context: CipherContext | None = None) -> bytes:
+        """加密一段字节，默认使用密钥的加密上下文"""
+        if context is None:
+            context = self._context
+        if context.padding > 0:
+            data = fixed_bytes(data, context.padding)
+        try:
+            data = context.encrypt(data, self.iter_count)
+        except ValueError as e:
+            raise CmValueError(e) from e
         return data
 
-    def _decrypt(self, data: bytes) -> bytes:
-        """解密一段字节"""
-        self._cipher()
-        if self._cant_decrypt:
+    def _decrypt(self, data: bytes, context: CipherContext | None = None) -> bytes:
+        """解密一段字节，默认使用密钥的加密上下文"""
+        if context is None:
+            context = self._context
+        if context.cant_decrypt:
             raise CmRuntimeError('cannot decrypt')
-        for _ in range(self.iter_count):
-            try:
-                data = self._cipher().decrypt(data)
-            except ValueError as e:
-                raise CmValueError(e) from e
-        return data.rstrip(b'\x00') if self.cipher_name.padding > 0 else data
+        try:
+            data = context.decrypt(data, self.iter_count)
+        except ValueError as e:
+            raise CmValueError(e) from e
+        return data.rstrip(b'\x00') if context.padding > 0 else data
 
     def _cipher(self):
-        """构建加密算法实例、初始化内部属性"""
-        self._max_crypt_len = 0
-        self._decrypt_len = 0
-        self._cant_decrypt = False
-
-        if self.cipher_name == CipherName.DES:
-            assert isinstance(self._key, bytes), f'type {type(self._key)} is not supported'
-            return DES.new(fixed_bytes(self._key, 8, 8, 8), **self.cipher_args)
-        elif self.cipher_name == CipherName.DES3:
-            assert isinstance(self._key, bytes), f'type {type(self._key)} is not supported'
-            return DES3.new(fixed_bytes(self._key, 8, 16, 24), **self.cipher_args)
-        elif self.cipher_name == CipherName.AES128:
-            assert isinstance(self._key, bytes), f'type {type(self._key)} is not supported'
-            return AES.new(fixed_bytes(self._key, 8, 16, 16), **self.cipher_args)
-        elif self.cipher_name == CipherName.AES192:
-            assert isinstance(self._key, bytes), f'type {type(self._key)} is not supported'
-            return AES.new(fixed_bytes(self._key, 8, 24, 24), **self.cipher_args)
-        elif self.cipher_name == CipherName.AES256:
-            assert isinstance(self._key, bytes), f'type {type(self._key)} is not supported'
-            return AES.new(fixed_bytes(self._key, 8, 32, 32), **self.cipher_args)
-        elif self.cipher_name == CipherName.PKCS1_OAEP:
-            assert isinstance(self._key, RsaKey), f'type {type(self._key)} is not supported'
-
-            if self.key_type == KeyType.RSA_KEYSTORE:
-                mod_bits = Crypto.Util.number.size(self._key.n)
-                k = Crypto.Util.number.ceil_div(mod_bits, 8)
-                if 'hashAlgo' in self.cipher_args:
-                    hash_algo = self.cipher_args['hashAlgo']
-                else:
-                    hash_algo = SHA1
-                self._max_crypt_len = k - 2 * hash_algo.digest_size - 2
-                self._decrypt_len = k
-                self._cant_decrypt = (k < hash_algo.digest_size + 2)
-            return PKCS1_OAEP.new(self._key, **self.cipher_args)
-        elif self.cipher_name == CipherName.PKCS1_V1_5:
-            assert isinstance(self._key, RsaKey), f'type {type(self._key)} is not supported'
-
-            if self.key_type == KeyType.RSA_KEYSTORE:
-                k = self._key.size_in_bytes()
-                self._max_crypt_len = k - 11
-                self._decrypt_len = k
-            return PKCS1_v1_5.new(self._key, **self.cipher_args)
+        """从加密上下文构建加密算法实例"""
+        return self._context.new()
+
+    def _build_context(self) -> CipherContext:
+        """根据当前密钥与加密算法参数推导加密上下文，按后端声明的分组加密或非对称加密分别处理"""
+        backend = get_backend(self.cipher_name)
+        if backend.block_size > 0:
+            return self._build_block_context(backend, self._key)
+        if backend.overhead is not None:
+            return self._build_rsa_context(backend, self._key)
+        raise CmNotImplementedError(f'unknown cipher name: {self.cipher_name}')
+
+    def _build_block_context(self, backend: CipherBackend, key: Any) -> CipherContext:
+        """由口令推导分组加密算法的加密上下文"""
+        assert isinstance(key, SecretBuffer), f'type {type(key)} is not supported'
+        if self._key_stretched:
+            secret = self._stretch_key(key)
         else:
-            raise CmNotImplementedError(f'unknown cipher name: {self.cipher_name}')
+            secret = key.fixed(8, backend.min_key_len(self.cipher_name), self.cipher_name.key_size)
+        return self._build_secret_context(backend, secret)
+
+    def _build_rsa_context(self, backend: CipherBackend, key: Any) -> CipherContext:
+        """由RSA密钥推导非对称加密的加密上下文，每块明文的上限为密钥长度减去填充开销"""
+        assert isinstance(key, importlib.import_module(_RSA_MODULE).RsaKey), f'type {type(key)} is not supported'
+        factory = functools.partial(backend.load().new, key, **self.cipher_args)
+        capabilities = dict(parallel=backend.parallel(self.cipher_args), seekable=backend.seekable(self.cipher_args))
+        if self.key_type == KeyType.RSA_KEYSTORE:
+            k = key.size_in_bytes()
+            max_crypt_len = k - backend.overhead(self.cipher_args)
+            return CipherContext(factory, backend.padding, max_crypt_len, k, max_crypt_len <= 0, **capabilities)
+        # 构建一次以提前校验算法参数
+        factory()
+        return CipherContext(factory, backend.padding, **capabilities)
+
+    def _build_secret_context(self, backend: CipherBackend, secret: SecretBuffer) -> CipherContext:
+        """
+        以加密密钥构建分组加密算法的加密上下文，上下文持有并负责擦除密钥，失败时立即擦除
 
-    def _gen_key_hash(self, key: AnyStr) -> bytes:
-        """计算密钥的哈希值"""
-        if isinstance(key, str):
-            data_to_hash = key.encode('utf-8')
-        else:
-            data_to_hash = copy_bytes(key)
-        erase(key)
+        固定IV的CBC模式附带ECB分组核心，CTR与GCM模式使用计数器上下文。
+        """
+        try:
+            mode_name = backend.mode_name(self.cipher_args)
+            if mode_name == 'CTR' or mode_name == 'GCM':
+                return self._build_counter_context(backend, mode_name, secret)
+            module = backend.load()
+            # 直接传入只读视图，密钥不再产生不可擦除的副本
+            factory = functools.partial(module.new, secret.view, **self.cipher_args)
+            # 构建一次以提前校验算法参数
+            factory()
+            capabilities = dict(block_size=backend.block_size, parallel=backend.parallel(self.cipher_args),
+                                seekable=backend.seekable(self.cipher_args))
+            if self.cipher_args.keys() == {'mode', 'iv'} and mode_name == 'CBC':
+                return CipherContext(factory, backend.padding, core=module.new(secret.view, module.MODE_ECB),
+                                     iv=bytes(self.cipher_args['iv']), secret=secret, **capabilities)
+            return CipherContext(factory, backend.padding, secret=secret, **capabilities)
+        except BaseException:
+            secret.erase()
+            raise
+
+    def _build_counter_context(self, backend: CipherBackend, mode_name: str,
+                               secret: SecretBuffer) -> NonceCipherContext:
+        """推导计数器模式的加密上下文，nonce由上下文为每个值或流单独生成，12字节的nonce要求16字节的分组"""
+        if backend.block_size != 16:
+            raise CmNotImplementedError(f'{self.cipher_name} does not support counter mode')
+        if self.iter_count != 1:
+            raise CmValueError('counter mode does not support iter_count other than 1')
+        factory = functools.partial(backend.load().new, secret.view, **self.cipher_args)
+        # 构建一次以提前校验算法参数
+        factory(nonce=bytes(12))
+        tag_len = self.cipher_args.get('mac_len', 16) if mode_name == 'GCM' else 0
+        return NonceCipherContext(factory, tag_len, secret)
+
+    @property
+    def _data_key_len(self) -> int:
+        """数据密钥长度，对称加密为算法的最大密钥长度"""
+        return self.cipher_name.key_size or _ASYMMETRIC_DATA_KEY_LEN
+
+    def _wrap_data_key(self, data_key: SecretBuffer | None = None) -> None:
+        """
+        以当前密钥加密数据密钥后保存，并以其构建数据密钥的加密上下文
+
+        Args:
+            data_key: 数据密钥，不会擦除传入的密钥，为空时生成新的随机数据密钥
+
+        每个文件各用一个数据密钥，非对称加密时内容只需一次非对称加密，仅持有公钥时也可以加密。
+        """
+        data_key = SecretBuffer(data_key if data_key is not None else get_random_bytes(self._data_key_len))
+        try:
+            context = self._context
+            padded = data_key.fixed(context.padding) if context.padding > 0 else SecretBuffer(data_key)
+            try:
+                wrapped_key = context.encrypt(padded.view, self.iter_count)
+            except ValueError as e:
+                raise CmValueError(e) from e
+            finally:
+                padded.erase()
+            data_context = self._build_data_context(SecretBuffer(data_key))
+        finally:
+            data_key.erase()
+        self._close_data_context()
+        self.wrapped_key = wrapped_key
+        self.__data_context = data_context
+
+    def _unwrap_data_key(self) -> SecretBuffer:
+        """以当前密钥解开数据密钥"""
+        assert self.wrapped_key is not None, 'wrapped key is null'
+        context = self._context
+        if context.cant_decrypt:
+            raise CmRuntimeError('cannot decrypt')
+        try:
+            data = context.decrypt(self.wrapped_key, self.iter_count)
+        except ValueError as e:
+            raise CmValueError(e) from e
+        data_key = SecretBuffer(memoryview(data)[:self._data_key_len])
+        # 解密结果是新建的bytes，没有迭代时即为文件头中的密文本身，不能清零
+        if data is not self.wrapped_key:
+            erase_bytes(data)
+        return data_key
+
+    def _build_data_context(self, data_key: SecretBuffer) -> CipherContext:
+        """以数据密钥构建内容的加密上下文，对称加密沿用当前的算法与参数，非对称加密使用AES-256-GCM"""
+        if len(data_key) != self._data_key_len:
+            data_key.erase()
+            raise CmValueError('数据密钥长度不正确')
+        if self.cipher_name.key_size == 0:
+            aes = get_backend(CipherName.AES256).load()
+            return NonceCipherContext(functools.partial(aes.new, data_key.view, aes.MODE_GCM), 16, data_key)
+        try:
+            return self._build_secret_context(get_backend(self.cipher_name), data_key)
+        except ValueError as e:
+            raise CmValueError(e) from e
+
+    def _gen_key_hash(self, key: SecretBuffer) -> bytes:
+        """计算密钥的哈希值，不会擦除传入的密钥"""
+        if self.key_hash_name.is_kdf:
+            master_key = self._derive_master_key(key)
+            try:
+                return hmac.digest(master_key.view, _KEY_HASH_INFO, 'sha256')
+            finally:
+                master_key.erase()
         if self.key_type.need_salt_protect:
             assert self.password_salt is not None, 'password salt is null'
-            data_to_hash = data_to_hash + self.password_salt
-        assert self.key_hash_iter_count is not None, 'key_hash_iter_count is null'
-        for _ in range(self.key_hash_iter_count):
+            salt = self.password_salt
+        else:
+            salt = b''
+        iter_count = self.key_hash_iter_count
+        assert iter_count is not None, 'key_hash_iter_count is null'
+        if iter_count < 1:
+            return bytes(key.view) + salt
+        # 首轮直接从缓冲区视图读取口令，不拼接出明文副本
+        h = self._key_hash()
+        h.update(key.view)
+        h.update(salt)
+        data_to_hash = h.digest()
+        for _ in range(iter_count - 1):
             data_to_hash = self._key_hash(data_to_hash).digest()
         return data_to_hash
 
+    @property
+    def _key_stretched(self) -> bool:
+        """口令是否经密钥派生函数拉伸为加密密钥，而不是直接填充使用"""
+        return self.key_type == KeyType.PASSWORD and self.key_hash_name.is_kdf
+
+    def _stretch_key(self, key: SecretBuffer) -> SecretBuffer:
+        """将口令拉伸为当前加密算法的最大长度密钥"""
+        master_key = self._derive_master_key(key)
+        try:
+            digest = hmac.digest(master_key.view, _CIPHER_KEY_INFO, 'sha512')
+        finally:
+            master_key.erase()
+        secret = SecretBuffer(memoryview(digest)[:self.cipher_name.key_size])
+        erase_bytes(digest)
+        return secret
+
+    def _derive_master_key(self, key: SecretBuffer) -> SecretBuffer:
+        """
+        使用密钥派生函数计算主密钥
+
+        仅调用一次派生函数，密钥哈希与加密密钥再由主密钥按用途分别导出，互相无法推算。
+        派生函数只能返回bytes，结果复制到可擦除的缓冲区后立即清零。
+        """
+        master_key = self._derive_master_key_bytes(key)
+        secret = SecretBuffer(master_key)
+        erase_bytes(master_key)
+        return secret
+
+    def _derive_master_key_bytes(self, key: SecretBuffer) -> bytes:
+        """调用密钥派生函数"""
+        if self.key_type.need_salt_protect:
+            assert self.password_salt is not None, 'password salt is null'
+            salt = self.password_salt
+        else:
+            salt = b''
+        iter_count = self.key_hash_iter_count
+        assert iter_count is not None, 'key_hash_iter_count is null'
+        try:
+            if self.key_hash_name == HashName.PBKDF2_HMAC_SHA256:
+                return hashlib.pbkdf2_hmac('sha256', key.view, salt, iter_count)
+            elif self.key_hash_name == HashName.PBKDF2_HMAC_SHA512:
+                return hashlib.pbkdf2_hmac('sha512', key.view, salt, iter_count)
+            elif self.key_hash_name == HashName.SCRYPT:
+                if not hasattr(hashlib, 'scrypt'):
+                    raise CmNotImplementedError('scrypt is not available in this build')
+                r = self.key_hash_args.get('r', 8)
+                p = self.key_hash_args.get('p', 1)
+                return hashlib.scrypt(key.view, salt=salt, n=iter_count, r=r, p=p,
+                                      maxmem=128 * r * (iter_count + p + 2), dklen=64)
+        except ValueError as e:
+            raise CmValueError(e) from e
+        raise CmNotImplementedError(f'unknown key derivation function: {self.key_hash_name}')
+
     def _key_hash(self, data=None):
         """构建密钥哈希算法实例"""
-        if self.key_hash_name == HashName.SHA1:
-            return SHA1.new(data)
-        elif self.key_hash_name == HashName.SHA256:
-            return SHA256.new(data)
+        module = hash_module(self.key_hash_name)
+        if self.key_hash_name == HashName.SHA1 or self.key_hash_name == HashName.SHA256:
+            return module.new(data)
         elif self.key_hash_name == HashName.SHA512:
-            return SHA512.new(data, **self.key_hash_args)
-        elif self.key_hash_name == HashName.BLAKE2B:
-            return BLAKE2b.new(data=data, **self.key_hash_args)
-        else:
-            raise CmNotImplementedError(f'unknown key_hash_name: {self.key_hash_name}')
+            return module.new(data, **self.key_hash_args)
+        return module.new(data=data, **self.key_hash_args)
@@ -0,0 +1,298 @@
+#  MIT License
+#
+#  Copyright (c) 2026 BlueWhaleMain
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+#
+"""
+被加密保护的文件的目录索引
+
+每个目录一个加密的索引文件，记录目录中各保护文件解密后的源文件名、大小、校验和与修改时间，
+一次解锁后即可浏览与查找，无需逐个打开保护文件。索引本身也以保护文件的形式存储。
+"""
+import bisect
+import io
+import os
+from typing import Self
+
+from pydantic import BaseModel, ValidationError
+
+from cm.error import CmRuntimeError, CmValueError
+from cm.file import header
+from cm.file.base import CipherFile
+from cm.file.protect import ProtectCipherFile
+from cm.parallel import map_items
+from cm.progress import CmProgress
+
+# 目录索引的文件名
+CATALOG_FILENAME = '.cm-catalog'
+# 被加密保护的文件扩展名，仅索引具有此扩展名的文件
+PROTECT_FILE_SUFFIX = '.cm-protect'
+# 索引内容的格式版本
+_CATALOG_VERSION = 1
+# 过期项不少于此数量时才使用进程池重建，少量文件无法抵消进程启动与解锁的开销
+_MIN_CONCURRENT_ENTRIES = 64
+
+
+class CatalogEntry(BaseModel, defer_build=True):
+    """
+    索引项
+
+    Attributes:
+        name: 解密后的源文件名，无法读取或解密时为空
+        total_size: 源文件大小
+        crc32: 源文件CRC32校验和
+        version: 保护文件版本，2表示按块分段认证，3表示加密前压缩
+        size: 保护文件大小
+        mtime_ns: 保护文件的修改时间（纳秒）
+    """
+    name: str | None = None
+    total_size: int | None = None
+    crc32: int | None = None
+    version: int | None = None
+    size: int
+    mtime_ns: int
+
+    def matches(self, stat: os.stat_result) -> bool:
+        """
+        索引项是否仍然对应保护文件的当前状态
+
+        Args:
+            stat: 保护文件的状态
+
+        Returns:
+            大小与修改时间均未变化
+        """
+        return self.size == stat.st_size and self.mtime_ns == stat.st_mtime_ns
+
+
+class ProtectCatalog:
+    """
+    目录中被加密保护的文件的加密索引
+
+    保护文件的大小或修改时间变化、新增或删除后，索引视为过期，可增量重建。
+
+    Attributes:
+        directory: 目录路径
+        entries: 保护文件名到索引项的映射
+    """
+    __slots__ = ('directory', 'entries', '_cipher_file', '_sorted_names')
+
+    def __init__(self, directory: str, cipher_file: CipherFile, entries: dict[str, CatalogEntry] | None = None):
+        self.directory = directory
+        self.entries = entries or {}
+        self._cipher_file = cipher_file
+        self._sorted_names: list[tuple[str, str]] | None = None
+
+    @property
+    def filepath(self) -> str:
+        """索引文件路径"""
+        return os.path.join(self.directory, CATALOG_FILENAME)
+
+    @classmethod
+    def load(cls, directory: str, cipher_file: CipherFile) -> Self:
+        """
+        读取目录的索引
+
+        Args:
+            directory: 目录路径
+            cipher_file: 已解锁的加密方式文件，用于解锁索引与读取新的保护文件
+
+        Returns:
+            索引，目录中没有索引时为空
+
+        Raises:
+            CmValueError: 索引无法使用当前密钥解锁
+            CmRuntimeError: 索引格式不正确或解密失败
+        """
+        self = cls(directory, cipher_file)
+        if not os.path.exists(self.filepath):
+            return self
+        protect_file = ProtectCipherFile.from_protect_file(self.filepath)
+        if not protect_file.try_unlock_from_cipher_file(cipher_file) or protect_file.locked:
+            raise CmValueError('索引无法使用当前密钥解锁')
+        buffer = io.BytesIO()
+        protect_file.unpack_stream(buffer, CmProgress())
+        content = header.loads(buffer.getbuffer())
+        if not isinstance(content, dict) or content.get('version', 0) > _CATALOG_VERSION:
+            raise CmRuntimeError('不支持的索引版本')
+        try:
+            self.entries = {name: CatalogEntry(**entry) for name, entry in content.get('entries', {}).items()}
+        except (TypeError, ValidationError) as e:
+            raise CmRuntimeError('不正确的索引') from e
+        return self
+
+    def save(self) -> None:
+        """加密写入索引文件，先写入临时文件再替换，中途失败不会破坏原有的索引"""
+        content = header.dumps({'version': _CATALOG_VERSION,
+                                'entries': {name: entry.model_dump() for name, entry in self.entries.items()}})
+        protect_file = ProtectCipherFile.from_cipher_file(self._cipher_file)
+        temp_filepath = self.filepath + '.tmp'
+        try:
+            protect_file.pack_stream(io.BytesIO(content), len(content), CATALOG_FILENAME, temp_filepath,
+                                     CmProgress())
+            os.replace(temp_filepath, self.filepath)
+        finally:
+            if os.path.exists(temp_filepath):
+                os.remove(temp_filepath)
+
+    @classmethod
+    def add_packed(cls, protect_file: ProtectCipherFile, filepath: str) -> bool:
+        """
+        将刚加密完成的保护文件加入所在目录的索引
+
+        Args:
+            protect_file: 已解锁的保护文件
+            filepath: 保护文件路径
+
+        Returns:
+            是否已加入，文件扩展名不符、目录中没有索引或索引无法使用该文件的密钥解锁时不加入
+        """
+        directory = os.path.dirname(os.path.abspath(filepath))
+        if not filepath.endswith(PROTECT_FILE_SUFFIX) or not os.path.exists(os.path.join(directory, CATALOG_FILENAME)):
+            return False
+        try:
+            self = cls.load(directory, protect_file)
+        except (CmValueError, CmRuntimeError):
+            return False
+        self.entries[os.path.basename(filepath)] = _entry_of(protect_file, os.stat(filepath), protect_file)
+        self._sorted_names = None
+        self.save()
+        return True
+
+    def stale_files(self) -> tuple[list[str], list[str]]:
+        """
+        对比目录的当前状态
+
+        Returns:
+            (新增或已变化的保护文件名, 已删除的保护文件名)
+        """
+        with os.scandir(self.directory) as it:
+            stats = {entry.name: entry.stat() for entry in it
+                     if entry.name.endswith(PROTECT_FILE_SUFFIX) and entry.is_file()}
+        changed = sorted(name for name, stat in stats.items()
+                         if name not in self.entries or not self.entries[name].matches(stat))
+        removed = sorted(name for name in self.entries if name not in stats)
+        return changed, removed
+
+    def is_stale(self) -> bool:
+        """索引是否已过期"""
+        changed, removed = self.stale_files()
+        return bool(changed or removed)
+
+    def refresh(self, progress: CmProgress, concurrent_count: int = 0) -> bool:
+        """
+        重建过期的索引项并保存
+
+        Args:
+            progress: 进度管理器，以文件为单位
+            concurrent_count: 并发数，为0时使用CPU核心数，为1时不使用进程池
+
+        Returns:
+            索引是否有变化
+
+        Raises:
+            CmInterrupt: 已取消
+
+        与当前密钥不同的文件仍会记录大小与修改时间，但源文件名为空，直到文件再次变化前不会重试。
+        """
+        changed, removed = self.stale_files()
+        for name in removed:
+            del self.entries[name]
+        filepaths = [os.path.join(self.directory, name) for name in changed]
+        concurrent_count = concurrent_count or os.cpu_count() or 1
+        if concurrent_count > 1 and len(filepaths) >= _MIN_CONCURRENT_ENTRIES:
+            for start, entries in map_items(self._cipher_file, read_entry, filepaths, progress, concurrent_count):
+                self.entries.update(zip(changed[start:start + len(entries)], entries))
+        else:
+            progress = progress.start_or_sub(len(filepaths), unit='项')
+            for name, filepath in zip(changed, filepaths):
+                self.entries[name] = read_entry(self._cipher_file, filepath)
+                progress.step()
+            progress.complete()
+        if not changed and not removed:
+            return False
+        self._sorted_names = None
+        self.save()
+        return True
+
+    def find(self, prefix: str = '', substring: str = '') -> list[tuple[str, CatalogEntry]]:
+        """
+        按源文件名查找
+
+        Args:
+            prefix: 源文件名前缀
+            substring: 源文件名包含的字符串
+
+        Returns:
+            按源文件名排序的 (保护文件名, 索引项) 列表，不含无法解密的文件
+        """
+        if self._sorted_names is None:
+            self._sorted_names = sorted((entry.name, name) for name, entry in self.entries.items()
+                                        if entry.name is not None)
+        names = self._sorted_names
+        index = bisect.bisect_left(names, (prefix,)) if prefix else 0
+        result = []
+        for name, filename in names[index:]:
+            if not name.startswith(prefix):
+                break
+            if substring in name:
+                result.append((filename, self.entries[filename]))
+        return result
+
+
+def read_entry(cipher_file: CipherFile, filepath: str) -> CatalogEntry:
+    """
+    读取一个保护文件的索引项
+
+    Args:
+        cipher_file: 已解锁的加密方式文件
+        filepath: 保护文件路径
+
+    Returns:
+        索引项，无法读取或解密时源文件名为空
+
+    与加密方式文件的密钥字段完全相同时直接解密源文件名，否则尝试用其密钥解锁保护文件。
+    """
+    stat = os.stat(filepath)
+    try:
+        protect_file = ProtectCipherFile.from_protect_file(filepath)
+    except (CmRuntimeError, ValidationError):
+        return CatalogEntry(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+    if protect_file.same_key(cipher_file):
+        return _entry_of(protect_file, stat, cipher_file)
+    try:
+        if protect_file.try_unlock_from_cipher_file(cipher_file) and not protect_file.locked:
+            return _entry_of(protect_file, stat, protect_file)
+    except (CmRuntimeError, CmValueError):
+        pass
+    return _entry_of(protect_file, stat, None)
+
+
+def _entry_of(protect_file: ProtectCipherFile, stat: os.stat_result,
+              cipher_file: CipherFile | None) -> CatalogEntry:
+    """以给定的已解锁文件解密源文件名，构建索引项"""
+    name = None
+    if cipher_file is not None and protect_file.filename is not None:
+        try:
+            name = cipher_file._decrypt(protect_file.filename).decode('utf-8')
+        except (CmRuntimeError, CmValueError, UnicodeDecodeError):
+            pass
+    return CatalogEntry(name=name, total_size=protect_file.total_size, crc32=protect_file.crc32,
+                        version=protect_file.version, size=stat.st_size, mtime_ns=stat.st_mtime_ns)
\ No newline at end of file
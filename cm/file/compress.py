@@ -0,0 +1,297 @@
+#  MIT License
+#
+#  Copyright (c) 2026 BlueWhaleMain
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+#
+"""
+流压缩
+
+保护文件可以在加密前压缩内容，文件头只记录压缩算法名称。
+实现模块提供模块级的compress与decompress函数（如zlib、lzma），首次使用时才导入。
+
+源数据按固定大小分帧，各帧独立压缩，以帧头（原始长度与存储长度，均为4字节小端）开头。
+已压缩的数据（如图片、归档）先以帧中间的一小段试压缩，节省不足时整帧原样存储，存储长度与原始长度相同，
+解压时也不再经过压缩算法。
+"""
+import importlib
+import struct
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, BinaryIO, Iterable
+
+from cm.error import CmNotImplementedError, CmRuntimeError
+
+# 帧头：原始长度与存储长度
+_FRAME_HEADER = struct.Struct('<II')
+# 每帧的原始长度
+FRAME_SIZE = 1 << 20
+# 试压缩的长度，短于其4倍的帧直接压缩
+_SAMPLE_SIZE = 4096
+# 压缩后至少节省原长度的1/16才存储压缩结果
+_MIN_SAVING = 16
+
+
+class Codec:
+    """
+    压缩算法
+
+    Attributes:
+        name: 算法名称，记录在文件头中
+        module_names: 实现模块名称，依次尝试导入第一个可用的
+    """
+    __slots__ = ('name', 'module_names', '_module')
+
+    def __init__(self, name: str, module_names: Iterable[str]):
+        """
+        Args:
+            name: 算法名称
+            module_names: 实现模块名称
+        """
+        self.name = name
+        self.module_names = tuple(module_names)
+        self._module: Any | None = None
+
+    def __repr__(self) -> str:
+        return f'{self.__class__.__name__}({self.name!r})'
+
+    @property
+    def available(self) -> bool:
+        """实现模块是否可以导入"""
+        try:
+            self.load()
+            return True
+        except CmNotImplementedError:
+            return False
+
+    def load(self) -> Any:
+        """
+        导入实现模块
+
+        Returns:
+            实现模块，首次调用时导入
+
+        Raises:
+            CmNotImplementedError: 缺少依赖
+        """
+        if self._module is None:
+            errors = []
+            for module_name in self.module_names:
+                try:
+                    self._module = importlib.import_module(module_name)
+                    break
+                except ImportError as e:
+                    errors.append(str(e))
+            else:
+                raise CmNotImplementedError(f'compression {self.name} is not available: {"; ".join(errors)}')
+        return self._module
+
+    def compress(self, data: bytes) -> bytes:
+        """压缩一段字节"""
+        return self.load().compress(data)
+
+    def decompress(self, data: bytes) -> bytes:
+        """解压一段字节"""
+        return self.load().decompress(data)
+
+    def encode_frame(self, data: bytes) -> bytes:
+        """
+        压缩一帧
+
+        Args:
+            data: 原始数据，不超过FRAME_SIZE
+
+        Returns:
+            帧头与压缩后的数据，节省不足时为帧头与原始数据
+        """
+        size = len(data)
+        payload = data
+        if size >= _SAMPLE_SIZE * 4:
+            sample = data[(size - _SAMPLE_SIZE) // 2:(size + _SAMPLE_SIZE) // 2]
+            if not self._saved(len(sample), len(self.compress(sample))):
+                return _FRAME_HEADER.pack(size, size) + data
+        if size > 0:
+            compressed = self.compress(data)
+            if self._saved(size, len(compressed)):
+                payload = compressed
+        return _FRAME_HEADER.pack(size, len(payload)) + payload
+
+    @staticmethod
+    def _saved(size: int, compressed_size: int) -> bool:
+        return compressed_size <= size - size // _MIN_SAVING - 1
+
+
+# 算法名称到已注册压缩算法的映射
+_codecs: dict[str, Codec] = {}
+
+
+def register_codec(codec: Codec) -> None:
+    """
+    注册压缩算法，同名算法将被替换
+
+    Args:
+        codec: 压缩算法
+    """
+    _codecs[codec.name] = codec
+
+
+def list_codecs() -> list[Codec]:
+    """
+    Returns:
+        已注册的全部压缩算法，包括不可用的
+    """
+    return list(_codecs.values())
+
+
+def get_codec(name: str) -> Codec:
+    """
+    Args:
+        name: 算法名称
+
+    Returns:
+        压缩算法
+
+    Raises:
+        CmNotImplementedError: 未注册的算法或缺少依赖
+    """
+    codec = _codecs.get(name)
+    if codec is None:
+        raise CmNotImplementedError(f'unknown compression: {name}')
+    codec.load()
+    return codec
+
+
+class CompressReader:
+    """
+    读取时压缩的流包装，产生连续的帧
+
+    并发数大于1时以线程池预先压缩后续的帧，压缩算法在压缩时释放GIL。
+    读取的长度总是等于请求的长度，除非到达流的末尾，加密时据此按固定大小分块。
+    """
+
+    def __init__(self, stream: BinaryIO, codec: Codec, concurrent_count: int = 1):
+        """
+        Args:
+            stream: 源字节流
+            codec: 压缩算法
+            concurrent_count: 压缩线程并发数
+        """
+        self._stream = stream
+        self._codec = codec
+        self._buffer = bytearray()
+        self._pending: deque[Future] = deque()
+        self._concurrent_count = max(concurrent_count, 1)
+        self._executor = ThreadPoolExecutor(self._concurrent_count) if self._concurrent_count > 1 else None
+        self._eof = False
+
+    def __enter__(self) -> 'CompressReader':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """停止尚未开始的压缩任务"""
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+        self._pending.clear()
+
+    def read(self, size: int = -1) -> bytes:
+        while size < 0 or len(self._buffer) < size:
+            if not self._fill():
+                break
+        if size < 0:
+            size = len(self._buffer)
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    def readinto(self, buffer: memoryview) -> int:
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def _fill(self) -> bool:
+        """压缩下一帧追加到缓冲区，流已结束时返回False"""
+        if self._executor is None:
+            data = b'' if self._eof else self._stream.read(FRAME_SIZE)
+            if not data:
+                self._eof = True
+                return False
+            self._buffer += self._codec.encode_frame(data)
+            return True
+        while not self._eof and len(self._pending) < self._concurrent_count:
+            data = self._stream.read(FRAME_SIZE)
+            if not data:
+                self._eof = True
+                break
+            self._pending.append(self._executor.submit(self._codec.encode_frame, data))
+        if not self._pending:
+            return False
+        self._buffer += self._pending.popleft().result()
+        return True
+
+
+def decode_frames(codec: Codec, chunks: Iterable[bytes], total_size: int) -> Iterable[bytes]:
+    """
+    从解密后的块中解压出原始数据
+
+    Args:
+        codec: 压缩算法
+        chunks: 解密后的块，末尾可以有填充
+        total_size: 原始数据的总长度，达到后忽略剩余的字节
+
+    Returns:
+        原始数据，按帧分割
+
+    Raises:
+        CmRuntimeError: 帧不完整或解压失败
+    """
+    buffer = bytearray()
+    remaining = total_size
+    for chunk in chunks:
+        buffer += chunk
+        while remaining > 0 and len(buffer) >= _FRAME_HEADER.size:
+            size, stored_size = _FRAME_HEADER.unpack_from(buffer)
+            if not 0 < size <= min(remaining, FRAME_SIZE) or stored_size > size:
+                raise CmRuntimeError('文件已损坏：压缩帧头不正确')
+            end = _FRAME_HEADER.size + stored_size
+            if len(buffer) < end:
+                break
+            payload = bytes(buffer[_FRAME_HEADER.size:end])
+            del buffer[:end]
+            if stored_size < size:
+                try:
+                    payload = codec.decompress(payload)
+                except Exception as e:
+                    raise CmRuntimeError(f'文件已损坏：解压失败：{e}') from e
+                if len(payload) != size:
+                    raise CmRuntimeError('文件已损坏：解压后的长度不正确')
+            remaining -= size
+            yield payload
+        if remaining <= 0:
+            buffer.clear()
+    if remaining > 0:
+        raise CmRuntimeError('文件已损坏：压缩数据不完整')
+
+
+register_codec(Codec('zlib', ('zlib',)))
+register_codec(Codec('lzma', ('lzma',)))
+# Python 3.14起标准库提供zstd，未编译zstd支持时使用zstandard
+register_codec(Codec('zstd', ('compression.zstd', 'zstandard')))
\ No newline at end of file
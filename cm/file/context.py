@@ -0,0 +1,356 @@
+#  MIT License
+#
+#  Copyright (c) 2026 BlueWhaleMain
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+#
+from collections.abc import Callable
+from typing import Any
+
+from Crypto.Random import get_random_bytes
+
+from cm.base import SecretBuffer
+
+# 分组核心链式加密的最大分组数，超出后逐轮创建实例更快
+_CORE_ENCRYPT_MAX_BLOCKS = 3
+# 分组核心解密时使用整数异或的最大长度，超出后strxor更快
+_CORE_INT_XOR_MAX_LEN = 256
+# 计数器模式的随机nonce前缀长度
+_NONCE_PREFIX_LEN = 8
+# 计数器模式nonce中块序号的长度，与前缀拼接为12字节的nonce
+_CHUNK_INDEX_LEN = 4
+# 流中最后一块的附加认证数据，防止流在块边界处被截断或追加
+_FINAL_CHUNK_AAD = b'cm-final-chunk'
+
+
+class CipherContext:
+    """
+    加密上下文
+
+    在解锁时根据密钥与加密算法参数一次性推导，锁定时丢弃，构建后不可变。
+
+    持有规整后的密钥与算法参数，通过工厂廉价地创建新的加密算法实例，避免每次迭代重复修整密钥与检查类型。
+
+    对于具有固定IV的CBC模式，可额外提供无状态的分组核心（ECB），多轮迭代将直接在核心上链式计算，
+    不再每轮创建实例，结果与逐轮创建实例完全一致。
+
+    Attributes:
+        padding: 加密算法的填充长度，-1为不支持填充
+        max_crypt_len: 支持的最大块加密长度，0表示没有限制
+        decrypt_len: 解密块所需的长度，0表示没有定义
+        cant_decrypt: 指示当前不支持解密
+        block_size: 分组长度，0表示块无需按分组对齐
+        parallel: 流的各块互不依赖，可以并发处理
+        seekable: 可以从流的任意块开始解密
+    """
+    __slots__ = ('_factory', '_core', '_iv', '_secret', 'padding', 'max_crypt_len', 'decrypt_len', 'cant_decrypt',
+                 'block_size', 'parallel', 'seekable')
+
+    _factory: Callable[[], Any]
+    _core: Any | None
+    _iv: bytes | None
+    _secret: SecretBuffer | None
+    padding: int
+    max_crypt_len: int
+    decrypt_len: int
+    cant_decrypt: bool
+    block_size: int
+    parallel: bool
+    seekable: bool
+
+    def __init__(self, factory: Callable[[], Any], padding: int = -1, max_crypt_len: int = 0, decrypt_len: int = 0,
+                 cant_decrypt: bool = False, core: Any | None = None, iv: bytes | None = None,
+                 secret: SecretBuffer | None = None, block_size: int = 0, parallel: bool = False,
+                 seekable: bool = False):
+        """
+        Args:
+            factory: 加密算法实例工厂，参数均已绑定
+            padding: 加密算法的填充长度，-1为不支持填充
+            max_crypt_len: 支持的最大块加密长度，0表示没有限制
+            decrypt_len: 解密块所需的长度，0表示没有定义
+            cant_decrypt: 指示当前不支持解密
+            core: 与工厂相同密钥的ECB分组核心，仅用于CBC模式
+            iv: CBC模式的初始向量，长度即分组长度，需与core同时提供
+            secret: 工厂与分组核心所引用的密钥缓冲区，随上下文关闭擦除
+            block_size: 分组长度，0表示块无需按分组对齐
+            parallel: 流的各块互不依赖，可以并发处理
+            seekable: 可以从流的任意块开始解密
+        """
+        if (core is None) != (iv is None):
+            raise ValueError('core and iv must be provided together')
+        object.__setattr__(self, '_factory', factory)
+        object.__setattr__(self, '_core', core)
+        object.__setattr__(self, '_iv', iv)
+        object.__setattr__(self, '_secret', secret)
+        object.__setattr__(self, 'padding', padding)
+        object.__setattr__(self, 'max_crypt_len', max_crypt_len)
+        object.__setattr__(self, 'decrypt_len', decrypt_len)
+        object.__setattr__(self, 'cant_decrypt', cant_decrypt)
+        object.__setattr__(self, 'block_size', block_size)
+        object.__setattr__(self, 'parallel', parallel)
+        object.__setattr__(self, 'seekable', seekable)
+
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError(f'{self.__class__.__name__} is immutable')
+
+    def __delattr__(self, name: str):
+        raise AttributeError(f'{self.__class__.__name__} is immutable')
+
+    def new(self) -> Any:
+        """
+        创建一个新的加密算法实例
+
+        Returns:
+            加密算法实例，有状态的模式（如CBC）每次加解密都需要新实例
+        """
+        return self._factory()
+
+    @property
+    def nonce_len(self) -> int:
+        """
+        Returns:
+            每个值或流开头的nonce前缀长度，0表示没有
+        """
+        return 0
+
+    @property
+    def tag_len(self) -> int:
+        """
+        Returns:
+            每个块附带的认证标签长度，0表示没有
+        """
+        return 0
+
+    def close(self) -> None:
+        """擦除持有的密钥缓冲区，之后工厂与分组核心不应再被使用"""
+        if self._secret is not None:
+            self._secret.erase()
+
+    def encrypt(self, data: bytes, rounds: int = 1) -> bytes:
+        """
+        迭代加密一段字节
+
+        Args:
+            data: 已按需填充的明文
+            rounds: 迭代次数，每轮使用新的加密算法实例
+
+        Returns:
+            密文
+
+        Raises:
+            ValueError: 数据或参数不适用于当前加密算法
+        """
+        iv = self._iv
+        if iv is None or not data or len(data) % len(iv) or len(data) > len(iv) * _CORE_ENCRYPT_MAX_BLOCKS:
+            factory = self._factory
+            for _ in range(rounds):
+                data = factory().encrypt(data)
+            return data
+        encrypt = self._core.encrypt
+        size = len(iv)
+        total = len(data)
+        iv_int = int.from_bytes(iv)
+        if total == size:
+            for _ in range(rounds):
+                data = encrypt((int.from_bytes(data) ^ iv_int).to_bytes(size))
+            return data
+        for _ in range(rounds):
+            prev = iv_int
+            out = b''
+            for i in range(0, total, size):
+                block = encrypt((int.from_bytes(data[i:i + size]) ^ prev).to_bytes(size))
+                prev = int.from_bytes(block)
+                out += block
+            data = out
+        return data
+
+    def decrypt(self, data: bytes, rounds: int = 1) -> bytes:
+        """
+        迭代解密一段字节
+
+        Args:
+            data: 密文
+            rounds: 迭代次数，每轮使用新的加密算法实例
+
+        Returns:
+            明文，不去除填充
+
+        Raises:
+            ValueError: 数据或参数不适用于当前加密算法
+        """
+        iv = self._iv
+        if iv is None or not data or len(data) % len(iv):
+            factory = self._factory
+            for _ in range(rounds):
+                data = factory().decrypt(data)
+            return data
+        # CBC解密各分组互不依赖：P = D(C) ^ (IV || C[:-1])，整段交给核心一次完成
+        decrypt = self._core.decrypt
+        total = len(data)
+        if total <= _CORE_INT_XOR_MAX_LEN:
+            for _ in range(rounds):
+                data = (int.from_bytes(decrypt(data)) ^ int.from_bytes(iv + data[:-len(iv)])).to_bytes(total)
+            return data
+        # 依赖原生库，首次用到时才加载
+        from Crypto.Util.strxor import strxor
+        for _ in range(rounds):
+            data = strxor(decrypt(data), iv + data[:-len(iv)])
+        return data
+
+
+class NonceCipherContext(CipherContext):
+    """
+    计数器模式（CTR、GCM）的加密上下文
+
+    每个值或流都以随机的nonce前缀开头，其中第n个块的nonce由前缀与块序号n拼接而成，
+    块之间互不依赖，可以并发加解密，也不需要填充。单个值即是只有一个块的流。
+
+    GCM模式的每个块附带认证标签，流的最后一块另外认证结束标记，块被篡改、调换顺序或流被截断时解密将抛出ValueError。
+    """
+    __slots__ = ('_tag_len',)
+
+    _tag_len: int
+
+    def __init__(self, new: Callable[..., Any], tag_len: int = 0, secret: SecretBuffer | None = None):
+        """
+        Args:
+            new: 加密算法实例工厂，除nonce外的参数均已绑定
+            tag_len: 每个块附带的认证标签长度，CTR为0
+            secret: 工厂所引用的密钥缓冲区，随上下文关闭擦除
+        """
+        super().__init__(new, secret=secret, parallel=True, seekable=True)
+        object.__setattr__(self, '_tag_len', tag_len)
+
+    @property
+    def nonce_len(self) -> int:
+        return _NONCE_PREFIX_LEN
+
+    @property
+    def tag_len(self) -> int:
+        return self._tag_len
+
+    def new(self) -> Any:
+        """
+        创建一个使用随机nonce的加密算法实例
+
+        Returns:
+            加密算法实例
+        """
+        return self._factory(nonce=get_random_bytes(_NONCE_PREFIX_LEN + _CHUNK_INDEX_LEN))
+
+    def new_nonce(self) -> bytes:
+        """
+        Returns:
+            新的随机nonce前缀，每个值或流各用一个
+        """
+        return get_random_bytes(_NONCE_PREFIX_LEN)
+
+    def encrypt(self, data: bytes, rounds: int = 1) -> bytes:
+        """
+        加密一段字节
+
+        Args:
+            data: 明文
+            rounds: 迭代次数，只支持1
+
+        Returns:
+            nonce前缀与密文
+
+        Raises:
+            ValueError: 迭代次数不为1
+        """
+        if rounds != 1:
+            raise ValueError('counter mode does not support iteration')
+        nonce = self.new_nonce()
+        return nonce + self.encrypt_chunk(nonce, 0, data)
+
+    def decrypt(self, data: bytes, rounds: int = 1) -> bytes:
+        """
+        解密一段字节
+
+        Args:
+            data: nonce前缀与密文
+            rounds: 迭代次数，只支持1
+
+        Returns:
+            明文
+
+        Raises:
+            ValueError: 迭代次数不为1、数据过短或认证失败
+        """
+        if rounds != 1:
+            raise ValueError('counter mode does not support iteration')
+        if len(data) < _NONCE_PREFIX_LEN + self._tag_len:
+            raise ValueError('data too short')
+        return self.decrypt_chunk(data[:_NONCE_PREFIX_LEN], 0, data[_NONCE_PREFIX_LEN:])
+
+    def encrypt_chunk(self, nonce: bytes, index: int, data: bytes, final: bool = False) -> bytes:
+        """
+        加密流中的一个块
+
+        Args:
+            nonce: 流的nonce前缀
+            index: 块序号
+            data: 明文
+            final: 是流的最后一块，单个值不使用
+
+        Returns:
+            密文，GCM模式附带认证标签
+        """
+        cipher = self._factory(nonce=self._chunk_nonce(nonce, index))
+        if self._tag_len:
+            if final:
+                cipher.update(_FINAL_CHUNK_AAD)
+            data, tag = cipher.encrypt_and_digest(data)
+            return data + tag
+        return cipher.encrypt(data)
+
+    def decrypt_chunk(self, nonce: bytes, index: int, data: bytes, final: bool = False) -> bytes:
+        """
+        解密流中的一个块
+
+        Args:
+            nonce: 流的nonce前缀
+            index: 块序号
+            data: 密文，GCM模式附带认证标签
+            final: 是流的最后一块，单个值不使用
+
+        Returns:
+            明文
+
+        Raises:
+            ValueError: 认证失败
+        """
+        cipher = self._factory(nonce=self._chunk_nonce(nonce, index))
+        if self._tag_len:
+            if len(data) < self._tag_len:
+                raise ValueError('chunk too short')
+            if final:
+                cipher.update(_FINAL_CHUNK_AAD)
+            return cipher.decrypt_and_verify(data[:-self._tag_len], data[-self._tag_len:])
+        return cipher.decrypt(data)
+
+    @staticmethod
+    def _chunk_nonce(nonce: bytes, index: int) -> bytes:
+        """由nonce前缀与块序号拼接出块的nonce"""
+        if len(nonce) != _NONCE_PREFIX_LEN:
+            raise ValueError(f'nonce length must be {_NONCE_PREFIX_LEN}')
+        if not 0 <= index < 1 << (8 * _CHUNK_INDEX_LEN):
+            raise ValueError(f'chunk index out of range: {index}')
+        return nonce + index.to_bytes(_CHUNK_INDEX_LEN)
\ No newline at end of file
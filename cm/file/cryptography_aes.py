@@ -0,0 +1,160 @@
+#  MIT License
+#
+#  Copyright (c) 2026 BlueWhaleMain
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+#
+"""
+基于cryptography（OpenSSL）的AES后端
+
+提供与Crypto.Cipher.AES相同的new接口与MODE_*常量，模式常量的数值与pycryptodome一致，
+已写入文件的cipher_args因此可以直接使用。支持ECB、CBC、CTR与GCM模式，输出与pycryptodome逐字节一致。
+
+cryptography是可选依赖，未安装时导入本模块将抛出ImportError，后端视为不可用。
+"""
+from typing import Any
+
+from Crypto.Random import get_random_bytes
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+# 与Crypto.Cipher.AES一致的模式常量
+MODE_ECB = 1
+MODE_CBC = 2
+MODE_CTR = 6
+MODE_GCM = 11
+# 分组长度
+block_size = 16
+# 支持的密钥长度
+key_size = (16, 24, 32)
+# CTR模式中计数器的长度，与nonce拼接为完整的计数器分组
+_CTR_COUNTER_LEN = 4
+
+
+def new(key: Any, mode: int, iv: Any = None, nonce: Any = None, mac_len: int = 16) -> Any:
+    """
+    创建AES加密算法实例
+
+    Args:
+        key: 密钥，长度为16、24或32
+        mode: 模式常量
+        iv: CBC模式的初始向量，默认随机
+        nonce: CTR模式的12字节nonce或GCM模式的nonce，默认随机
+        mac_len: GCM模式的认证标签长度
+
+    Returns:
+        加密算法实例
+
+    Raises:
+        ValueError: 密钥、参数或模式不正确
+    """
+    if len(key) not in key_size:
+        raise ValueError(f'Incorrect AES key length ({len(key)} bytes)')
+    algorithm = algorithms.AES(key)
+    if mode == MODE_ECB:
+        return _Crypter(Cipher(algorithm, modes.ECB()), True, True)
+    if mode == MODE_CBC:
+        iv = get_random_bytes(block_size) if iv is None else bytes(iv)
+        if len(iv) != block_size:
+            raise ValueError('Incorrect IV length (it must be 16 bytes long)')
+        return _Crypter(Cipher(algorithm, modes.CBC(iv)), True, False)
+    if mode == MODE_CTR:
+        nonce = get_random_bytes(block_size - _CTR_COUNTER_LEN) if nonce is None else bytes(nonce)
+        if len(nonce) != block_size - _CTR_COUNTER_LEN:
+            raise ValueError(f'Nonce must be {block_size - _CTR_COUNTER_LEN} bytes long')
+        return _Crypter(Cipher(algorithm, modes.CTR(nonce + bytes(_CTR_COUNTER_LEN))), False, False)
+    if mode == MODE_GCM:
+        nonce = get_random_bytes(block_size) if nonce is None else bytes(nonce)
+        if not 4 <= mac_len <= 16:
+            raise ValueError("'mac_len' must be between 4 and 16")
+        return _GcmCrypter(algorithm, nonce, mac_len)
+    raise ValueError(f'Unsupported mode: {mode}')
+
+
+def _view(data: Any) -> Any:
+    """cryptography不接受ctypes数组，转换为字节视图"""
+    return data if isinstance(data, bytes | bytearray) else memoryview(data).cast('B')
+
+
+class _Crypter:
+    """
+    ECB、CBC与CTR模式的实例，状态随调用延续
+
+    与pycryptodome相同，有状态的模式一个实例只能用于加密或解密之一，无状态的ECB模式可以同时用于两者。
+    """
+    __slots__ = ('_cipher', '_aligned', '_stateless', '_encryptor', '_decryptor')
+
+    def __init__(self, cipher: Cipher, aligned: bool, stateless: bool):
+        self._cipher = cipher
+        self._aligned = aligned
+        self._stateless = stateless
+        self._encryptor = None
+        self._decryptor = None
+
+    def encrypt(self, data: Any) -> bytes:
+        data = _view(data)
+        if self._aligned and len(data) % block_size:
+            raise ValueError('Data must be aligned to block boundary in ECB/CBC mode')
+        if self._decryptor is not None and not self._stateless:
+            raise TypeError('encrypt() cannot be called after decrypt()')
+        if self._encryptor is None:
+            self._encryptor = self._cipher.encryptor()
+        return self._encryptor.update(data)
+
+    def decrypt(self, data: Any) -> bytes:
+        data = _view(data)
+        if self._aligned and len(data) % block_size:
+            raise ValueError('Data must be aligned to block boundary in ECB/CBC mode')
+        if self._encryptor is not None and not self._stateless:
+            raise TypeError('decrypt() cannot be called after encrypt()')
+        if self._decryptor is None:
+            self._decryptor = self._cipher.decryptor()
+        return self._decryptor.update(data)
+
+
+class _GcmCrypter:
+    """GCM模式的实例，只支持一次性的加密并认证与解密并校验"""
+    __slots__ = ('_algorithm', '_nonce', '_mac_len', '_aad')
+
+    def __init__(self, algorithm: algorithms.AES, nonce: bytes, mac_len: int):
+        self._algorithm = algorithm
+        self._nonce = nonce
+        self._mac_len = mac_len
+        self._aad = b''
+
+    def update(self, data: Any) -> None:
+        self._aad += bytes(_view(data))
+
+    def encrypt_and_digest(self, data: Any) -> tuple[bytes, bytes]:
+        encryptor = Cipher(self._algorithm, modes.GCM(self._nonce)).encryptor()
+        if self._aad:
+            encryptor.authenticate_additional_data(self._aad)
+        data = encryptor.update(_view(data)) + encryptor.finalize()
+        return data, encryptor.tag[:self._mac_len]
+
+    def decrypt_and_verify(self, data: Any, tag: bytes) -> bytes:
+        if len(tag) != self._mac_len:
+            raise ValueError('MAC check failed')
+        decryptor = Cipher(self._algorithm, modes.GCM(self._nonce, bytes(tag), self._mac_len)).decryptor()
+        if self._aad:
+            decryptor.authenticate_additional_data(self._aad)
+        try:
+            return decryptor.update(_view(data)) + decryptor.finalize()
+        except InvalidTag as e:
+            raise ValueError('MAC check failed') from e
\ No newline at end of file
@@ -0,0 +1,84 @@
+#  MIT License
+#
+#  Copyright (c) 2026 BlueWhaleMain
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+#
+"""
+文件头的编码
+
+文件头字段以紧凑的JSON编码，bytes表示为仅含一个键的对象 ``{"$bytes": base64}``。
+解析时不会执行任何代码，可安全地读取不可信的文件头；枚举按值编码，元组解码为列表。
+"""
+import base64
+import binascii
+import json
+from typing import Any
+
+from cm.error import CmRuntimeError
+
+# bytes编码后对象的唯一键
+_BYTES_KEY = '$bytes'
+
+
+def dumps(value: Any) -> bytes:
+    """
+    序列化一个值
+
+    Args:
+        value: 由JSON基础类型与bytes组成的值
+
+    Returns:
+        序列化后的字节
+
+    Raises:
+        TypeError: 包含不支持的类型
+    """
+    return json.dumps(value, default=_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def loads(data: bytes | memoryview) -> Any:
+    """
+    反序列化一个值
+
+    Args:
+        data: 序列化后的字节，末尾可以有空白
+
+    Returns:
+        反序列化的值
+
+    Raises:
+        CmRuntimeError: 格式不正确
+    """
+    try:
+        return json.loads(bytes(data), object_hook=_object_hook)
+    except (ValueError, TypeError, RecursionError, binascii.Error) as e:
+        raise CmRuntimeError('不正确的文件头') from e
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, bytes | bytearray | memoryview):
+        return {_BYTES_KEY: base64.standard_b64encode(value).decode('ascii')}
+    raise TypeError(f'unsupported header value type: {type(value).__name__}')
+
+
+def _object_hook(value: dict[str, Any]) -> Any:
+    if len(value) == 1 and _BYTES_KEY in value:
+        return base64.b64decode(value[_BYTES_KEY], validate=True)
+    return value
\ No newline at end of file
@@ -0,0 +1,196 @@
+#  MIT License
+#
+#  Copyright (c) 2026 BlueWhaleMain
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+#
+"""
+内存映射的文件读写
+
+本地普通文件通过内存映射读写，省去缓冲读写在内核与用户缓冲区之间的一次复制；
+管道等无法映射的文件退回原本的缓冲读写，调用方无需区分。
+"""
+import mmap
+import os
+import stat
+from typing import BinaryIO
+
+
+class MappedReader:
+    """
+    从文件当前位置开始读取的只读内存映射，提供与二进制流相同的read与readinto
+
+    readinto直接从映射的页复制到目标缓冲区，不产生中间对象。
+    """
+    __slots__ = ('_file', '_mmap', '_view')
+
+    def __init__(self, file: BinaryIO):
+        self._file = file
+        self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if hasattr(self._mmap, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+            self._mmap.madvise(mmap.MADV_SEQUENTIAL)
+        self._mmap.seek(file.tell())
+        self._view = memoryview(self._mmap)
+
+    def read(self, size: int = -1) -> bytes:
+        return self._mmap.read(size)
+
+    def readinto(self, buffer: memoryview) -> int:
+        position = self._mmap.tell()
+        size = min(len(buffer), len(self._mmap) - position)
+        buffer[:size] = self._view[position:position + size]
+        self._mmap.seek(position + size)
+        return size
+
+    def tell(self) -> int:
+        return self._mmap.tell()
+
+    def close(self) -> None:
+        """释放映射，并将原文件的位置同步到已读取处"""
+        if self._mmap.closed:
+            return
+        self._file.seek(self._mmap.tell())
+        self._view.release()
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class MappedWriter:
+    """
+    预先分配到指定大小的可写内存映射，按顺序写入，或由多个线程在各自的位置并发写入
+
+    关闭时文件截断到当前写入位置，预分配的空间中未确认的内容一并丢弃。
+    """
+    __slots__ = ('_file', '_mmap', '_view', '_position')
+
+    def __init__(self, file: BinaryIO, size: int):
+        self._file = file
+        _allocate(file.fileno(), size)
+        self._mmap = mmap.mmap(file.fileno(), size, access=mmap.ACCESS_WRITE)
+        self._view = memoryview(self._mmap)
+        self._position = 0
+
+    def write(self, data: bytes) -> int:
+        end = self._position + len(data)
+        if end > len(self._mmap):
+            raise ValueError('data out of mapped range')
+        self._mmap[self._position:end] = data
+        self._position = end
+        return len(data)
+
+    def write_at(self, offset: int, data: bytes | memoryview) -> None:
+        """在指定位置写入，不改变当前写入位置，多个线程可以并发写入互不重叠的范围"""
+        end = offset + len(data)
+        if offset < 0 or end > len(self._mmap):
+            raise ValueError('data out of mapped range')
+        self._view[offset:end] = data
+
+    def read_at(self, offset: int, size: int) -> memoryview:
+        """已写入内容的只读视图，不复制，须在关闭前释放"""
+        return self._view[offset:offset + size].toreadonly()
+
+    def seek(self, position: int) -> int:
+        """移动当前写入位置，以 :meth:`write_at` 写入时用于确认已完成的长度"""
+        if not 0 <= position <= len(self._mmap):
+            raise ValueError('position out of mapped range')
+        self._position = position
+        return position
+
+    def tell(self) -> int:
+        return self._position
+
+    def close(self) -> None:
+        """写回并释放映射，截断多余的预分配空间后关闭文件"""
+        if self._mmap.closed:
+            return
+        try:
+            self._mmap.flush()
+        finally:
+            self._view.release()
+            self._mmap.close()
+            os.ftruncate(self._file.fileno(), self._position)
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def open_reader(file: BinaryIO) -> BinaryIO | MappedReader:
+    """
+    尽可能以内存映射读取已打开的文件
+
+    Args:
+        file: 以二进制模式打开的文件，从当前位置开始读取
+
+    Returns:
+        内存映射的读取器，文件不能映射时为原文件
+    """
+    if not _is_regular_file(file):
+        return file
+    try:
+        return MappedReader(file)
+    except (OSError, ValueError):
+        return file
+
+
+def open_writer(filepath: str, size: int) -> BinaryIO | MappedWriter:
+    """
+    以预先分配大小的内存映射打开待写入的文件
+
+    Args:
+        filepath: 文件路径
+        size: 预计写入的总大小
+
+    Returns:
+        内存映射的写入器，无法映射时为以wb模式打开的文件
+    """
+    file = open(filepath, 'wb+')
+    if size > 0 and _is_regular_file(file):
+        try:
+            return MappedWriter(file, size)
+        except (OSError, ValueError):
+            file.truncate(0)
+    return file
+
+
+def _is_regular_file(file: BinaryIO) -> bool:
+    """是否为可以映射的本地普通文件"""
+    try:
+        return stat.S_ISREG(os.fstat(file.fileno()).st_mode)
+    except (OSError, ValueError, AttributeError):
+        return False
+
+
+def _allocate(fd: int, size: int) -> None:
+    """为文件预分配空间，文件系统不支持时仅设置文件大小"""
+    if hasattr(os, 'posix_fallocate'):
+        try:
+            os.posix_fallocate(fd, 0, size)
+            return
+        except OSError:
+            pass
+    os.ftruncate(fd, size)
\ No newline at end of file
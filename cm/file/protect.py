@@ -1,6 +1,6 @@
 #  MIT License
 #
-#  Copyright (c) 2022-2025 BlueWhaleMain
+#  Copyright (c) 2022-2026 BlueWhaleMain
 #
 #  Permission is hereby granted, free of charge, to any person obtaining a copy
 #  of this software and associated documentation files (the "Software"), to deal
@@ -21,13 +21,25 @@
 #  SOFTWARE.
 #
 import base64
+import contextlib
+import io
 import os
 import pickle
+import shutil
+import struct
 from binascii import crc32
-from typing import Self
+from collections import OrderedDict
+from typing import Any, AnyStr, BinaryIO, Self
 
-from cm.error import CmRuntimeError, CmValueError
+from cm.base import SecretBuffer
+from cm.calibrate import calibrate_stream
+from cm.error import CmRuntimeError, CmValueError, CmDamagedError
 from cm.file.base import CipherFile
+from cm.file import header
+from cm.file.compress import CompressReader, decode_frames, get_codec
+from cm.file.context import NonceCipherContext
+from cm.file.mapped import MappedWriter, open_reader, open_writer
+from cm.parallel import crypt_stream
 from cm.progress import CmProgress
 from common.file import filesize_convert
 
@@ -35,6 +47,44 @@ from common.file import filesize_convert
 _PROTECT_CIPHER_FILE_CONTENT_TYPE = "application/cm-protect"
 # 被加密保护的文件幻数
 _MAGIC = b'CM'
+# 二进制文件头的标记，紧跟幻数之后，不属于base64字母表，以此与旧的base64文件头区分
+_BINARY_HEADER_MARK = b'\x00'
+# 二进制文件头的前缀：幻数、标记、文件头格式版本与文件头长度
+_BINARY_HEADER_PREFIX = struct.Struct('<2s1sBI')
+# 二进制文件头的格式版本
+_BINARY_HEADER_VERSION = 1
+# 读取文件头时首次读取的长度，多数文件头可以一次读完
+_HEADER_READ_SIZE = 4096
+# 文件头长度的上限，正常的文件头远小于此，超出时视为损坏，避免按损坏的长度读入过多数据
+_MAX_HEADER_LEN = 1024 * 1024
+# 仅依赖整体CRC32校验的文件版本
+_CRC_VERSION = 1
+# 按固定大小分段认证的文件版本，要求认证加密模式（GCM），最后一段带有结束标记
+_SEGMENTED_VERSION = 2
+# 加密前压缩内容的文件版本，是否分段认证由加密模式决定，旧版本的程序将拒绝打开
+_COMPRESSED_VERSION = 3
+# 回填前的CRC32占位值，序列化后不短于任何实际值，回填时以空格补齐到原长度
+_CRC32_PLACEHOLDER = 0xFFFFFFFF
+# 随机访问时默认缓存的已解密块数
+DEFAULT_CACHE_CHUNKS = 4
+
+
+class _Crc32Reader:
+    """读取的同时计算CRC32的流包装"""
+
+    def __init__(self, stream: BinaryIO):
+        self._stream = stream
+        self.crc = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._stream.read(size)
+        self.crc = crc32(data, self.crc)
+        return data
+
+    def readinto(self, buffer: memoryview) -> int:
+        size = self._stream.readinto(buffer)
+        self.crc = crc32(buffer[:size], self.crc)
+        return size
 
 
 class ProtectCipherFile(CipherFile):
@@ -42,15 +92,21 @@ class ProtectCipherFile(CipherFile):
     被加密保护的文件
 
     Attributes:
+        version: 文件版本，1仅有整体CRC32校验，2按块分段认证，3加密前压缩
         filename: 源文件名
         total_size: 源文件大小
         crc32: 源文件CRC32校验和
+        chunk_size: 加密时使用的块大小，解密时按此分块，旧文件为空
+        compression: 加密前使用的压缩算法名称（如zlib、lzma、zstd），为空时不压缩
     """
     content_type: str = _PROTECT_CIPHER_FILE_CONTENT_TYPE
 
+    version: int = _CRC_VERSION
     filename: bytes | None = None
     total_size: int | None = None
     crc32: int | None = None
+    chunk_size: int | None = None
+    compression: str | None = None
 
     # 当前操作的文件路径
     _filepath: str | None = None
@@ -84,26 +140,97 @@ class ProtectCipherFile(CipherFile):
 
         Raises:
             CmRuntimeError: 文件格式不正确
+
+        仅读取文件头，不会读取正文。
         """
         with open(filepath, 'rb') as f:
-            if f.read(len(_MAGIC)) != _MAGIC:
+            fields, _ = cls._read_header(f)
+        self = cls(**fields)
+        self._filepath = filepath
+        return self
+
+    def switch_file(self, filepath: str) -> bool:
+        """
+        在当前实例上改为读取另一个保护文件
+
+        Args:
+            filepath: 文件路径
+
+        Returns:
+            是否已切换，密钥相关字段不同时不切换
+
+        Raises:
+            CmRuntimeError: 文件格式不正确
+
+        密钥相关字段相同的文件可以沿用已推导的加密上下文，批量解密时省去逐个文件推导密钥的开销。
+        """
+        with open(filepath, 'rb') as f:
+            fields, _ = self._read_header(f)
+        other = type(self)(**fields)
+        if not self.same_key(other):
+            return False
+        for name in type(self).model_fields:
+            setattr(self, name, getattr(other, name))
+        self._close_data_context()
+        self._filepath = filepath
+        return True
+
+    @staticmethod
+    def _read_header(stream: BinaryIO) -> tuple[dict[str, Any], int]:
+        """
+        从流的开头读取文件头
+
+        Args:
+            stream: 字节流
+
+        Returns:
+            文件头字段与正文在流中的起始位置
+
+        Raises:
+            CmRuntimeError: 文件格式不正确
+            CmDamagedError: 文件头长度超出上限
+
+        旧文件头为base64编码的pickle，以换行结束，反序列化可能执行任意代码，仅应打开可信的旧文件。
+        """
+        data = stream.read(_HEADER_READ_SIZE)
+        if data[:len(_MAGIC)] != _MAGIC:
+            raise CmRuntimeError('不正确的文件开头')
+        if data[len(_MAGIC):len(_MAGIC) + len(_BINARY_HEADER_MARK)] == _BINARY_HEADER_MARK:
+            if len(data) < _BINARY_HEADER_PREFIX.size:
+                raise CmRuntimeError('不正确的文件开头')
+            _, _, version, length = _BINARY_HEADER_PREFIX.unpack_from(data)
+            if version > _BINARY_HEADER_VERSION:
+                raise CmRuntimeError(f'不支持的文件头版本：{version}')
+            if length > _MAX_HEADER_LEN:
+                raise CmDamagedError(f'文件头长度{length}超出上限', 0, _BINARY_HEADER_PREFIX.size)
+            offset = _BINARY_HEADER_PREFIX.size + length
+            if len(data) < offset:
+                data += stream.read(offset - len(data))
+            if len(data) < offset:
                 raise CmRuntimeError('不正确的文件开头')
-            base64_bytes = b''
-            while byte := f.read(1):
-                if byte == b'\n':
-                    break
-                base64_bytes += byte
+            fields = header.loads(memoryview(data)[_BINARY_HEADER_PREFIX.size:offset])
+        else:
+            newline = data.find(b'\n', len(_MAGIC))
+            while newline < 0:
+                if len(data) > _MAX_HEADER_LEN:
+                    raise CmDamagedError('文件头长度超出上限', 0, len(data))
+                more = stream.read(_HEADER_READ_SIZE)
+                if not more:
+                    raise CmRuntimeError('不正确的文件开头')
+                start = len(data)
+                data += more
+                newline = data.find(b'\n', start)
+            offset = newline + 1
             try:
-                header = pickle.loads(base64.standard_b64decode(base64_bytes))
+                fields = pickle.loads(base64.standard_b64decode(data[len(_MAGIC):newline]))
             except Exception as e:
                 raise CmRuntimeError('不正确的文件开头') from e
-            if 'content_type' not in header or header['content_type'] != _PROTECT_CIPHER_FILE_CONTENT_TYPE:
-                raise CmRuntimeError('不正确的文件开头')
-            self = cls(**header)
-            self._filepath = filepath
-            return self
+        if not isinstance(fields, dict) or fields.get('content_type') != _PROTECT_CIPHER_FILE_CONTENT_TYPE:
+            raise CmRuntimeError('不正确的文件开头')
+        return fields, offset
 
-    def pack_to(self, raw_filepath: str, dist_filepath: str, progress: CmProgress, chunk_size: int = 2048) -> None:
+    def pack_to(self, raw_filepath: str, dist_filepath: str, progress: CmProgress, chunk_size: int = 0,
+                update_catalog: bool = True, concurrent_count: int = 0) -> None:
         """
         加密到指定位置
 
@@ -111,37 +238,108 @@ class ProtectCipherFile(CipherFile):
             raw_filepath: 源文件路径
             dist_filepath: 目标文件路径
             progress: 进度管理器
-            chunk_size: 块大小
+            chunk_size: 块大小，为0时根据文件大小与加密算法自动选择，否则向上取整为分组长度的整数倍
+            update_catalog: 目标目录中已有可用当前密钥解锁的索引时，将新文件加入索引
+            concurrent_count: 压缩与加密的线程数上限，为0时根据大小与CPU核心数自动选择
+        """
+        with open(raw_filepath, 'rb') as raw_file, open_reader(raw_file) as file:
+            self.pack_stream(file, os.path.getsize(raw_filepath), os.path.basename(raw_filepath), dist_filepath,
+                             progress, chunk_size, concurrent_count)
+        self._filepath = raw_filepath
+        if update_catalog:
+            # 索引以保护文件存储，依赖本模块
+            from cm.file.catalog import ProtectCatalog
+            ProtectCatalog.add_packed(self, dist_filepath)
+
+    def pack_stream(self, stream: BinaryIO, total_size: int, filename: str, dist_filepath: str,
+                    progress: CmProgress, chunk_size: int = 0, concurrent_count: int = 0) -> None:
+        """
+        加密一个流到指定位置
+
+        Args:
+            stream: 源字节流
+            total_size: 源字节流的大小
+            filename: 记录的源文件名
+            dist_filepath: 目标文件路径
+            progress: 进度管理器
+            chunk_size: 块大小，为0时根据大小与加密算法自动选择，否则向上取整为分组长度的整数倍
+            concurrent_count: 压缩与加密的线程数上限，为0时根据大小与CPU核心数自动选择
+
+        Raises:
+            CmNotImplementedError: 指定的压缩算法不可用
+
+        指定了压缩算法时，内容先按帧压缩再加密，已压缩的数据整帧原样存储，记录的大小与校验和仍对应源数据。
         """
-        self.total_size = os.path.getsize(raw_filepath)
-        assert self.total_size is not None
+        self.total_size = total_size
         if self.total_size == 0:
             raise CmValueError('file is empty')
-        progress.start_or_sub(self.total_size, '加密中...', filesize_convert, 'File Size')
-        self._filepath = raw_filepath
-        self.filename = self._encrypt(os.path.basename(raw_filepath).encode('utf-8'))
-        with open(raw_filepath, 'rb') as f:
-            crc = 0
-            while chunk := f.read(chunk_size):
-                crc = crc32(chunk, crc)
-                progress.step(len(chunk), f'计算校验中...，CRC32：{str(crc)}.')
-            self.crc32 = crc
-        with open(raw_filepath, 'rb') as file:
-            with open(dist_filepath, 'wb') as dist_file:
-                dist_file.write(_MAGIC)
-                dist_file.write(base64.standard_b64encode(pickle.dumps(self.model_dump())))
-                dist_file.write(b'\n')
-                if 0 < self._max_crypt_len < chunk_size:
-                    chunk_size = self._max_crypt_len
-                progress.restart(self.total_size // chunk_size, unit=f'区块（{chunk_size}字节）')
-                current_size = 0
-                for chunk in self.encrypt_stream(file, chunk_size, progress, self.total_size,
-                                                 os.cpu_count() or 1 if self.cipher_name.padding <= 0 else 1):
-                    current_size += len(chunk)
-                    dist_file.write(chunk)
-                    progress.step(last_msg=f'加密中...{filesize_convert(current_size)}')
+        codec = get_codec(self.compression) if self.compression is not None else None
+        # 每个文件各用一个随机数据密钥，此后更换密钥只需改写文件头
+        self._wrap_data_key()
+        tuning = calibrate_stream(self, self.total_size)
+        compress_count = concurrent_count or os.cpu_count() or 1
+        crypt_count = min(tuning.concurrent_count, compress_count)
+        if chunk_size <= 0:
+            chunk_size = tuning.chunk_size
+        elif 0 < self._max_crypt_len < chunk_size:
+            chunk_size = self._max_crypt_len
+        padding = self._stream_context.padding
+        if padding > 0:
+            # 每块单独填充，块大小须为分组长度的整数倍，解密时才能按记录的块大小切分
+            chunk_size = -(-chunk_size // padding) * padding
+            if 0 < self._max_crypt_len < chunk_size:
+                chunk_size = self._max_crypt_len // padding * padding
+        self.chunk_size = chunk_size
+        self.version = _SEGMENTED_VERSION if self._tag_len > 0 else _CRC_VERSION
+        if codec is not None:
+            self.version = _COMPRESSED_VERSION
+        progress.start_or_sub(self.total_size // chunk_size, '加密中...', unit=f'区块（{chunk_size}字节）')
+        self.filename = self._encrypt(filename.encode('utf-8'))
+        # 校验和在加密的同时计算，文件头先以最大的占位值写入，完成后原地回填
+        self.crc32 = _CRC32_PLACEHOLDER
+        header_len = len(self._dump_header())
+        # 未压缩时加密后的大小可以预先算出，以内存映射写入；压缩后的大小未知，仍按顺序写入文件
+        size = header_len + self._encrypted_size(chunk_size) if codec is None else 0
+        with open_writer(dist_filepath, size) as dist_file, contextlib.ExitStack() as stack:
+            dist_file.write(self._dump_header())
+            current_size = 0
+            reader = _Crc32Reader(stream)
+            source: Any = reader
+            if codec is not None:
+                # 压缩在读取时进行，不依赖加密方式能否并发
+                source = stack.enter_context(CompressReader(reader, codec, compress_count))
+            # noinspection PyTypeChecker
+            for chunk in self.encrypt_stream(source, chunk_size, progress, self.total_size, crypt_count):
+                current_size += len(chunk)
+                dist_file.write(chunk)
+                progress.step(last_msg=f'加密中...{filesize_convert(current_size)}')
+            self.crc32 = reader.crc
+            if isinstance(dist_file, MappedWriter):
+                # 映射写入时位置即确认的长度，回填不能移动写入位置
+                dist_file.write_at(0, self._dump_header(header_len))
+            else:
+                dist_file.seek(0)
+                dist_file.write(self._dump_header(header_len))
         progress.complete()
 
+    def _encrypted_size(self, chunk_size: int) -> int:
+        """未压缩的源数据按块加密后的总大小，用于预先分配输出文件"""
+        context = self._stream_context
+        chunk_count = max(-(-self.total_size // chunk_size), 1)
+        if isinstance(context, NonceCipherContext):
+            return context.nonce_len + self.total_size + chunk_count * context.tag_len
+        if context.decrypt_len > 0:
+            return chunk_count * context.decrypt_len
+        if context.padding > 0:
+            # 块大小是分组长度的整数倍，仅最后一块需要填充
+            return -(-self.total_size // context.padding) * context.padding
+        return self.total_size
+
+    def _dump_header(self, size: int = 0) -> bytes:
+        """序列化二进制文件头，包含幻数与前缀，末尾以空格补齐到指定的总长度"""
+        data = header.dumps(self.model_dump()).ljust(size - _BINARY_HEADER_PREFIX.size, b' ')
+        return _BINARY_HEADER_PREFIX.pack(_MAGIC, _BINARY_HEADER_MARK, _BINARY_HEADER_VERSION, len(data)) + data
+
     def try_unlock_from_cipher_file(self, cipher_file: CipherFile) -> bool:
         """
         尝试用另一个加密方式文件实例解锁自身
@@ -164,6 +362,60 @@ class ProtectCipherFile(CipherFile):
         except CmValueError:
             return False
 
+    def rekey(self, key: AnyStr | SecretBuffer, passphrase: str | None = None) -> None:
+        """
+        更换密钥，只重新包装数据密钥，源文件名同时以新密钥重新加密，不改写文件
+
+        Args:
+            key: 新密钥，类型与当前密钥相同，非对称加密须为私钥
+            passphrase: 新密钥的解锁密码（若有）
+
+        Raises:
+            CmRuntimeError: 没有数据密钥
+            CmValueError: 当前密钥无法解开数据密钥，新密钥无法用于加解密过程，或非对称加密的新密钥不是私钥
+        """
+        filename = self._decrypt(self.filename) if self.filename is not None else None
+        super().rekey(key, passphrase)
+        if filename is not None:
+            self.filename = self._encrypt(filename)
+
+    def rekey_file(self, key: AnyStr | SecretBuffer, passphrase: str | None = None) -> None:
+        """
+        更换保护文件的密钥并改写文件头，内容不重新加密，耗时与文件大小无关
+
+        Args:
+            key: 新密钥，类型与当前密钥相同，非对称加密须为私钥
+            passphrase: 新密钥的解锁密码（若有）
+
+        Raises:
+            CmRuntimeError: 未指定路径、文件格式不正确、文件已改变或旧文件没有数据密钥
+            CmValueError: 当前密钥无法解开数据密钥，新密钥无法用于加解密过程，或非对称加密的新密钥不是私钥
+
+        新文件头不长于原文件头时原地改写并以空格补齐，否则（如换用更长的RSA密钥）将正文复制到新文件后替换。
+        文件的修改时间保持不变，批量加密的增量判断与目录索引不受影响。没有数据密钥的旧文件需要解密后重新加密。
+        """
+        if self._filepath is None:
+            raise CmRuntimeError('未指定路径')
+        stat = os.stat(self._filepath)
+        with open(self._filepath, 'r+b') as f:
+            fields, offset = self._read_header(f)
+            if fields.get('wrapped_key') != self.wrapped_key:
+                raise CmRuntimeError('文件已改变')
+            self.rekey(key, passphrase)
+            data = self._dump_header(offset)
+            if len(data) <= offset:
+                f.seek(0)
+                f.write(data)
+                data = b''
+        if data:
+            temp_filepath = self._filepath + '.tmp'
+            with open(self._filepath, 'rb') as src_file, open(temp_filepath, 'wb') as dist_file:
+                dist_file.write(data)
+                src_file.seek(offset)
+                shutil.copyfileobj(src_file, dist_file)
+            os.replace(temp_filepath, self._filepath)
+        os.utime(self._filepath, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
     def decrypt_filename(self) -> str | None:
         """
         解密源文件名
@@ -181,48 +433,290 @@ class ProtectCipherFile(CipherFile):
         except UnicodeDecodeError as e:
             raise CmRuntimeError(f'解密失败：{e.object}') from e
 
-    def unpack_to(self, dist_filepath: str, progress: CmProgress, chunk_size: int = 2048) -> None:
+    def unpack_to(self, dist_filepath: str, progress: CmProgress, chunk_size: int = 0,
+                  concurrent_count: int = 0) -> None:
         """
         解密到指定位置
 
         Args:
             dist_filepath: 目标文件路径
             progress: 进度管理器
-            chunk_size: 块大小
+            chunk_size: 块大小，仅用于未记录块大小的旧文件，为0时自动选择
+            concurrent_count: 解密的并发数上限，为0时根据大小与CPU核心数自动选择
 
         Raises:
             CmRuntimeError: 文件格式不正确或解密失败
+            CmDamagedError: 分段认证失败，附带损坏的段在文件中的范围
+
+        分段认证的文件将并发校验各段，遇到第一个损坏的段即停止，此前写出的内容均已通过认证。
+        未压缩且各块可以独立解密（CTR、GCM、ECB）时，工作线程将各块直接写入映射输出中的对应位置。
+        """
+        if self.total_size is None:
+            raise CmValueError('文件大小异常')
+        # 源文件大小已知，本地文件直接映射输入并预分配输出
+        with open_writer(dist_filepath, self.total_size) as dist_file:
+            self.unpack_stream(dist_file, progress, chunk_size, concurrent_count)
+
+    def open(self, cache_chunks: int = DEFAULT_CACHE_CHUNKS) -> 'ProtectReader':
+        """
+        以只读、可随机访问的流打开文件，读取时只解密覆盖所读范围的块
+
+        Args:
+            cache_chunks: 缓存的已解密块数
+
+        Returns:
+            只读流，关闭后不影响当前实例
+
+        Raises:
+            CmRuntimeError: 未指定路径、文件格式不正确、已压缩或加密方式的块之间互相依赖（如CBC）
+
+        要求未压缩且各块可以独立解密的加密方式，即计数器模式（CTR、GCM）、ECB、混合加密与逐块非对称加密。
+        GCM模式下每块在解密时认证，其余模式只在完整解密时校验CRC32，随机读取不做校验。
+        """
+        return ProtectReader(self, cache_chunks)
+
+    def unpack_stream(self, dist_file: BinaryIO, progress: CmProgress, chunk_size: int = 0,
+                      concurrent_count: int = 0) -> None:
+        """
+        解密到一个流
+
+        Args:
+            dist_file: 目标字节流
+            progress: 进度管理器
+            chunk_size: 块大小，仅用于未记录块大小的旧文件，为0时自动选择
+            concurrent_count: 解密的并发数上限，为0时根据大小与CPU核心数自动选择
+
+        Raises:
+            CmRuntimeError: 文件格式不正确或解密失败
+            CmDamagedError: 分段认证失败，附带损坏的段在文件中的范围
         """
         if self._filepath is None:
             raise CmRuntimeError('未指定路径')
         if self.total_size is None:
             raise CmValueError('文件大小异常')
+        if self.version > _COMPRESSED_VERSION:
+            raise CmRuntimeError(f'不支持的文件版本：{self.version}')
+        if self.version == _SEGMENTED_VERSION and self._tag_len <= 0:
+            raise CmRuntimeError('分段认证的文件需要认证加密模式')
+        if (self.version == _COMPRESSED_VERSION) != (self.compression is not None):
+            raise CmRuntimeError('压缩算法与文件版本不符')
+        codec = get_codec(self.compression) if self.compression is not None else None
 
         progress.start_or_sub(title='解密并校验中...')
-        with open(self._filepath, 'rb') as f:
-            if f.read(len(_MAGIC)) != _MAGIC:
-                raise CmRuntimeError('不正确的文件开头')
-            while byte := f.read(1):
-                if byte == b'\n':
-                    break
-            with open(dist_filepath, 'wb') as dist_file:
+        with open(self._filepath, 'rb') as raw_file:
+            _, offset = self._read_header(raw_file)
+            raw_file.seek(offset)
+            with open_reader(raw_file) as f:
+                tuning = calibrate_stream(self, self.total_size, 'decrypt')
                 if self._decrypt_len > 0:
                     chunk_size = self._decrypt_len
+                elif self.chunk_size is not None:
+                    chunk_size = self.chunk_size + self._tag_len
+                elif chunk_size <= 0:
+                    chunk_size = tuning.chunk_size
                 progress.restart(self.total_size // chunk_size, unit=f'区块（{chunk_size}字节）')
                 current_size = 0
                 crc = 0
-                for chunk in self.decrypt_stream(f, chunk_size, progress, self.total_size,
-                                                 os.cpu_count() or 1 if self.cipher_name.padding <= 0 else 1):
-                    if current_size + len(chunk) > self.total_size:
-                        chunk = chunk[:self.total_size - current_size]
-                    current_size += len(chunk)
-                    crc = crc32(chunk, crc)
-                    dist_file.write(chunk)
-                    progress.step(last_msg=f'解密并校验中...{filesize_convert(current_size)}')
+                concurrent_count = min(tuning.concurrent_count, concurrent_count or tuning.concurrent_count)
+                context = self._stream_context
+                # 未压缩时各块的明文位置固定，工作线程直接写入映射的输出，主线程只按顺序确认并累计校验和
+                mapped = (isinstance(dist_file, MappedWriter) and codec is None and concurrent_count > 1
+                          and self.chunk_size is not None and self._decrypt_len <= 0 and context.parallel
+                          and (context.padding <= 0 or chunk_size % context.padding == 0))
+                if mapped:
+                    chunks = ()
+                elif (self._decrypt_len > 0 and concurrent_count > 1 and self.iter_count <= 1
+                        and not self._stream_context.cant_decrypt):
+                    # 逐块非对称加密的旧文件，单块解密开销大且受GIL限制，成批交给进程池；
+                    # 多次迭代的文件每轮都要遍历整个流，仍由decrypt_stream处理
+                    chunks = crypt_stream(self, 'decrypt', f, chunk_size, concurrent_count, tuning.batch_chunks)
+                else:
+                    chunks = self.decrypt_stream(f, chunk_size, progress, self.total_size, concurrent_count)
+                if codec is not None:
+                    chunks = decode_frames(codec, chunks, self.total_size)
+                try:
+                    if mapped:
+                        for size in self.decrypt_stream_into(f, dist_file.write_at, chunk_size, self.chunk_size,
+                                                             self.total_size, concurrent_count):
+                            crc = crc32(dist_file.read_at(current_size, size), crc)
+                            current_size += size
+                            dist_file.seek(current_size)
+                            progress.step(last_msg=f'解密并校验中...{filesize_convert(current_size)}')
+                    for chunk in chunks:
+                        if current_size + len(chunk) > self.total_size:
+                            chunk = chunk[:self.total_size - current_size]
+                        current_size += len(chunk)
+                        crc = crc32(chunk, crc)
+                        dist_file.write(chunk)
+                        progress.step(last_msg=f'解密并校验中...{filesize_convert(current_size)}')
+                except CmDamagedError as e:
+                    start, end = e.start + offset, e.end + offset
+                    raise CmDamagedError(f'文件已损坏：第{start}至{end}字节，已解密{filesize_convert(current_size)}',
+                                         start, end) from e
                 if crc != self.crc32:
                     raise CmRuntimeError('文件校验失败')
 
         progress.complete()
 
 
+class ProtectReader(io.RawIOBase):
+    """
+    被加密保护的文件的只读随机访问流
+
+    读取时按需解密所需的块，最近使用的若干块保存在缓存中，顺序读取与反复读取同一区域都不会重复解密。
+    """
+
+    def __init__(self, protect_file: ProtectCipherFile, cache_chunks: int = DEFAULT_CACHE_CHUNKS):
+        """
+        Args:
+            protect_file: 已解锁的保护文件
+            cache_chunks: 缓存的已解密块数
+
+        Raises:
+            CmRuntimeError: 未指定路径、文件格式不正确、已压缩或加密方式的块之间互相依赖
+        """
+        super().__init__()
+        self._raw: BinaryIO | None = None
+        filepath = protect_file._filepath
+        if filepath is None:
+            raise CmRuntimeError('未指定路径')
+        if protect_file.total_size is None or protect_file.chunk_size is None:
+            raise CmRuntimeError('旧文件未记录块大小，不支持随机访问')
+        if protect_file.version > _COMPRESSED_VERSION:
+            raise CmRuntimeError(f'不支持的文件版本：{protect_file.version}')
+        if protect_file.compression is not None:
+            raise CmRuntimeError('压缩的文件不支持随机访问')
+        context = protect_file._stream_context
+        if protect_file.version == _SEGMENTED_VERSION and context.tag_len <= 0:
+            raise CmRuntimeError('分段认证的文件需要认证加密模式')
+        if context.cant_decrypt:
+            raise CmRuntimeError('cannot decrypt')
+        if not context.seekable:
+            raise CmRuntimeError('该加密方式的块之间互相依赖，不支持随机访问')
+        if context.padding > 0 and protect_file.chunk_size % context.padding:
+            raise CmRuntimeError('块大小不是分组长度的整数倍，不支持随机访问')
+        if context.decrypt_len > 0 and protect_file.iter_count > 1:
+            raise CmRuntimeError('多次迭代的非对称加密不支持随机访问')
+        self._file = protect_file
+        self._context = context
+        self._size = protect_file.total_size
+        self._chunk_size = protect_file.chunk_size
+        self._encrypted_chunk_size = context.decrypt_len or protect_file.chunk_size + context.tag_len
+        self._chunk_count = max(-(-self._size // self._chunk_size), 1)
+        self._cache: OrderedDict[int, bytes] = OrderedDict()
+        self._cache_chunks = max(cache_chunks, 1)
+        self._position = 0
+        self._raw = open(filepath, 'rb')
+        try:
+            _, self._offset = protect_file._read_header(self._raw)
+            self._nonce = b''
+            if isinstance(context, NonceCipherContext):
+                self._raw.seek(self._offset)
+                self._nonce = self._raw.read(context.nonce_len)
+                if len(self._nonce) != context.nonce_len:
+                    raise CmDamagedError('文件已损坏：缺少nonce', self._offset, self._offset + len(self._nonce))
+                self._offset += context.nonce_len
+        except BaseException:
+            self._raw.close()
+            raise
+
+    @property
+    def size(self) -> int:
+        """源文件大小"""
+        return self._size
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        self._check_closed()
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        self._check_closed()
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+        elif whence == io.SEEK_END:
+            position = self._size + offset
+        else:
+            raise ValueError(f'invalid whence: {whence}')
+        if position < 0:
+            raise ValueError(f'negative seek position {position}')
+        self._position = position
+        return position
+
+    def read(self, size: int | None = -1) -> bytes:
+        """
+        从当前位置读取
+
+        Args:
+            size: 最多读取的字节数，为负数或None时读取到末尾
+
+        Returns:
+            明文，到达末尾时为空
+
+        Raises:
+            CmDamagedError: 块认证失败，附带其在文件中的范围
+        """
+        self._check_closed()
+        end = self._size if size is None or size < 0 else min(self._position + size, self._size)
+        parts = []
+        while self._position < end:
+            index, start = divmod(self._position, self._chunk_size)
+            chunk = self._chunk(index)
+            part = chunk[start:start + end - self._position]
+            parts.append(part)
+            self._position += len(part)
+        return b''.join(parts)
+
+    def readall(self) -> bytes:
+        return self.read()
+
+    def readinto(self, buffer: Any) -> int:
+        view = memoryview(buffer).cast('B')
+        data = self.read(len(view))
+        view[:len(data)] = data
+        return len(data)
+
+    def close(self) -> None:
+        if not self.closed and self._raw is not None:
+            self._raw.close()
+            self._cache.clear()
+        super().close()
+
+    def _check_closed(self) -> None:
+        if self.closed:
+            raise ValueError('I/O operation on closed file')
+
+    def _chunk(self, index: int) -> bytes:
+        """取得一个已解密的块，未缓存时读取并解密，淘汰最久未使用的块"""
+        chunk = self._cache.get(index)
+        if chunk is not None:
+            self._cache.move_to_end(index)
+            return chunk
+        start = self._offset + index * self._encrypted_chunk_size
+        self._raw.seek(start)
+        data = self._raw.read(self._encrypted_chunk_size)
+        final = index == self._chunk_count - 1
+        try:
+            if isinstance(self._context, NonceCipherContext):
+                chunk = self._context.decrypt_chunk(self._nonce, index, data, final)
+            else:
+                chunk = self._context.decrypt(data, self._file.iter_count)
+        except ValueError as e:
+            raise CmDamagedError(f'文件已损坏：第{start}至{start + len(data)}字节', start, start + len(data)) from e
+        chunk = chunk[:self._chunk_size]
+        if final:
+            chunk = chunk[:self._size - index * self._chunk_size]
+        self._cache[index] = chunk
+        if len(self._cache) > self._cache_chunks:
+            self._cache.popitem(last=False)
+        return chunk
+
+
 ProtectCipherFile.CONTENT_TYPE = _PROTECT_CIPHER_FILE_CONTENT_TYPE
@@ -1,6 +1,6 @@
 #  MIT License
 #
-#  Copyright (c) 2022-2025 BlueWhaleMain
+#  Copyright (c) 2022-2026 BlueWhaleMain
 #
 #  Permission is hereby granted, free of charge, to any person obtaining a copy
 #  of this software and associated documentation files (the "Software"), to deal
@@ -20,14 +20,19 @@
 #  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 #  SOFTWARE.
 #
-from typing import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from typing import AnyStr, Iterable, Callable, TypeVar
 
+from cm.base import SecretBuffer
 from cm.error import CmRuntimeError
 from cm.file.base import CipherFile
 
 # 加密表格文件内容类型
 _TABLE_RECORD_CIPER_FILE_CONTENT_TYPE = "application/cm-table-record"
 
+_T = TypeVar('_T')
+_R = TypeVar('_R')
+
 
 class TableRecordCipherFile(CipherFile):
     """
@@ -56,8 +61,7 @@ class TableRecordCipherFile(CipherFile):
 
     def _row_reader(self, row: Iterable[bytes]) -> Iterable[str]:
         """行内读取器"""
-        for col in row:
-            yield self._record_value_decrypt(col)
+        return self._map_batch(self._record_value_decrypt, list(row))
 
     @property
     def sum(self) -> int:
@@ -106,6 +110,7 @@ class TableRecordCipherFile(CipherFile):
 
         行号列号均从0开始
         """
+        self._ensure_data_key()
         rows = len(self.records)
         if rows <= row:
             self.records.extend([[] for _ in range(row - rows + 1)])
@@ -121,20 +126,150 @@ class TableRecordCipherFile(CipherFile):
         Args:
             value: 明文行数据
         """
-        self.records.append([self._record_value_encrypt(col) if col else b'' for col in value])
+        self.records.append(self.encrypt_cells(value))
+
+    def append_rows(self, values: Iterable[list[str]], concurrent_count: int = 1) -> None:
+        """
+        批量追加多行
+
+        Args:
+            values: 明文行数据
+            concurrent_count: 加密线程并发数
+
+        所有单元格在同一批次中加密。
+        """
+        rows = list(values)
+        encrypted = self.encrypt_cells((col for row in rows for col in row), concurrent_count)
+        start = 0
+        for row in rows:
+            self.records.append(encrypted[start:start + len(row)])
+            start += len(row)
+
+    def encrypt_cells(self, values: Iterable[str], concurrent_count: int = 1) -> list[bytes]:
+        """
+        批量加密多个值
+
+        Args:
+            values: 明文值
+            concurrent_count: 加密线程并发数
+
+        Returns:
+            与输入顺序一致的密文，空值对应空字节
+
+        所有值共享同一个加密上下文。
+        """
+        self._ensure_data_key()
+        return self._map_batch(self._record_value_encrypt, list(values), concurrent_count)
+
+    def decrypt_cells(self, coords: Iterable[tuple[int, int]], concurrent_count: int = 1) -> list[str | None]:
+        """
+        批量解密多个单元格
+
+        Args:
+            coords: (行号, 列号) 序列，均从0开始
+            concurrent_count: 解密线程并发数
+
+        Returns:
+            与输入顺序一致的单元格内容，超出范围的单元格为None
+
+        Raises:
+            CmRuntimeError: 解密失败
+
+        所有单元格共享同一个加密上下文。
+        """
+        records = self.records
+        values: list[bytes | None] = []
+        for row, col in coords:
+            if row >= len(records) or col >= len(records[row]):
+                values.append(None)
+            else:
+                values.append(records[row][col])
+        return self._map_batch(self._record_value_decrypt_or_none, values, concurrent_count)
+
+    def use_data_key(self, concurrent_count: int = 1) -> None:
+        """
+        为没有数据密钥的表格生成数据密钥，并以其重新加密全部单元格，已有数据密钥时不做任何事
+
+        Args:
+            concurrent_count: 加解密线程并发数
+
+        Raises:
+            CmRuntimeError: 解密失败
+
+        此后更换密钥只需重新包装数据密钥，不再重新加密单元格。失败时表格保持不变。
+        """
+        if self.wrapped_key is not None:
+            return
+        values = self._map_batch(self._record_value_decrypt, [col for row in self.records for col in row],
+                                 concurrent_count)
+        self._wrap_data_key()
+        try:
+            encrypted = self.encrypt_cells(values, concurrent_count)
+        except BaseException:
+            self.wrapped_key = None
+            self._close_data_context()
+            raise
+        start = 0
+        for row in self.records:
+            row[:] = encrypted[start:start + len(row)]
+            start += len(row)
+
+    def _ensure_data_key(self) -> None:
+        """
+        尚无加密内容的表格在首次加密前生成数据密钥，新建的表格因此从一开始就只需重新包装数据密钥即可更换密钥
+
+        已有内容但没有数据密钥的旧表格保持不变，由 :meth:`use_data_key` 统一重新加密。
+        """
+        if self.wrapped_key is None and not any(col for row in self.records for col in row):
+            self._wrap_data_key()
+
+    def rekey(self, key: AnyStr | SecretBuffer, passphrase: str | None = None, concurrent_count: int = 1) -> None:
+        """
+        更换密钥，只重新包装数据密钥
+
+        Args:
+            key: 新密钥，类型与当前密钥相同，非对称加密须为私钥
+            passphrase: 新密钥的解锁密码（若有）
+            concurrent_count: 旧表格重新加密单元格的线程并发数
+
+        Raises:
+            CmRuntimeError: 解密失败
+            CmValueError: 当前密钥无法解开数据密钥，新密钥无法用于加解密过程，或非对称加密的新密钥不是私钥
+
+        没有数据密钥的旧表格先生成数据密钥并重新加密全部单元格，仅此一次。
+        """
+        self.use_data_key(concurrent_count)
+        super().rekey(key, passphrase)
+
+    def _map_batch(self, func: Callable[[_T], _R], values: list[_T], concurrent_count: int = 1) -> list[_R]:
+        """按顺序对一批值执行操作，可按连续分片分发到线程池"""
+        concurrent_count = min(concurrent_count, len(values))
+        if concurrent_count <= 1:
+            return [func(value) for value in values]
+        # 提前推导加密上下文，避免各线程重复推导
+        _ = self._stream_context
+        step = -(-len(values) // concurrent_count)
+        with ThreadPoolExecutor(max_workers=concurrent_count) as executor:
+            futures = [executor.submit(lambda part: [func(value) for value in part], values[i:i + step])
+                       for i in range(0, len(values), step)]
+            return [result for future in futures for result in future.result()]
+
+    def _record_value_decrypt_or_none(self, value: bytes | None) -> str | None:
+        """解密单个值，保留空值"""
+        return None if value is None else self._record_value_decrypt(value)
 
     def _record_value_encrypt(self, value: str) -> bytes:
         """加密单个值"""
         if not value:
             return b''
-        return self._encrypt(value.encode(self.content_encoding))
+        return self._encrypt(value.encode(self.content_encoding), self._stream_context)
 
     def _record_value_decrypt(self, value: bytes) -> str:
         """解密单个值"""
         if not value:
             return ''
         try:
-            return self._decrypt(value).decode(self.content_encoding)
+            return self._decrypt(value, self._stream_context).decode(self.content_encoding)
         except UnicodeDecodeError as e:
             raise CmRuntimeError(f'解密失败：{e.object}') from e
 
@@ -0,0 +1,308 @@
+#  MIT License
+#
+#  Copyright (c) 2026 BlueWhaleMain
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+#
+"""
+Cipher Manager 并行计算
+
+将整个加密表格文件按行区间拆分，分发到线程池或进程池中解密；
+或将流按块成批分发到进程池中加解密，按原顺序产出；
+或将任意需要已解锁文件的操作成批分发到进程池中。
+"""
+import functools
+import os
+from multiprocessing import util
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, BinaryIO, Callable, Generator, Literal, Sequence, TypeVar
+
+from cm.base import SecretBuffer, erase
+from cm.file.base import CipherFile
+from cm.file.table_record import TableRecordCipherFile
+from cm.progress import CmProgress
+
+# 默认每个任务处理的行数
+DEFAULT_BATCH_ROWS = 64
+# 默认每个任务处理的块数
+DEFAULT_BATCH_CHUNKS = 256
+# 默认每个任务处理的项数
+DEFAULT_BATCH_ITEMS = 64
+
+_T = TypeVar('_T')
+_R = TypeVar('_R')
+
+# 进程池工作进程中已解锁的文件实例
+_worker_file: CipherFile | None = None
+# 工作进程退出时锁定文件的优先级，先于其他清理操作执行
+_WORKER_EXIT_PRIORITY = 100
+
+
+def decrypt_records(cipher_file: TableRecordCipherFile, progress: CmProgress, concurrent_count: int = 0,
+                    batch_rows: int = DEFAULT_BATCH_ROWS,
+                    use_process: bool = True) -> Generator[list[tuple[int, int, str]], None, None]:
+    """
+    并行解密整个表格
+
+    Args:
+        cipher_file: 已解锁的加密表格文件
+        progress: 进度管理器，以行为单位，取消后停止分发并丢弃未开始的任务
+        concurrent_count: 并发数，为0时使用CPU核心数
+        batch_rows: 每个任务处理的行数，同时也是产出批次的粒度
+        use_process: 使用进程池，否则使用线程池（受GIL限制，仅适合低迭代次数）
+
+    Returns:
+        按任务完成顺序产出的批次，每个批次为 (行号, 列号, 内容) 列表，空单元格内容为空字符串
+
+    Raises:
+        CmRuntimeError: 解密失败
+        CmInterrupt: 已取消
+
+    仅在遍历时执行，中途停止遍历也会取消剩余任务。
+    """
+    records = cipher_file.records
+    concurrent_count = concurrent_count or os.cpu_count() or 1
+    progress = progress.start_or_sub(len(records), unit='行')
+    if use_process and concurrent_count > 1:
+        executor: Executor = new_process_pool(cipher_file, concurrent_count)
+        task: Any = _worker_decrypt_rows
+    else:
+        # 提前推导加密上下文，避免各线程重复推导
+        _ = cipher_file._stream_context
+        executor = ThreadPoolExecutor(concurrent_count)
+        task = functools.partial(_decrypt_rows, cipher_file)
+    starts = iter(range(0, len(records), batch_rows))
+    pending: dict[Future, int] = {}
+    try:
+        while True:
+            # 限制在途任务数量，避免一次性复制全部行
+            for start in starts:
+                rows = records[start:start + batch_rows]
+                pending[executor.submit(task, start, rows)] = len(rows)
+                if len(pending) >= concurrent_count * 2:
+                    break
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                row_count = pending.pop(future)
+                yield future.result()
+                progress.step(row_count)
+        progress.complete()
+    except BaseException:
+        progress.cancel()
+        raise
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def crypt_stream(cipher_file: CipherFile, mode: Literal['encrypt', 'decrypt'], stream: BinaryIO, chunk_size: int,
+                 concurrent_count: int = 0, batch_chunks: int = DEFAULT_BATCH_CHUNKS) -> Generator[bytes, None, None]:
+    """
+    在进程池中逐块加解密一个流
+
+    适用于块之间互不依赖、单块计算开销大的加密算法（如RSA），每个工作进程只解锁一次，
+    每个任务处理一批块以摊薄进程间通信的开销。
+
+    Args:
+        cipher_file: 已解锁的加密方式文件
+        mode: 加密或解密
+        stream: 字节流
+        chunk_size: 块大小
+        concurrent_count: 并发数，为0时使用CPU核心数
+        batch_chunks: 每个任务处理的块数
+
+    Returns:
+        按原顺序产出的块
+
+    仅在遍历时执行，中途停止遍历也会取消剩余任务。
+
+    已提交与已完成待产出的批次总数不超过并发数的两倍，先完成的批次在重排缓冲区中等待前面的批次。
+    """
+    concurrent_count = concurrent_count or os.cpu_count() or 1
+    executor = new_process_pool(cipher_file, concurrent_count)
+    pending: dict[Future, int] = {}
+    ready: dict[int, list[bytes]] = {}
+    submitted = 0
+    next_index = 0
+    eof = False
+    try:
+        while True:
+            while not eof and submitted - next_index < concurrent_count * 2:
+                batch = []
+                while len(batch) < batch_chunks and (chunk := stream.read(chunk_size)):
+                    batch.append(chunk)
+                if len(batch) < batch_chunks:
+                    eof = True
+                if batch:
+                    pending[executor.submit(_worker_crypt_chunks, mode, batch)] = submitted
+                    submitted += 1
+            if next_index == submitted:
+                break
+            while next_index not in ready:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    ready[pending.pop(future)] = future.result()
+            yield from ready.pop(next_index)
+            next_index += 1
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def map_items(cipher_file: CipherFile, func: Callable[[CipherFile, _T], _R], items: Sequence[_T],
+              progress: CmProgress, concurrent_count: int = 0,
+              batch_items: int = DEFAULT_BATCH_ITEMS) -> Generator[tuple[int, list[_R]], None, None]:
+    """
+    在进程池中对每一项执行需要已解锁文件的操作
+
+    Args:
+        cipher_file: 已解锁的加密方式文件
+        func: 模块级函数，接收工作进程中已解锁的文件实例与一项
+        items: 可跨进程传递的项
+        progress: 进度管理器，以项为单位，取消后停止分发并丢弃未开始的任务
+        concurrent_count: 并发数，为0时使用CPU核心数
+        batch_items: 每个任务处理的项数
+
+    Returns:
+        按任务完成顺序产出的批次，每个批次为 (起始序号, 结果列表)
+
+    Raises:
+        CmInterrupt: 已取消
+
+    仅在遍历时执行，中途停止遍历也会取消剩余任务。
+    """
+    concurrent_count = concurrent_count or os.cpu_count() or 1
+    progress = progress.start_or_sub(len(items), unit='项')
+    executor = new_process_pool(cipher_file, concurrent_count)
+    starts = iter(range(0, len(items), batch_items))
+    pending: dict[Future, int] = {}
+    try:
+        while True:
+            for start in starts:
+                pending[submit_with_file(executor, _map_items, func, items[start:start + batch_items])] = start
+                if len(pending) >= concurrent_count * 2:
+                    break
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                results = future.result()
+                yield pending.pop(future), results
+                progress.step(len(results))
+        progress.complete()
+    except BaseException:
+        progress.cancel()
+        raise
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def new_process_pool(cipher_file: CipherFile, concurrent_count: int = 0) -> ProcessPoolExecutor:
+    """
+    创建进程池，每个工作进程只解锁一次给定文件的副本
+
+    Args:
+        cipher_file: 已解锁的加密方式文件，表格内容不会传递给工作进程
+        concurrent_count: 并发数，为0时使用CPU核心数
+
+    Returns:
+        进程池，配合 :func:`submit_with_file` 使用
+
+    密钥（口令或RSA私钥的DER编码）经pickle复制到每个工作进程，跨越进程边界后不再受SecretBuffer的内存锁定保护。
+    工作进程解锁后立即擦除收到的副本，退出时锁定文件以擦除推导出的密钥，进程池持有的副本在进程池关闭前一直保留。
+    """
+    return ProcessPoolExecutor(concurrent_count or os.cpu_count() or 1, initializer=_init_worker,
+                               initargs=(type(cipher_file), cipher_file.model_dump(exclude={'records'}),
+                                         _export_key(cipher_file._key)))
+
+
+def submit_with_file(executor: Executor, func: Callable[..., _R], *args: Any) -> Future:
+    """
+    向 :func:`new_process_pool` 创建的进程池提交操作
+
+    Args:
+        executor: 进程池
+        func: 模块级函数，第一个参数为工作进程中已解锁的文件实例
+        args: 其余参数
+
+    Returns:
+        操作结果
+    """
+    return executor.submit(_worker_call, func, *args)
+
+
+def _map_items(cipher_file: CipherFile, func: Callable[[CipherFile, _T], _R], items: Sequence[_T]) -> list[_R]:
+    """对一批项执行操作"""
+    return [func(cipher_file, item) for item in items]
+
+
+def _decrypt_rows(cipher_file: TableRecordCipherFile, start: int,
+                  rows: list[list[bytes]]) -> list[tuple[int, int, str]]:
+    """解密一段连续的行"""
+    decrypt = cipher_file._record_value_decrypt
+    return [(start + row, col, decrypt(value)) for row, values in enumerate(rows) for col, value in enumerate(values)]
+
+
+def _export_key(key: Any) -> bytearray:
+    """导出可跨进程传递的密钥，使用可变缓冲区以便接收方擦除"""
+    if isinstance(key, SecretBuffer):
+        return bytearray(key.view)
+    # RSA密钥
+    return bytearray(key.export_key('DER'))
+
+
+def _init_worker(cls: type[CipherFile], header: dict[str, Any], key: bytearray) -> None:
+    """进程池初始化，每个工作进程只解锁一次，随后擦除收到的密钥"""
+    global _worker_file
+    secret = SecretBuffer(key)
+    erase(key)
+    # 工作进程由multiprocessing正常结束时不执行atexit，只执行带优先级的终结器
+    util.Finalize(None, _lock_worker, exitpriority=_WORKER_EXIT_PRIORITY)
+    try:
+        _worker_file = cls(**header)
+        _worker_file.unlock(secret)
+    finally:
+        secret.erase()
+
+
+def _lock_worker() -> None:
+    """工作进程退出时锁定文件，擦除其持有的密钥与加密上下文"""
+    global _worker_file
+    if _worker_file is not None:
+        _worker_file.lock()
+        _worker_file = None
+
+
+def _worker_decrypt_rows(start: int, rows: list[list[bytes]]) -> list[tuple[int, int, str]]:
+    """在工作进程中解密一段连续的行"""
+    assert isinstance(_worker_file, TableRecordCipherFile), 'worker is not initialized'
+    return _decrypt_rows(_worker_file, start, rows)
+
+
+def _worker_crypt_chunks(mode: Literal['encrypt', 'decrypt'], chunks: list[bytes]) -> list[bytes]:
+    """在工作进程中加解密一批块"""
+    assert _worker_file is not None, 'worker is not initialized'
+    crypt = getattr(_worker_file._stream_context.new(), mode)
+    return [crypt(chunk) for chunk in chunks]
+
+
+def _worker_call(func: Callable[..., _R], *args: Any) -> _R:
+    """在工作进程中以已解锁的文件实例执行操作"""
+    assert _worker_file is not None, 'worker is not initialized'
+    return func(_worker_file, *args)
\ No newline at end of file
@@ -32,7 +32,6 @@ from PyQt6.QtCore import QThread, pyqtSignal, QObject, QProcess
 from PyQt6.QtWidgets import QApplication, QMessageBox
 from psutil import Process
 
-import cm.base
 from cm.error import CmBaseException, CmInterrupt, CmNotImplementedError
 from common.strings import abbreviate
 
@@ -53,9 +52,6 @@ for arg in CMDLINE:
     if arg == SELF_CMD:
         break
 
-# 禁用内存擦除，在Qt中极其不稳定
-cm.base.erase_disabled = True
-
 
 class GlobalSignal(QObject):
     app_try_lock: pyqtSignal = pyqtSignal()
@@ -1,6 +1,6 @@
 #  MIT License
 #
-#  Copyright (c) 2022-2025 BlueWhaleMain
+#  Copyright (c) 2022-2026 BlueWhaleMain
 #
 #  Permission is hereby granted, free of charge, to any person obtaining a copy
 #  of this software and associated documentation files (the "Software"), to deal
@@ -28,14 +28,20 @@ import Crypto.Cipher.DES
 from PyQt6 import QtWidgets, QtCore
 from PyQt6.QtWidgets import QMessageBox
 
+from cm.calibrate import calibrate_iter_count, calibrate_key_hash_iter_count
 from cm.error import CmInterrupt
+from cm.file.backend import get_backend
 from cm.file.base import CipherName, HashName, KeyType
 from cm.file.table_record import TableRecordCipherFile
 from gui.common import ENCODINGS
 from gui.common.env import report_with_exception
+from gui.common.progress import execute_in_progress
 from gui.designer.new_cipher_file_dialog import Ui_NewCipherFileDialog
 
 _translate = QtCore.QCoreApplication.translate
+# 校准结果只与机器性能及影响耗时的选项有关，同一进程内按这些选项复用，切换回已测量过的组合时不再重新测量
+_iter_counts: dict[tuple[CipherName, str], int] = {}
+_key_hash_iter_counts: dict[tuple[HashName, KeyType], int] = {}
 
 
 class NewCipherFileDialog(QtWidgets.QDialog, Ui_NewCipherFileDialog):
@@ -82,6 +88,9 @@ class NewCipherFileDialog(QtWidgets.QDialog, Ui_NewCipherFileDialog):
         self.key_hash_name_combo_box.addItem(HashName.SHA256, HashName.SHA256)
         self.key_hash_name_combo_box.addItem(HashName.SHA512, HashName.SHA512)
         self.key_hash_name_combo_box.addItem(HashName.BLAKE2B, HashName.BLAKE2B)
+        self.key_hash_name_combo_box.addItem(HashName.PBKDF2_HMAC_SHA256, HashName.PBKDF2_HMAC_SHA256)
+        self.key_hash_name_combo_box.addItem(HashName.PBKDF2_HMAC_SHA512, HashName.PBKDF2_HMAC_SHA512)
+        self.key_hash_name_combo_box.addItem(HashName.SCRYPT, HashName.SCRYPT)
         self.key_hash_name_combo_box.setCurrentIndex(3)
 
         self.cipher_grid_layout.addWidget(self.key_hash_name_label, 1, 0, 1, 1)
@@ -134,6 +143,8 @@ class NewCipherFileDialog(QtWidgets.QDialog, Ui_NewCipherFileDialog):
         self.aes_mode_combo_box.setEditable(True)
 
         self.aes_mode_combo_box.addItem('CBC', Crypto.Cipher.AES.MODE_CBC)
+        self.aes_mode_combo_box.addItem('CTR', Crypto.Cipher.AES.MODE_CTR)
+        self.aes_mode_combo_box.addItem('GCM', Crypto.Cipher.AES.MODE_GCM)
         self.aes_mode_combo_box.setCurrentIndex(0)
 
         self.cipher_grid_layout.addWidget(self.aes_mode_label, 4, 0, 1, 1)
@@ -181,6 +192,11 @@ class NewCipherFileDialog(QtWidgets.QDialog, Ui_NewCipherFileDialog):
         self.cipher_grid_layout.addWidget(self.key_type_label, 4, 0, 1, 1)
         self.cipher_grid_layout.addWidget(self.key_type_combo_box, 4, 1, 1, 1)
 
+        self.key_hash_name_combo_box.currentIndexChanged.connect(self._key_hash_name_changed)
+        self.key_type_combo_box.currentIndexChanged.connect(self._key_type_changed)
+        for combo_box in (self.des_mode_combo_box, self.aes_mode_combo_box, self.aes_subtype_combo_box,
+                          self.pkcs1_subtype_combo_box):
+            combo_box.currentIndexChanged.connect(self._cipher_changed)
         self.cipher_type_list_widget.itemSelectionChanged.connect(self._selection_changed)
         self.cipher_type_list_widget.setCurrentRow(1)
         self.current_location_encoding_push_button.clicked.connect(self._current_location_encoding)
@@ -193,6 +209,8 @@ class NewCipherFileDialog(QtWidgets.QDialog, Ui_NewCipherFileDialog):
 
     def create_file(self) -> TableRecordCipherFile:
         """弹出对话框创建文件"""
+        self._calibrate_iter_count()
+        self._calibrate_key_hash_iter_count()
         self.exec()
         if self._ok:
             mode = self.cipher_type_list_widget.currentIndex().row()
@@ -207,13 +225,18 @@ class NewCipherFileDialog(QtWidgets.QDialog, Ui_NewCipherFileDialog):
                                                               iv=os.urandom(8)))
             elif mode == 1:
                 aes_mode = self.aes_mode_combo_box.currentData()
+                if self._is_counter_mode():
+                    # 计数器模式为每个值与流单独生成nonce，不使用固定IV，也不支持迭代
+                    cipher_args = dict(mode=aes_mode)
+                else:
+                    cipher_args = dict(mode=aes_mode, iv=os.urandom(16))
                 return TableRecordCipherFile(content_encoding=self.encoding_combo_box.currentText(),
                                              cipher_name=self.aes_subtype_combo_box.currentData(),
                                              iter_count=self.iter_count_spin_box.value(),
                                              key_hash_name=self.key_hash_name_combo_box.currentData(),
                                              key_hash_iter_count=self.key_hash_iter_count_spin_box.value(),
                                              password_salt_len=self.password_salt_len_spin_box.value(),
-                                             cipher_args=dict(mode=aes_mode, iv=os.urandom(16)))
+                                             cipher_args=cipher_args)
             elif mode == 2:
                 iter_count = self.iter_count_spin_box.value()
                 if iter_count > 1:
@@ -244,7 +267,6 @@ class NewCipherFileDialog(QtWidgets.QDialog, Ui_NewCipherFileDialog):
             self.password_salt_len_spin_box.show()
             self.des_mode_label.show()
             self.des_mode_combo_box.show()
-            self.iter_count_spin_box.setValue(2000)
         elif mode == 1:
             self.password_salt_len_label.show()
             self.password_salt_len_spin_box.show()
@@ -252,15 +274,101 @@ class NewCipherFileDialog(QtWidgets.QDialog, Ui_NewCipherFileDialog):
             self.aes_mode_combo_box.show()
             self.aes_subtype_label.show()
             self.aes_subtype_combo_box.show()
-            self.iter_count_spin_box.setValue(1000)
         elif mode == 2:
             self.pkcs1_subtype_label.show()
             self.pkcs1_subtype_combo_box.show()
             self.key_type_label.show()
             self.key_type_combo_box.show()
-            self.iter_count_spin_box.setValue(1)
         else:
             raise RuntimeError(f'{_translate("NewCipherFileDialog", "状态异常：")}mode = {mode}')
+        if self.isVisible():
+            self._calibrate_iter_count()
+            self._calibrate_key_hash_iter_count()
+
+    def _current_cipher_name(self) -> CipherName | None:
+        mode = self.cipher_type_list_widget.currentIndex().row()
+        if mode == 0:
+            return CipherName.DES3
+        elif mode == 1:
+            return self.aes_subtype_combo_box.currentData()
+        elif mode == 2:
+            return self.pkcs1_subtype_combo_box.currentData()
+        return None
+
+    def _current_key_type(self) -> KeyType:
+        if self.cipher_type_list_widget.currentIndex().row() == 2:
+            return self.key_type_combo_box.currentData()
+        return KeyType.PASSWORD
+
+    def _current_mode_name(self, cipher_name: CipherName) -> str:
+        """当前选择的模式名称，如CBC，非对称加密为空字符串"""
+        mode = self.cipher_type_list_widget.currentIndex().row()
+        if mode == 0:
+            mode_data = self.des_mode_combo_box.currentData()
+        elif mode == 1:
+            mode_data = self.aes_mode_combo_box.currentData()
+        else:
+            return ''
+        return get_backend(cipher_name).mode_name(dict(mode=mode_data))
+
+    def _is_counter_mode(self) -> bool:
+        return (self.cipher_type_list_widget.currentIndex().row() == 1
+                and self.aes_mode_combo_box.currentData() in (Crypto.Cipher.AES.MODE_CTR, Crypto.Cipher.AES.MODE_GCM))
+
+    def _calibrate_iter_count(self):
+        """按当前机器的实际性能设置加密迭代次数，测量在后台线程中进行"""
+        counter_mode = self._is_counter_mode()
+        self.iter_count_spin_box.setEnabled(not counter_mode)
+        if counter_mode:
+            self.iter_count_spin_box.setValue(1)
+            return
+        cipher_name = self._current_cipher_name()
+        if cipher_name is None:
+            return
+        key = (cipher_name, self._current_mode_name(cipher_name))
+        if key not in _iter_counts:
+            try:
+                _iter_counts[key] = execute_in_progress(self, calibrate_iter_count, cipher_name,
+                                                        mode_name=key[1])
+            except CmInterrupt:
+                # 取消校准时保留当前值
+                return
+        self.iter_count_spin_box.setValue(_iter_counts[key])
+
+    def _calibrate_key_hash_iter_count(self):
+        """按当前机器的实际性能设置哈希迭代次数，测量在后台线程中进行"""
+        key_hash_name = self.key_hash_name_combo_box.currentData()
+        if key_hash_name is None:
+            return
+        key = (key_hash_name, self._current_key_type())
+        if key not in _key_hash_iter_counts:
+            try:
+                _key_hash_iter_counts[key] = execute_in_progress(self, calibrate_key_hash_iter_count, *key)
+            except CmInterrupt:
+                # 取消校准时保留当前值
+                return
+        self.key_hash_iter_count_spin_box.setValue(_key_hash_iter_counts[key])
+
+    @report_with_exception
+    def _key_hash_name_changed(self, _):
+        key_hash_name = self.key_hash_name_combo_box.currentData()
+        if key_hash_name is not None and key_hash_name.is_kdf:
+            self.key_hash_iter_count_label.setToolTip(_translate('NewCipherFileDialog',
+                                                                 '密钥派生函数的代价参数，scrypt必须是2的幂'))
+        else:
+            self.key_hash_iter_count_label.setToolTip(_translate('NewCipherFileDialog', '密钥摘要的迭代次数'))
+        if self.isVisible():
+            self._calibrate_key_hash_iter_count()
+
+    @report_with_exception
+    def _key_type_changed(self, _):
+        if self.isVisible():
+            self._calibrate_key_hash_iter_count()
+
+    @report_with_exception
+    def _cipher_changed(self, _):
+        if self.isVisible():
+            self._calibrate_iter_count()
 
     @report_with_exception
     def _current_location_encoding(self, _):
@@ -1,6 +1,6 @@
 #  MIT License
 #
-#  Copyright (c) 2022-2025 BlueWhaleMain
+#  Copyright (c) 2022-2026 BlueWhaleMain
 #
 #  Permission is hereby granted, free of charge, to any person obtaining a copy
 #  of this software and associated documentation files (the "Software"), to deal
@@ -38,10 +38,12 @@ from PyQt6.QtWidgets import QMessageBox, QProgressDialog, QInputDialog, QStyledI
 from PyQt6.sip import isdeleted
 
 from cm import file_load, CmValueError
+from cm.calibrate import calibrate_stream_iter_count
 from cm.error import CmInterrupt, CmNotImplementedError
 from cm.file.base import CipherFile
 from cm.file.protect import ProtectCipherFile
 from cm.file.table_record import TableRecordCipherFile
+from cm.parallel import decrypt_records, DEFAULT_BATCH_ROWS
 from cm.progress import CmProgress
 from gui.common.env import report_with_exception, new_instance
 from gui.common.progress import execute_in_progress, each_in_steps
@@ -370,11 +372,10 @@ class CipherFileTableView(QTableView):
         if not self._suggest_unlock():
             return
         with open(filepath, 'r') as f:
-            for row in csv.reader(f):
-                if row:
-                    self._cipher_file.append_row(row)
-            self._edited = True
-            self._refresh(reload=True)
+            rows = [row for row in csv.reader(f) if row]
+        execute_in_progress(self, self._cipher_file.append_rows, rows, os.cpu_count() or 1)
+        self._edited = True
+        self._refresh(reload=True)
 
     def save_file(self, filepath: str | None = None) -> None:
         """保存文件"""
@@ -475,22 +476,15 @@ class CipherFileTableView(QTableView):
         if not filepath:
             return
         if protect_file.iter_count > 1:
-            filesize = os.path.getsize(filepath)
-            # 假设对称加密1024个字节1000次为流畅
-            simple_encrypt_len = 1024
-            suggest_iter_count = 1 if (protect_file.cipher_name == protect_file.cipher_name.PKCS1_OAEP
-                                       or protect_file.cipher_name == protect_file.cipher_name.PKCS1_V1_5) else 1000
-            # 此处暂时简单评估加密复杂度，以不大于表格流畅迭代次数的复杂度积为准
-            crypt_score = simple_encrypt_len * suggest_iter_count
-            if crypt_score / filesize < 1:
+            # 按当前机器的实际加密速度评估，迭代次数应随着体积增长而下降，最终为1
+            iter_count = calibrate_stream_iter_count(protect_file.cipher_name, os.path.getsize(filepath))
+            if iter_count < protect_file.iter_count:
                 button = QMessageBox.question(self, self.tr('加密迭代次数过大'), self.tr('降低迭代次数？'),
                                               QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No |
                                               QMessageBox.StandardButton.Cancel, QMessageBox.StandardButton.Yes)
                 if button == QMessageBox.StandardButton.Cancel:
                     return
                 if button == QMessageBox.StandardButton.Yes:
-                    # 大文件的迭代次数曲线应随着体积增长而急剧下降，最终为1
-                    iter_count = max(protect_file.iter_count * crypt_score // filesize, 1)
                     protect_file.iter_count, ok = QInputDialog.getInt(self, self.tr('输入合适的值'),
                                                                       self.tr('加密迭代次数'), iter_count)
                     if not ok:
@@ -505,7 +499,7 @@ class CipherFileTableView(QTableView):
         if not self._suggest_unlock():
             return
         cm_progress = CmProgress(title=self.tr('加密文件中'))
-        execute_in_progress(self, protect_file.pack_to, filepath, dist_filepath, cm_progress, 2048,
+        execute_in_progress(self, protect_file.pack_to, filepath, dist_filepath, cm_progress,
                             cm_progress=cm_progress)
         QMessageBox.information(self, self.tr('提示'), f'{self.tr("文件已加密至：")}{dist_filepath}{self.tr("。")}',
                                 QMessageBox.StandardButton.Ok)
@@ -540,7 +534,7 @@ class CipherFileTableView(QTableView):
         if self_decrypt:
             self._suggest_unlock()
         cm_progress = CmProgress(title=self.tr('解密文件中'))
-        execute_in_progress(self, protect_file.unpack_to, dist_filepath, cm_progress, 2048,
+        execute_in_progress(self, protect_file.unpack_to, dist_filepath, cm_progress,
                             cm_progress=cm_progress)
         QMessageBox.information(self, self.tr('提示'), f'{self.tr("文件已解密至：")}{dist_filepath}{self.tr("。")}',
                                 QMessageBox.StandardButton.Ok)
@@ -549,20 +543,32 @@ class CipherFileTableView(QTableView):
         """解密所有单元格"""
         model = self.model()
         assert model is not None, self.tr('意料之外的空值')
-        cols = model.columnCount()
-        rows = model.rowCount()
+        if not self._suggest_unlock():
+            return
+        cipher_file = self._cipher_file
+        cm_progress = CmProgress(title=self.tr('解密中...'))
+        batches = decrypt_records(cipher_file, cm_progress)
         progress = QProgressDialog(self)
         progress.setWindowTitle(self.tr('解密中...'))
-        for row in each_in_steps(progress, range(rows), rows):
-            sub_progress = QProgressDialog(progress)
-            sub_progress.setWindowTitle(self.tr('解密第{}行...').format(row + 1))
-            for col in each_in_steps(sub_progress, range(cols), cols):
-                if not self._try_edit(row, col):
-                    sub_progress.cancel()
-            if sub_progress.wasCanceled():
-                progress.cancel()
-        if not progress.wasCanceled():
-            self.resizeColumnsToContents()
+        try:
+            for batch in each_in_steps(progress, batches, -(-len(cipher_file.records) // DEFAULT_BATCH_ROWS)):
+                for row, col, value in batch:
+                    item = self._get_cell(row, col)
+                    if item.isEditable():
+                        continue
+                    if value:
+                        item.setText(value)
+                    item.setEditable(True)
+        finally:
+            # 停止遍历即取消剩余任务
+            batches.close()
+        if progress.wasCanceled():
+            return
+        # 表格之外的空白单元格无需解密
+        for row in range(model.rowCount()):
+            for col in range(model.columnCount()):
+                self._get_cell(row, col).setEditable(True)
+        self.resizeColumnsToContents()
 
     def reload(self):
         """重新加载"""
@@ -629,27 +635,16 @@ class CipherFileTableView(QTableView):
         model = self.model()
         assert model is not None, self.tr('意料之外的空值')
 
-        cols = model.columnCount()
         row = self.currentIndex().row()
-        progress = QProgressDialog(self)
-        progress.setWindowTitle(self.tr('解密第{}行...').format(row + 1))
-        for col in each_in_steps(progress, range(cols), cols):
-            if not self._try_edit(row, col):
-                progress.cancel()
+        self._decrypt_cells([(row, col) for col in range(model.columnCount())])
 
     @report_with_exception
     def _decrypt_col(self, _):
         model = self.model()
         assert model is not None, self.tr('意料之外的空值')
 
-        rows = model.rowCount()
         col = self.currentIndex().column()
-        progress = QProgressDialog(self)
-        progress.setWindowTitle(self.tr('解密第{}列...').format(col + 1))
-        for row in each_in_steps(progress, range(rows), rows):
-            if not self._try_edit(row, col):
-                progress.cancel()
-        if not progress.wasCanceled():
+        if self._decrypt_cells([(row, col) for row in range(model.rowCount())]):
             self.resizeColumnToContents(col)
 
     @report_with_exception
@@ -830,6 +825,21 @@ class CipherFileTableView(QTableView):
         item.setEditable(True)
         return True
 
+    def _decrypt_cells(self, coords: list[tuple[int, int]]) -> bool:
+        """批量解密尚未解密的单元格，所有单元格一次性提交"""
+        coords = [(row, col) for row, col in coords if not self._get_cell(row, col).isEditable()]
+        if not coords:
+            return True
+        if not self._suggest_unlock():
+            return False
+        values = execute_in_progress(self, self._cipher_file.decrypt_cells, coords, os.cpu_count() or 1)
+        for (row, col), value in zip(coords, values):
+            item = self._get_cell(row, col)
+            if value:
+                item.setText(value)
+            item.setEditable(True)
+        return True
+
     def _suggest_unlock(self) -> bool:
         try:
             if self._cipher_file is None:
@@ -1,4 +1,8 @@
+import multiprocessing
+
 from gui.main import main
 
 if __name__ == '__main__':
+    # 支持打包后的进程池
+    multiprocessing.freeze_support()
     main()
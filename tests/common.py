@@ -0,0 +1,79 @@
+#  MIT License
+#
+#  Copyright (c) 2026 BlueWhaleMain
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+#
+"""测试共用的加密方式、密钥与数据"""
+import functools
+import os
+import pickle
+
+from Crypto.Cipher import AES, DES3
+from Crypto.PublicKey import RSA
+
+from cm import file_load
+from cm.file.base import CipherFile, CipherName, HashName, KeyType
+from cm.file.table_record import TableRecordCipherFile
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+PASSWORD = 'pässword'
+# 各块互相依赖的CBC，以及各块可以独立解密的CTR、GCM与ECB
+MODES = {
+    'CBC': (CipherName.AES256, dict(mode=AES.MODE_CBC, iv=bytes(range(16)))),
+    'CTR': (CipherName.AES128, dict(mode=AES.MODE_CTR)),
+    'GCM': (CipherName.AES256, dict(mode=AES.MODE_GCM)),
+    'ECB': (CipherName.DES3, dict(mode=DES3.MODE_ECB)),
+}
+
+
+def new_table(cipher_name: CipherName, cipher_args: dict, key: str | bytes = PASSWORD,
+              key_hash_name: HashName = HashName.SHA256, **kwargs) -> TableRecordCipherFile:
+    """创建并解锁一个新表格，密钥哈希默认使用较快的参数"""
+    cipher_file = TableRecordCipherFile(content_encoding='UTF-8', cipher_name=cipher_name, cipher_args=cipher_args,
+                                        key_hash_name=key_hash_name, **kwargs)
+    cipher_file.set_key(key)
+    cipher_file.unlock(key)
+    return cipher_file
+
+
+def new_rsa_table(key: bytes) -> TableRecordCipherFile:
+    """创建并解锁一个新的RSA表格"""
+    return new_table(CipherName.PKCS1_OAEP, {}, key, key_type=KeyType.RSA_KEYSTORE)
+
+
+@functools.cache
+def rsa_key(bits: int = 2048, index: int = 0) -> RSA.RsaKey:
+    """生成测试用的RSA密钥，同一参数只生成一次"""
+    return RSA.generate(bits)
+
+
+def load_table(filepath: str) -> CipherFile:
+    """读取加密表格文件"""
+    with open(filepath, 'rb') as f:
+        return file_load(pickle.load(f))
+
+
+def sample_data(size: int) -> bytes:
+    """可压缩的文本与不可压缩的随机数据交替出现的测试数据"""
+    text = b''.join(b'%06d INFO request ok\n' % i for i in range(200))
+    data = bytearray()
+    while len(data) < size:
+        data += text[:4096] + os.urandom(4096)
+    return bytes(data[:size])
\ No newline at end of file
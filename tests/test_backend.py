@@ -0,0 +1,102 @@
+#  MIT License
+#
+#  Copyright (c) 2026 BlueWhaleMain
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+#
+"""加密算法后端的注册信息与不同后端之间的一致性"""
+import importlib.util
+import unittest
+
+from Crypto.Cipher import AES
+from Crypto.Hash import SHA256
+
+from cm.error import CmNotImplementedError
+from cm.file.backend import get_backend, set_preferred_backend
+from cm.file.base import CipherName, KeyType
+from tests.common import MODES, new_table, rsa_key, sample_data
+from tests.test_protect import ProtectTestCase
+
+
+class BackendTest(unittest.TestCase):
+
+    def test_min_key_len(self):
+        for cipher_name, key_len in ((CipherName.DES, 8), (CipherName.DES3, 16), (CipherName.AES128, 16),
+                                     (CipherName.AES192, 24), (CipherName.AES256, 32)):
+            with self.subTest(cipher_name=cipher_name):
+                self.assertEqual(get_backend(cipher_name).min_key_len(cipher_name), key_len)
+        with self.assertRaises(CmNotImplementedError):
+            get_backend(CipherName.DES).min_key_len(CipherName.AES128)
+
+    def test_rsa_limits(self):
+        key = rsa_key().export_key()
+        for cipher_name, cipher_args, max_crypt_len in ((CipherName.PKCS1_OAEP, {}, 256 - 42),
+                                                        (CipherName.PKCS1_OAEP, {'hashAlgo': SHA256}, 256 - 66),
+                                                        (CipherName.PKCS1_V1_5, {}, 256 - 11)):
+            with self.subTest(cipher_name=cipher_name, cipher_args=cipher_args):
+                context = new_table(cipher_name, cipher_args, key, key_type=KeyType.RSA_KEYSTORE)._context
+                self.assertEqual((context.max_crypt_len, context.decrypt_len), (max_crypt_len, 256))
+                self.assertFalse(context.cant_decrypt)
+
+
+@unittest.skipUnless(importlib.util.find_spec('cryptography'), 'cryptography is not installed')
+class CryptographyBackendTest(ProtectTestCase):
+
+    def setUp(self):
+        super().setUp()
+        from cm.file import cryptography_aes
+        self.modules = (AES, cryptography_aes)
+        for cipher_name in (CipherName.AES128, CipherName.AES192, CipherName.AES256):
+            self.addCleanup(set_preferred_backend, cipher_name, None)
+
+    def test_byte_identity(self):
+        data = sample_data(4096 + 16 * 3)
+        for key_len in (16, 24, 32):
+            key = bytes(range(key_len))
+            for mode, args in (('ECB', {}), ('CBC', {'iv': bytes(16)}), ('CTR', {'nonce': bytes(12)})):
+                with self.subTest(key_len=key_len, mode=mode):
+                    results = [module.new(key, getattr(module, f'MODE_{mode}'), **args).encrypt(data)
+                               for module in self.modules]
+                    self.assertEqual(results[0], results[1])
+                    for module in self.modules:
+                        self.assertEqual(module.new(key, getattr(module, f'MODE_{mode}'), **args).decrypt(results[0]),
+                                         data)
+            with self.subTest(key_len=key_len, mode='GCM'):
+                results = []
+                for module in self.modules:
+                    crypt = module.new(key, module.MODE_GCM, nonce=bytes(12), mac_len=12)
+                    crypt.update(b'header')
+                    results.append(crypt.encrypt_and_digest(data))
+                self.assertEqual(results[0], results[1])
+                for module in self.modules:
+                    crypt = module.new(key, module.MODE_GCM, nonce=bytes(12), mac_len=12)
+                    crypt.update(b'header')
+                    self.assertEqual(crypt.decrypt_and_verify(*results[0]), data)
+
+    def test_protect_round_trip(self):
+        data = sample_data(100_000)
+        for mode in ('CBC', 'CTR', 'GCM'):
+            cipher_name, cipher_args = MODES[mode]
+            for pack_backend, unpack_backend in (('cryptography', 'pycryptodome'), ('pycryptodome', 'cryptography')):
+                with self.subTest(mode=mode, pack_backend=pack_backend):
+                    cipher_file = new_table(cipher_name, cipher_args)
+                    set_preferred_backend(cipher_name, pack_backend)
+                    filepath = self.pack(cipher_file, data)
+                    set_preferred_backend(cipher_name, unpack_backend)
+                    self.assertEqual(self.unpack(cipher_file, filepath), data)
\ No newline at end of file
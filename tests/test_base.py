@@ -0,0 +1,97 @@
+#  MIT License
+#
+#  Copyright (c) 2026 BlueWhaleMain
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+#
+"""密钥缓冲区的擦除与内存页锁定计数"""
+import sys
+import unittest
+
+from cm import base
+from cm.base import SecretBuffer, erase, erase_bytes
+
+
+def _locked_kb() -> int | None:
+    """当前进程已锁定的内存大小，仅Linux可以读取"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmLck:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+class SecretBufferTest(unittest.TestCase):
+
+    def test_erase(self):
+        secret = SecretBuffer('密钥 secret')
+        buffer = secret._buffer
+        view = secret.view
+        self.assertEqual(bytes(view), '密钥 secret'.encode('utf-8'))
+        secret.erase()
+        self.assertEqual(buffer, bytearray(len(buffer)))
+        self.assertEqual(bytes(view), bytes(len(buffer)))
+        self.assertFalse(secret._memory_locked)
+        # 可重复擦除
+        secret.erase()
+        with self.assertRaises(TypeError):
+            view[0] = 1
+
+    def test_copy(self):
+        secret = SecretBuffer(b'secret')
+        copy = SecretBuffer(secret)
+        fixed = secret.fixed(8)
+        secret.erase()
+        self.assertEqual(bytes(copy.view), b'secret')
+        self.assertEqual(bytes(fixed.view), b'secret\0\0')
+        erase(copy)
+        self.assertEqual(bytes(copy.view), bytes(6))
+
+    @unittest.skipUnless(sys.implementation.name == 'cpython', 'only CPython bytes can be erased')
+    def test_erase_bytes(self):
+        data = bytes(bytearray(b'digest' * 8))
+        erase_bytes(data)
+        self.assertEqual(data, bytes(48))
+        # 共享的缓存对象不会被改写
+        single = b'x'
+        erase_bytes(single)
+        self.assertEqual(single, b'x')
+
+    def test_shared_page(self):
+        buffer = bytearray(64)
+        first, second = memoryview(buffer)[:32], memoryview(buffer)[32:]
+        if not base._lock_memory(first):
+            self.skipTest('memory locking is not available')
+        page = base._pages(first).start
+        # 同一页可能已被其他缓冲区锁定，只比较锁定次数的变化
+        count = base._locked_pages[page]
+        locked_kb = _locked_kb()
+        self.assertTrue(base._lock_memory(second))
+        self.assertEqual(base._locked_pages[page], count + 1)
+        # 同一页仍被另一个缓冲区锁定，不会被解锁
+        base._unlock_memory(first)
+        self.assertEqual(base._locked_pages[page], count)
+        self.assertEqual(_locked_kb(), locked_kb)
+        base._unlock_memory(second)
+        self.assertEqual(base._locked_pages.get(page, 0), count - 1)
+        if count == 1 and locked_kb is not None:
+            self.assertLess(_locked_kb(), locked_kb)
\ No newline at end of file
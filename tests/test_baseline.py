@@ -0,0 +1,90 @@
+#  MIT License
+#
+#  Copyright (c) 2026 BlueWhaleMain
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+#
+"""读取基线版本写出的加密表格与保护文件，数据由未引入数据密钥与新文件版本前的代码生成"""
+import os
+import shutil
+
+from cm.error import CmRuntimeError
+from tests.common import DATA_DIR, PASSWORD, load_table
+from tests.test_protect import ProtectTestCase
+
+_NAMES = ('aes128', 'des3', 'oaep')
+_DATA = bytes(range(256)) * 19 + b'baseline'
+
+
+def _key(name: str) -> str | bytes:
+    if name != 'oaep':
+        return PASSWORD
+    with open(os.path.join(DATA_DIR, 'baseline_rsa.pem'), 'rb') as f:
+        return f.read()
+
+
+def _rows() -> list[list[str]]:
+    return [[f'cell {row} {col}' for col in range(3)] for row in range(3)]
+
+
+class BaselineTest(ProtectTestCase):
+
+    def _copy(self, name: str, suffix: str) -> str:
+        filepath = self.path(f'baseline_{name}{suffix}')
+        shutil.copyfile(os.path.join(DATA_DIR, f'baseline_{name}{suffix}'), filepath)
+        return filepath
+
+    def _table(self, name: str):
+        cipher_file = load_table(self._copy(name, '.pkl'))
+        self.assertIsNone(cipher_file.wrapped_key)
+        self.assertTrue(cipher_file.validate_key(_key(name)))
+        cipher_file.unlock(_key(name))
+        return cipher_file
+
+    def test_tables(self):
+        for name in _NAMES:
+            with self.subTest(name=name):
+                cipher_file = self._table(name)
+                self.assertEqual([list(row) for row in cipher_file.reader()], _rows())
+
+    def test_protect_files(self):
+        for name in _NAMES:
+            with self.subTest(name=name):
+                cipher_file = self._table(name)
+                filepath = self._copy(name, '.cm-protect')
+                protect_file = self.open_protect(cipher_file, filepath)
+                self.assertIsNone(protect_file.wrapped_key)
+                self.assertEqual(protect_file.decrypt_filename(), 'baseline_raw.bin')
+                self.assertEqual(self.unpack(cipher_file, filepath), _DATA)
+
+    def test_table_rekey_migrates(self):
+        for name in ('aes128', 'des3'):
+            with self.subTest(name=name):
+                cipher_file = self._table(name)
+                cipher_file.rekey('new password')
+                other = type(cipher_file)(**cipher_file.model_dump())
+                self.assertTrue(other.validate_key('new password'))
+                other.unlock('new password')
+                self.assertEqual([list(row) for row in other.reader()], _rows())
+
+    def test_protect_rekey_rejected(self):
+        cipher_file = self._table('aes128')
+        protect_file = self.open_protect(cipher_file, self._copy('aes128', '.cm-protect'))
+        with self.assertRaises(CmRuntimeError):
+            protect_file.rekey_file('new password')
\ No newline at end of file
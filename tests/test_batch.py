@@ -0,0 +1,116 @@
+#  MIT License
+#
+#  Copyright (c) 2026 BlueWhaleMain
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+#
+"""批量加解密：跳过未变化与空文件、结果报告与进程池"""
+import csv
+import os
+import tempfile
+import unittest
+
+from cm.batch import BatchStatus, pack_files, unpack_files
+from cm.file.catalog import ProtectCatalog
+from cm.progress import CmProgress
+from tests.common import MODES, new_table, sample_data
+
+
+class BatchTest(unittest.TestCase):
+
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._dir.cleanup)
+        self.src = os.path.join(self._dir.name, 'src')
+        self.out = os.path.join(self._dir.name, 'out')
+        self.back = os.path.join(self._dir.name, 'back')
+        self.files = {'a.bin': sample_data(100_000), '__init__.py': b'', os.path.join('sub', 'b.txt'): b'hello' * 100}
+        for name, data in self.files.items():
+            self._write(name, data)
+        self.cipher_file = new_table(*MODES['CTR'])
+
+    def _write(self, name: str, data: bytes) -> None:
+        filepath = os.path.join(self.src, name)
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        with open(filepath, 'wb') as f:
+            f.write(data)
+
+    def _statuses(self, results) -> dict[str, BatchStatus]:
+        return {os.path.relpath(result.source, self.src): result.status for result in results}
+
+    def _check_unpacked(self) -> None:
+        for name, data in self.files.items():
+            if data:
+                with open(os.path.join(self.back, name), 'rb') as f:
+                    self.assertEqual(f.read(), data, name)
+
+    def test_pack_unpack(self):
+        report = os.path.join(self._dir.name, 'report.csv')
+        results = pack_files(self.cipher_file, self.src, self.out, CmProgress(), 1, report)
+        self.assertEqual(self._statuses(results), {'a.bin': BatchStatus.DONE, '__init__.py': BatchStatus.SKIPPED,
+                                                   os.path.join('sub', 'b.txt'): BatchStatus.DONE})
+        self.assertEqual([result.error for result in results if result.status == BatchStatus.SKIPPED], ['空文件'])
+        with open(report, encoding='utf-8', newline='') as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(sorted(row['status'] for row in rows), ['DONE', 'DONE', 'SKIPPED'])
+        results = unpack_files(self.cipher_file, self.out, self.back, CmProgress(), 1)
+        self.assertEqual([result.status for result in results], [BatchStatus.DONE] * 2)
+        self._check_unpacked()
+
+    def test_skip_unchanged(self):
+        pack_files(self.cipher_file, self.src, self.out, CmProgress(), 1)
+        results = pack_files(self.cipher_file, self.src, self.out, CmProgress(), 1)
+        self.assertEqual({result.status for result in results}, {BatchStatus.SKIPPED})
+        # 大小或修改时间变化的文件重新加密
+        self.files[os.path.join('sub', 'b.txt')] = b'changed'
+        self._write(os.path.join('sub', 'b.txt'), b'changed')
+        filepath = os.path.join(self.src, 'a.bin')
+        stat = os.stat(filepath)
+        os.utime(filepath, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        results = pack_files(self.cipher_file, self.src, self.out, CmProgress(), 1)
+        self.assertEqual(self._statuses(results), {'a.bin': BatchStatus.DONE, '__init__.py': BatchStatus.SKIPPED,
+                                                   os.path.join('sub', 'b.txt'): BatchStatus.DONE})
+        unpack_files(self.cipher_file, self.out, self.back, CmProgress(), 1)
+        results = unpack_files(self.cipher_file, self.out, self.back, CmProgress(), 1)
+        self.assertEqual({result.status for result in results}, {BatchStatus.SKIPPED})
+        self._check_unpacked()
+
+    def test_update_catalog(self):
+        sub = os.path.join(self.out, 'sub')
+        os.makedirs(sub)
+        ProtectCatalog(sub, self.cipher_file).save()
+        pack_files(self.cipher_file, self.src, self.out, CmProgress(), 1)
+        catalog = ProtectCatalog.load(sub, self.cipher_file)
+        self.assertEqual({name: entry.name for name, entry in catalog.entries.items()}, {'b.txt.cm-protect': 'b.txt'})
+        self.assertFalse(catalog.is_stale())
+        # 没有索引的目录保持不变
+        self.assertEqual(ProtectCatalog.load(self.out, self.cipher_file).entries, {})
+
+    def test_process_pool(self):
+        results = pack_files(self.cipher_file, self.src, self.out, CmProgress(), 2)
+        self.assertNotIn(BatchStatus.FAILED, {result.status for result in results})
+        results = unpack_files(self.cipher_file, self.out, self.back, CmProgress(), 2)
+        self.assertEqual({result.status for result in results}, {BatchStatus.DONE})
+        self._check_unpacked()
+
+    def test_wrong_key(self):
+        pack_files(self.cipher_file, self.src, self.out, CmProgress(), 1)
+        other = new_table(*MODES['CTR'], key='wrong password')
+        results = unpack_files(other, self.out, self.back, CmProgress(), 1)
+        self.assertEqual({result.status for result in results}, {BatchStatus.FAILED})
\ No newline at end of file
@@ -0,0 +1,107 @@
+#  MIT License
+#
+#  Copyright (c) 2026 BlueWhaleMain
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+#
+"""目录索引的读写、增量重建与查找"""
+import os
+import tempfile
+import unittest
+
+from cm.error import CmRuntimeError, CmValueError
+from cm.file.catalog import CATALOG_FILENAME, ProtectCatalog
+from cm.file.protect import ProtectCipherFile
+from cm.progress import CmProgress
+from tests.common import MODES, new_table, sample_data
+
+
+class CatalogTest(unittest.TestCase):
+
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._dir.cleanup)
+        self.directory = self._dir.name
+        self.cipher_file = new_table(*MODES['CBC'])
+        for name in ('alpha.txt', 'beta.txt', 'alphabet.bin'):
+            self.pack(self.cipher_file, name, sample_data(1000))
+
+    def pack(self, cipher_file, name: str, data: bytes) -> str:
+        raw_filepath = os.path.join(self.directory, 'raw', name)
+        os.makedirs(os.path.dirname(raw_filepath), exist_ok=True)
+        with open(raw_filepath, 'wb') as f:
+            f.write(data)
+        dist_filepath = os.path.join(self.directory, name + '.cm-protect')
+        ProtectCipherFile.from_cipher_file(cipher_file).pack_to(raw_filepath, dist_filepath, CmProgress())
+        return dist_filepath
+
+    def names(self, catalog: ProtectCatalog) -> dict[str, str | None]:
+        return {name: entry.name for name, entry in catalog.entries.items()}
+
+    def test_refresh_save_load(self):
+        catalog = ProtectCatalog.load(self.directory, self.cipher_file)
+        self.assertEqual(catalog.entries, {})
+        self.assertTrue(catalog.refresh(CmProgress()))
+        self.assertTrue(os.path.exists(os.path.join(self.directory, CATALOG_FILENAME)))
+        self.assertEqual(self.names(catalog), {'alpha.txt.cm-protect': 'alpha.txt', 'beta.txt.cm-protect': 'beta.txt',
+                                               'alphabet.bin.cm-protect': 'alphabet.bin'})
+        self.assertEqual(catalog.entries['beta.txt.cm-protect'].total_size, 1000)
+        loaded = ProtectCatalog.load(self.directory, self.cipher_file)
+        self.assertEqual(loaded.entries, catalog.entries)
+        self.assertFalse(loaded.is_stale())
+        self.assertFalse(loaded.refresh(CmProgress()))
+
+    def test_refresh_changes(self):
+        catalog = ProtectCatalog(self.directory, self.cipher_file)
+        catalog.refresh(CmProgress())
+        os.remove(os.path.join(self.directory, 'beta.txt.cm-protect'))
+        self.pack(self.cipher_file, 'alpha.txt', sample_data(2000))
+        other = new_table(*MODES['CBC'], key='wrong password')
+        self.pack(other, 'other.txt', b'other')
+        self.assertEqual(catalog.stale_files(), (['alpha.txt.cm-protect', 'other.txt.cm-protect'],
+                                                 ['beta.txt.cm-protect']))
+        self.assertTrue(catalog.refresh(CmProgress()))
+        self.assertEqual(self.names(catalog), {'alpha.txt.cm-protect': 'alpha.txt', 'other.txt.cm-protect': None,
+                                               'alphabet.bin.cm-protect': 'alphabet.bin'})
+        self.assertEqual(catalog.entries['alpha.txt.cm-protect'].total_size, 2000)
+
+    def test_add_packed(self):
+        # 没有索引的目录不会创建索引
+        self.pack(self.cipher_file, 'gamma.txt', b'gamma')
+        self.assertFalse(os.path.exists(os.path.join(self.directory, CATALOG_FILENAME)))
+        ProtectCatalog(self.directory, self.cipher_file).refresh(CmProgress())
+        self.pack(self.cipher_file, 'delta.txt', b'delta')
+        catalog = ProtectCatalog.load(self.directory, self.cipher_file)
+        self.assertEqual(catalog.entries['delta.txt.cm-protect'].name, 'delta.txt')
+        self.assertFalse(catalog.is_stale())
+
+    def test_find(self):
+        catalog = ProtectCatalog(self.directory, self.cipher_file)
+        catalog.refresh(CmProgress())
+        self.assertEqual([name for name, _ in catalog.find('alpha')],
+                         ['alpha.txt.cm-protect', 'alphabet.bin.cm-protect'])
+        self.assertEqual([name for name, _ in catalog.find(substring='.txt')],
+                         ['alpha.txt.cm-protect', 'beta.txt.cm-protect'])
+        self.assertEqual([name for name, _ in catalog.find('alpha', 'bet')], ['alphabet.bin.cm-protect'])
+        self.assertEqual(catalog.find('gamma'), [])
+
+    def test_wrong_key(self):
+        ProtectCatalog(self.directory, self.cipher_file).refresh(CmProgress())
+        with self.assertRaises((CmValueError, CmRuntimeError)):
+            ProtectCatalog.load(self.directory, new_table(*MODES['CBC'], key='wrong password'))
\ No newline at end of file
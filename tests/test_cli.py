@@ -0,0 +1,133 @@
+#  MIT License
+#
+#  Copyright (c) 2026 BlueWhaleMain
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+#
+"""命令行：批量加解密、校验与更换密钥的退出码"""
+import contextlib
+import io
+import os
+import pickle
+import tempfile
+import unittest
+from unittest import mock
+
+from cm.__main__ import main
+from tests.common import MODES, PASSWORD, new_table, sample_data
+
+_ENV = {'CM_TEST_PASSWORD': PASSWORD, 'CM_TEST_NEW_PASSWORD': 'new password', 'CM_TEST_WRONG_PASSWORD': 'wrong'}
+
+
+class CliTest(unittest.TestCase):
+
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._dir.cleanup)
+        patcher = mock.patch.dict(os.environ, _ENV)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.table = self.path('table.pkl')
+        with open(self.table, 'wb') as f:
+            pickle.dump(new_table(*MODES['CTR']).model_dump(), f)
+        self.files = {'a.bin': sample_data(50_000), 'b.txt': b'hello'}
+        os.makedirs(self.path('src'))
+        for name, data in self.files.items():
+            with open(self.path('src', name), 'wb') as f:
+                f.write(data)
+
+    def path(self, *names: str) -> str:
+        return os.path.join(self._dir.name, *names)
+
+    def run_cli(self, *argv: str) -> tuple[int, str, str]:
+        """执行命令，返回退出码与标准输出、标准错误"""
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            code = main(list(argv))
+        return code, stdout.getvalue(), stderr.getvalue()
+
+    def pack(self, password_env: str = 'CM_TEST_PASSWORD') -> int:
+        return self.run_cli('pack', self.table, self.path('src'), '-o', self.path('out'), '-j', '1',
+                            '--password-env', password_env)[0]
+
+    def assert_unpacked(self, password_env: str) -> None:
+        code, _, _ = self.run_cli('unpack', self.path('out'), '-o', self.path('back'), '-j', '1',
+                                  '--password-env', password_env)
+        self.assertEqual(code, 0)
+        for name, data in self.files.items():
+            with open(self.path('back', name), 'rb') as f:
+                self.assertEqual(f.read(), data)
+
+    def test_pack_unpack_verify(self):
+        self.assertEqual(self.pack(), 0)
+        self.assert_unpacked('CM_TEST_PASSWORD')
+        code, out, _ = self.run_cli('verify', self.path('out'), '--password-env', 'CM_TEST_PASSWORD')
+        self.assertEqual(code, 0)
+        self.assertEqual(out.count('OK '), 2)
+
+    def test_wrong_password(self):
+        self.assertEqual(self.pack('CM_TEST_WRONG_PASSWORD'), 1)
+        self.assertFalse(os.path.exists(self.path('out')))
+        self.assertEqual(self.pack('CM_TEST_MISSING'), 1)
+        self.assertEqual(self.pack(), 0)
+        for argv in (('unpack', self.path('out'), '-o', self.path('back')), ('verify', self.path('out'))):
+            with self.subTest(command=argv[0]):
+                code, _, err = self.run_cli(*argv, '--password-env', 'CM_TEST_WRONG_PASSWORD')
+                self.assertEqual(code, 1)
+                self.assertIn('密码不正确', err)
+
+    def test_verify_damaged(self):
+        self.assertEqual(self.pack(), 0)
+        filepath = self.path('out', 'a.bin.cm-protect')
+        with open(filepath, 'r+b') as f:
+            f.seek(-100, os.SEEK_END)
+            data = f.read(1)
+            f.seek(-100, os.SEEK_END)
+            f.write(bytes([data[0] ^ 1]))
+        code, out, _ = self.run_cli('verify', self.path('out'), '--password-env', 'CM_TEST_PASSWORD')
+        self.assertEqual(code, 1)
+        self.assertIn(f'FAILED {filepath}', out)
+        self.assertIn('OK ', out)
+
+    def test_rekey(self):
+        self.assertEqual(self.pack(), 0)
+        code, out, _ = self.run_cli('rekey', self.path('out'), '--password-env', 'CM_TEST_PASSWORD',
+                                    '--new-password-env', 'CM_TEST_NEW_PASSWORD')
+        self.assertEqual(code, 0)
+        self.assertEqual(out.count('OK '), 2)
+        code, _, _ = self.run_cli('verify', self.path('out'), '--password-env', 'CM_TEST_PASSWORD')
+        self.assertEqual(code, 1)
+        self.assert_unpacked('CM_TEST_NEW_PASSWORD')
+        # 旧密码无法再更换密钥
+        code, _, _ = self.run_cli('rekey', self.path('out'), '--password-env', 'CM_TEST_PASSWORD',
+                                  '--new-password-env', 'CM_TEST_PASSWORD')
+        self.assertEqual(code, 1)
+
+    def test_table(self):
+        csv_path = self.path('rows.csv')
+        with open(csv_path, 'w', encoding='utf-8', newline='') as f:
+            f.write('a,b\r\n文本,\r\n')
+        self.assertEqual(self.run_cli('import', self.table, csv_path, '--password-env', 'CM_TEST_PASSWORD')[0], 0)
+        code, _, _ = self.run_cli('rekey-table', self.table, '--password-env', 'CM_TEST_PASSWORD',
+                                  '--new-password-env', 'CM_TEST_NEW_PASSWORD')
+        self.assertEqual(code, 0)
+        self.assertEqual(self.run_cli('cat-table', self.table, '--password-env', 'CM_TEST_PASSWORD')[0], 1)
+        code, out, _ = self.run_cli('cat-table', self.table, '--password-env', 'CM_TEST_NEW_PASSWORD')
+        self.assertEqual(code, 0)
+        self.assertEqual(out.splitlines(), ['a,b', '文本,'])
\ No newline at end of file
@@ -0,0 +1,111 @@
+#  MIT License
+#
+#  Copyright (c) 2026 BlueWhaleMain
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+#
+"""加密前压缩的往返、原样存储与损坏检测"""
+import io
+import os
+import unittest
+
+from cm.error import CmNotImplementedError, CmRuntimeError
+from cm.file.compress import FRAME_SIZE, CompressReader, decode_frames, get_codec, list_codecs
+from tests.common import MODES, new_rsa_table, new_table, rsa_key, sample_data
+from tests.test_protect import ProtectTestCase
+
+_CODECS = [codec for codec in list_codecs() if codec.available]
+
+
+class CodecTest(unittest.TestCase):
+
+    def test_frames(self):
+        data = sample_data(FRAME_SIZE * 2 + 123)
+        for codec in _CODECS:
+            with self.subTest(codec=codec.name):
+                with CompressReader(io.BytesIO(data), codec, 2) as reader:
+                    encoded = reader.read()
+                self.assertLess(len(encoded), len(data))
+                chunks = [encoded[i:i + 1000] for i in range(0, len(encoded), 1000)]
+                self.assertEqual(b''.join(decode_frames(codec, chunks, len(data))), data)
+
+    def test_incompressible_stored_raw(self):
+        data = os.urandom(100_000)
+        for codec in _CODECS:
+            with self.subTest(codec=codec.name):
+                with CompressReader(io.BytesIO(data), codec) as reader:
+                    encoded = reader.read()
+                self.assertEqual(encoded[-len(data):], data)
+                self.assertEqual(b''.join(decode_frames(codec, [encoded], len(data))), data)
+
+    def test_truncated(self):
+        codec = get_codec('zlib')
+        data = sample_data(50_000)
+        with CompressReader(io.BytesIO(data), codec) as reader:
+            encoded = reader.read()
+        with self.assertRaises(CmRuntimeError):
+            b''.join(decode_frames(codec, [encoded[:-10]], len(data)))
+
+    def test_unknown(self):
+        with self.assertRaises(CmNotImplementedError):
+            get_codec('unknown')
+
+
+class CompressedProtectTest(ProtectTestCase):
+
+    def test_modes(self):
+        data = sample_data(200_000)
+        for mode, (cipher_name, cipher_args) in MODES.items():
+            cipher_file = new_table(cipher_name, cipher_args)
+            for codec in _CODECS:
+                with self.subTest(mode=mode, codec=codec.name):
+                    filepath = self.pack(cipher_file, data, compression=codec.name)
+                    protect_file = self.open_protect(cipher_file, filepath)
+                    self.assertEqual(protect_file.compression, codec.name)
+                    self.assertEqual(protect_file.version, 3)
+                    self.assertLess(os.path.getsize(filepath), len(data))
+                    self.assertEqual(self.unpack(cipher_file, filepath), data)
+
+    def test_rsa(self):
+        data = sample_data(100_000)
+        cipher_file = new_rsa_table(rsa_key().export_key())
+        filepath = self.pack(cipher_file, data, compression='zlib')
+        self.assertEqual(self.unpack(cipher_file, filepath), data)
+
+    def test_unaligned_chunk_size(self):
+        data = sample_data(50_000)
+        cipher_file = new_table(*MODES['CBC'])
+        self.assertEqual(self.unpack(cipher_file, self.pack(cipher_file, data, 1000, 'zlib')), data)
+
+    def test_reader_rejected(self):
+        cipher_file = new_table(*MODES['CTR'])
+        protect_file = self.open_protect(cipher_file, self.pack(cipher_file, sample_data(10_000), compression='zlib'))
+        with self.assertRaises(CmRuntimeError):
+            protect_file.open()
+
+    def test_tampered(self):
+        cipher_file = new_table(*MODES['CTR'])
+        filepath = self.pack(cipher_file, sample_data(100_000), compression='zlib')
+        with open(filepath, 'r+b') as f:
+            f.seek(-100, io.SEEK_END)
+            byte = f.read(1)
+            f.seek(-1, io.SEEK_CUR)
+            f.write(bytes([byte[0] ^ 1]))
+        with self.assertRaises(CmRuntimeError):
+            self.unpack(cipher_file, filepath)
\ No newline at end of file
@@ -0,0 +1,103 @@
+#  MIT License
+#
+#  Copyright (c) 2026 BlueWhaleMain
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+#
+"""文件头的编码与保护文件文件头的读取"""
+import io
+import struct
+import unittest
+
+from cm.error import CmDamagedError, CmRuntimeError
+from cm.file import header
+from cm.file.base import CipherName
+from cm.file.protect import ProtectCipherFile
+
+_CONTENT_TYPE = 'application/cm-protect'
+
+
+def _binary_header(data: bytes, length: int | None = None, version: int = 1) -> bytes:
+    """拼接二进制文件头：幻数、标记、版本、长度与内容"""
+    return struct.pack('<2s1sBI', b'CM', b'\x00', version, len(data) if length is None else length) + data
+
+
+class HeaderCodecTest(unittest.TestCase):
+
+    def test_round_trip(self):
+        value = {'salt': b'\x00\xffsalt', 'nested': [{'iv': bytes(16)}], 'name': CipherName.AES256, 'size': 3,
+                 'pair': (1, 2), 'none': None, 'text': '文本'}
+        data = header.dumps(value)
+        self.assertIn(b'{"$bytes":"AP9zYWx0"}', data)
+        self.assertIn('文本'.encode('utf-8'), data)
+        loaded = header.loads(data + b'   ')
+        self.assertEqual(loaded, {**value, 'name': 'AES-256', 'pair': [1, 2]})
+        self.assertIsInstance(loaded['salt'], bytes)
+
+    def test_unsupported_type(self):
+        with self.assertRaises(TypeError):
+            header.dumps({'value': object()})
+
+    def test_bad_data(self):
+        for data in (b'{"salt":', b'\xff\xfe', b'{"$bytes":"***"}', b'{"$bytes":1}', b'[' * 100_000):
+            with self.subTest(data=data[:16]):
+                with self.assertRaises(CmRuntimeError):
+                    header.loads(data)
+
+
+class ReadHeaderTest(unittest.TestCase):
+
+    def read(self, data: bytes) -> tuple[dict, int]:
+        return ProtectCipherFile._read_header(io.BytesIO(data))
+
+    def test_binary(self):
+        data = header.dumps({'content_type': _CONTENT_TYPE, 'filename': b'name'}).ljust(5000, b' ')
+        fields, offset = self.read(_binary_header(data) + b'body')
+        self.assertEqual(fields, {'content_type': _CONTENT_TYPE, 'filename': b'name'})
+        self.assertEqual(offset, 8 + len(data))
+
+    def test_truncated(self):
+        data = _binary_header(header.dumps({'content_type': _CONTENT_TYPE}))
+        for size in (2, 5, len(data) - 1):
+            with self.subTest(size=size):
+                with self.assertRaises(CmRuntimeError):
+                    self.read(data[:size])
+
+    def test_oversized_length(self):
+        with self.assertRaises(CmDamagedError) as context:
+            self.read(_binary_header(b'{}', 0xFFFFFFFF))
+        self.assertEqual((context.exception.start, context.exception.end), (0, 8))
+        # 旧的base64文件头同样限制长度
+        stream = io.BytesIO(b'CM' + b'A' * (2 * 1024 * 1024))
+        with self.assertRaises(CmDamagedError):
+            ProtectCipherFile._read_header(stream)
+        self.assertLess(stream.tell(), 2 * 1024 * 1024)
+
+    def test_bad_json(self):
+        with self.assertRaises(CmRuntimeError):
+            self.read(_binary_header(b'{"content_type":'))
+
+    def test_bad_fields(self):
+        for data in (_binary_header(header.dumps({'content_type': 'text/plain'})),
+                     _binary_header(header.dumps([_CONTENT_TYPE])),
+                     _binary_header(header.dumps({'content_type': _CONTENT_TYPE}), version=2),
+                     b'XX' + _binary_header(b'{}')[2:]):
+            with self.subTest(data=data[:12]):
+                with self.assertRaises(CmRuntimeError):
+                    self.read(data)
\ No newline at end of file
@@ -0,0 +1,102 @@
+#  MIT License
+#
+#  Copyright (c) 2026 BlueWhaleMain
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+#
+"""密钥哈希与密钥派生：各算法的校验与解锁，原有算法与基线版本的结果一致"""
+import unittest
+
+from cm.error import CmValueError
+from cm.file.base import HashName
+from tests.common import MODES, PASSWORD, new_table
+
+_SALT = bytes(range(16))
+_CELL = b'cell value'
+# 基线版本以相同的盐值、IV与口令计算的密钥哈希，键为 (算法, 迭代次数)
+_BASELINE_KEY_HASHES = {
+    (HashName.SHA1, 1): 'a76b5bcb400df21bf97b00607b66fb101988a534',
+    (HashName.SHA1, 3): '4b6eac25ef2e98760ed01a1989e48d556f444655',
+    (HashName.SHA256, 1): 'b9a15c003e0a45b46b1916b131847aca599ab3da6325f0d7eb75e92f36411ac7',
+    (HashName.SHA256, 3): '96e95fcc456f4f1d56a4b360b67d0f2fe0456294f4a163c68beb8d10dd00e15a',
+    (HashName.SHA512, 1): 'a6ecc1c9c0ca33b077eac48403ac35a43034ed0f652e8e0be300f544982561604109efb543d62a69fb5892680611'
+                          '2c7571abf3fabd46fa2bb5c63d6fe8f80d51',
+    (HashName.SHA512, 3): '73d87ea190e9a0c915f7f6d6674323bb76e88c6f31186bcc1848a11360cb96f339ba938464c1eea23848a5a1f033'
+                          'c9564551b50fd1a80bd47493b0cad92b1e9c',
+    (HashName.BLAKE2B, 1): '65ee61c5695d557f772da8fc540ee0d0246d73428ebcf407aeb7bc2ea6bc1ffbaef7390ef7df1427969c0d79'
+                           '35c4eee7a95e1c030956acf379427369c65f778e',
+    (HashName.BLAKE2B, 3): '46164879f2e3380fe77eefd27896bce0db72343ec8b2f0f81016de2557af300b742138c5e4af7d8471f855'
+                           '0d2e88e3ad6189a5100e698b265836d1c510187f4e',
+}
+# 基线版本直接以填充后的口令加密单元格，与密钥哈希算法无关
+_BASELINE_CELL = '3899ff087ed0a59225476aff62ea970c'
+# 密钥派生函数的 (代价参数, 密钥哈希, 单元格密文)，口令经其拉伸为加密密钥
+_KDF_RESULTS = {
+    HashName.PBKDF2_HMAC_SHA256: (1000, 'be4a0606c3650c1cf79e1c3beda7fee66bd7e58ee961c51e53f3a932b7f434e1',
+                                  '2f13ee12f07a7089939f31d313d3af23'),
+    HashName.PBKDF2_HMAC_SHA512: (1000, '03ba4726b44eaf5cf857495ef79135507ab65ab3bdeec11732b27988c4e4f9ef',
+                                  'b8b23b5784125534e4d6cd86b2fe081c'),
+    HashName.SCRYPT: (1024, '20cc9b4b0f9c5d62e7ff3348c17579a972681e803a5fb62f1224af853b8fd366',
+                      '1b36617668c3128c160729f98d6467fd'),
+}
+
+
+def _new_file(key_hash_name: HashName, key_hash_iter_count: int, mode: str = 'CBC'):
+    return new_table(*MODES[mode], key_hash_name=key_hash_name, key_hash_iter_count=key_hash_iter_count,
+                     password_salt=_SALT)
+
+
+class KeyHashTest(unittest.TestCase):
+
+    def test_baseline(self):
+        for (key_hash_name, iter_count), key_hash in _BASELINE_KEY_HASHES.items():
+            with self.subTest(key_hash_name=key_hash_name, iter_count=iter_count):
+                cipher_file = _new_file(key_hash_name, iter_count)
+                self.assertEqual(cipher_file.key_hash.hex(), key_hash)
+                self.assertEqual(cipher_file._encrypt(_CELL).hex(), _BASELINE_CELL)
+
+    def test_kdf(self):
+        for key_hash_name, (iter_count, key_hash, cell) in _KDF_RESULTS.items():
+            with self.subTest(key_hash_name=key_hash_name):
+                cipher_file = _new_file(key_hash_name, iter_count)
+                self.assertEqual(cipher_file.key_hash.hex(), key_hash)
+                self.assertEqual(cipher_file._encrypt(_CELL).hex(), cell)
+                self.assertEqual(cipher_file._decrypt(bytes.fromhex(cell)), _CELL)
+
+    def test_validate_and_unlock(self):
+        for key_hash_name in HashName:
+            for mode in MODES:
+                iter_count = _KDF_RESULTS[key_hash_name][0] if key_hash_name.is_kdf else 3
+                with self.subTest(key_hash_name=key_hash_name, mode=mode):
+                    cipher_file = new_table(*MODES[mode], key_hash_name=key_hash_name,
+                                            key_hash_iter_count=iter_count)
+                    cipher_file.append_row(['a', '', '文本'])
+                    self.assertTrue(cipher_file.validate_key(PASSWORD))
+                    self.assertFalse(cipher_file.validate_key('wrong password'))
+                    other = type(cipher_file)(**cipher_file.model_dump())
+                    self.assertTrue(other.validate_key(PASSWORD))
+                    other.unlock(PASSWORD)
+                    self.assertEqual(list(map(list, other.reader())), [['a', '', '文本']])
+
+    def test_scrypt_cost(self):
+        cipher_file = _new_file(HashName.SCRYPT, 1024)
+        other = type(cipher_file)(**cipher_file.model_dump())
+        other.key_hash_iter_count = 1000
+        with self.assertRaises(CmValueError):
+            other.validate_key(PASSWORD)
\ No newline at end of file
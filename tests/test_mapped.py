@@ -0,0 +1,96 @@
+#  MIT License
+#
+#  Copyright (c) 2026 BlueWhaleMain
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+#
+"""内存映射的读写：按位置写入、写入位置与关闭时截断"""
+import io
+import os
+import tempfile
+import unittest
+
+from cm.file.mapped import MappedReader, MappedWriter, open_reader, open_writer
+
+
+class MappedTest(unittest.TestCase):
+
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._dir.cleanup)
+        self.filepath = os.path.join(self._dir.name, 'mapped.bin')
+
+    def read(self) -> bytes:
+        with open(self.filepath, 'rb') as f:
+            return f.read()
+
+    def test_write_truncate(self):
+        with open_writer(self.filepath, 100) as writer:
+            self.assertIsInstance(writer, MappedWriter)
+            self.assertEqual(os.path.getsize(self.filepath), 100)
+            writer.write(b'header')
+            writer.write(b'-body')
+            self.assertEqual(writer.tell(), 11)
+            writer.write_at(0, b'HEAD')
+            self.assertEqual(writer.tell(), 11)
+            self.assertEqual(bytes(writer.read_at(0, 6)), b'HEADer')
+        self.assertEqual(self.read(), b'HEADer-body')
+
+    def test_write_at_seek(self):
+        with open_writer(self.filepath, 64) as writer:
+            # 乱序写入各块，写入位置只在确认后移动
+            writer.write_at(8, memoryview(b'bbbbbbbb'))
+            writer.write_at(0, b'aaaaaaaa')
+            writer.write_at(16, b'cccc')
+            self.assertEqual(writer.tell(), 0)
+            self.assertEqual(writer.seek(20), 20)
+            with self.assertRaises(ValueError):
+                writer.write_at(60, b'overflow')
+            with self.assertRaises(ValueError):
+                writer.seek(65)
+        self.assertEqual(self.read(), b'a' * 8 + b'b' * 8 + b'cccc')
+
+    def test_overflow(self):
+        with open_writer(self.filepath, 4) as writer:
+            writer.write(b'abc')
+            with self.assertRaises(ValueError):
+                writer.write(b'de')
+        self.assertEqual(self.read(), b'abc')
+
+    def test_unmapped(self):
+        # 大小为0时无法映射，退回普通文件
+        with open_writer(self.filepath, 0) as writer:
+            self.assertNotIsInstance(writer, MappedWriter)
+            writer.write(b'plain')
+        self.assertEqual(self.read(), b'plain')
+
+    def test_reader(self):
+        with open(self.filepath, 'wb') as f:
+            f.write(bytes(range(100)))
+        with open(self.filepath, 'rb') as f:
+            f.seek(10)
+            with open_reader(f) as reader:
+                self.assertIsInstance(reader, MappedReader)
+                buffer = bytearray(20)
+                self.assertEqual(reader.readinto(memoryview(buffer)), 20)
+                self.assertEqual(bytes(buffer), bytes(range(10, 30)))
+                self.assertEqual(reader.read(5), bytes(range(30, 35)))
+            self.assertEqual(f.tell(), 35)
+        stream = io.BytesIO(b'stream')
+        self.assertIs(open_reader(stream), stream)
\ No newline at end of file
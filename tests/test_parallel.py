@@ -0,0 +1,122 @@
+#  MIT License
+#
+#  Copyright (c) 2026 BlueWhaleMain
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+#
+"""并行解密、流加解密与批量操作与串行结果一致"""
+import io
+import itertools
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import util
+from unittest import mock
+
+from cm import parallel
+from cm.file.base import CipherFile
+from cm.file.table_record import TableRecordCipherFile
+from cm.progress import CmProgress
+from tests.common import MODES, PASSWORD, new_table, sample_data
+
+
+def _decrypt_value(cipher_file: TableRecordCipherFile, value: bytes) -> str:
+    """在工作进程中解密一个单元格，工作进程中的文件不含表格内容"""
+    return cipher_file._record_value_decrypt(value)
+
+
+class _ReverseExecutor(ThreadPoolExecutor):
+    """每轮在途任务中先提交的最后完成，记录完成顺序"""
+
+    def __init__(self, round_size: int):
+        super().__init__(round_size)
+        self._round_size = round_size
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self.completed: list[int] = []
+
+    def submit(self, fn, /, *args, **kwargs):
+        index = next(self._counter)
+        delay = 0.01 * (self._round_size - index % self._round_size)
+
+        def task():
+            time.sleep(delay)
+            result = fn(*args, **kwargs)
+            with self._lock:
+                self.completed.append(index)
+            return result
+
+        return super().submit(task)
+
+
+class ParallelTest(unittest.TestCase):
+
+    def setUp(self):
+        self.table = new_table(*MODES['CTR'])
+        self.table.append_rows([[f'{row}-{col}' * (row % 7) for col in range(3)] for row in range(200)])
+
+    def test_decrypt_records(self):
+        expected = [(row, col, value) for row, values in enumerate(self.table.reader())
+                    for col, value in enumerate(values)]
+        for use_process in (False, True):
+            with self.subTest(use_process=use_process):
+                cells = [cell for batch in parallel.decrypt_records(self.table, CmProgress(), 2, 16, use_process)
+                         for cell in batch]
+                self.assertEqual(sorted(cells), expected)
+
+    def test_map_items(self):
+        values = [value for row in self.table.records for value in row]
+        results: dict[int, str] = {}
+        for start, batch in parallel.map_items(self.table, _decrypt_value, values, CmProgress(), 2, 50):
+            results.update(enumerate(batch, start))
+        self.assertEqual([results[i] for i in range(len(values))],
+                         [value for row in self.table.reader() for value in row])
+
+    def test_crypt_stream(self):
+        cipher_file = new_table(*MODES['ECB'])
+        data = sample_data(100_000)
+        encrypted = b''.join(parallel.crypt_stream(cipher_file, 'encrypt', io.BytesIO(data), 1024, 2, 8))
+        self.assertEqual(encrypted, b''.join(
+            cipher_file.encrypt_stream(io.BytesIO(data), 1024, CmProgress(), len(data))))
+        decrypted = b''.join(parallel.crypt_stream(cipher_file, 'decrypt', io.BytesIO(encrypted), 1024, 2, 8))
+        self.assertEqual(decrypted, data)
+
+    def test_crypt_stream_out_of_order(self):
+        cipher_file = new_table(*MODES['ECB'])
+        data = sample_data(100_000)
+        executor = _ReverseExecutor(4)
+        with mock.patch.object(parallel, 'new_process_pool', return_value=executor), \
+                mock.patch.object(parallel, '_worker_file', cipher_file):
+            encrypted = b''.join(parallel.crypt_stream(cipher_file, 'encrypt', io.BytesIO(data), 1024, 2, 4))
+        self.assertNotEqual(executor.completed, sorted(executor.completed))
+        self.assertEqual(encrypted, b''.join(
+            cipher_file.encrypt_stream(io.BytesIO(data), 1024, CmProgress(), len(data))))
+
+    def test_worker_exit(self):
+        key = bytearray(PASSWORD, 'utf-8')
+        with mock.patch.object(parallel, '_worker_file', None):
+            parallel._init_worker(type(self.table), self.table.model_dump(exclude={'records'}), key)
+            worker_file = parallel._worker_file
+            assert isinstance(worker_file, CipherFile)
+            self.assertFalse(worker_file.locked)
+            self.assertEqual(key, bytearray(len(key)))
+            util._run_finalizers(parallel._WORKER_EXIT_PRIORITY)
+            self.assertTrue(worker_file.locked)
+            self.assertIsNone(parallel._worker_file)
\ No newline at end of file
@@ -0,0 +1,165 @@
+#  MIT License
+#
+#  Copyright (c) 2026 BlueWhaleMain
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+#
+"""保护文件的加解密往返与随机读取"""
+import io
+import os
+import tempfile
+import unittest
+
+from cm.error import CmDamagedError, CmRuntimeError
+from cm.file.protect import ProtectCipherFile
+from cm.progress import CmProgress
+from tests.common import MODES, new_rsa_table, new_table, rsa_key, sample_data
+
+_CHUNK_SIZE = 4096
+
+
+class ProtectTestCase(unittest.TestCase):
+    """在临时目录中打包与解包"""
+
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._dir.cleanup)
+
+    def path(self, name: str) -> str:
+        return os.path.join(self._dir.name, name)
+
+    def pack(self, cipher_file, data: bytes, chunk_size: int = 0, compression: str | None = None) -> str:
+        """打包数据，返回保护文件路径"""
+        raw_filepath = self.path('raw.bin')
+        with open(raw_filepath, 'wb') as f:
+            f.write(data)
+        protect_file = ProtectCipherFile.from_cipher_file(cipher_file)
+        protect_file.compression = compression
+        dist_filepath = self.path('raw.bin.cm-protect')
+        protect_file.pack_to(raw_filepath, dist_filepath, CmProgress(), chunk_size)
+        return dist_filepath
+
+    def open_protect(self, cipher_file, filepath: str) -> ProtectCipherFile:
+        """读取保护文件并以表格的密钥解锁"""
+        protect_file = ProtectCipherFile.from_protect_file(filepath)
+        self.assertTrue(protect_file.try_unlock_from_cipher_file(cipher_file))
+        return protect_file
+
+    def unpack(self, cipher_file, filepath: str) -> bytes:
+        """解包保护文件，返回内容"""
+        out_filepath = self.path('out.bin')
+        self.open_protect(cipher_file, filepath).unpack_to(out_filepath, CmProgress())
+        with open(out_filepath, 'rb') as f:
+            return f.read()
+
+
+class RoundTripTest(ProtectTestCase):
+
+    def test_modes(self):
+        data = sample_data(100_000)
+        for mode, (cipher_name, cipher_args) in MODES.items():
+            with self.subTest(mode=mode):
+                cipher_file = new_table(cipher_name, cipher_args)
+                filepath = self.pack(cipher_file, data)
+                protect_file = self.open_protect(cipher_file, filepath)
+                self.assertIsNotNone(protect_file.wrapped_key)
+                self.assertEqual(protect_file.decrypt_filename(), 'raw.bin')
+                self.assertEqual(self.unpack(cipher_file, filepath), data)
+
+    def test_iterated_block_modes(self):
+        data = sample_data(30_000)
+        for mode in ('CBC', 'ECB'):
+            with self.subTest(mode=mode):
+                cipher_name, cipher_args = MODES[mode]
+                cipher_file = new_table(cipher_name, cipher_args, iter_count=3)
+                self.assertEqual(self.unpack(cipher_file, self.pack(cipher_file, data)), data)
+
+    def test_unaligned_chunk_size(self):
+        data = sample_data(20_000)
+        for mode, (cipher_name, cipher_args) in MODES.items():
+            with self.subTest(mode=mode):
+                cipher_file = new_table(cipher_name, cipher_args)
+                filepath = self.pack(cipher_file, data, 1000)
+                self.assertEqual(self.unpack(cipher_file, filepath), data)
+
+    def test_rsa(self):
+        data = sample_data(50_000)
+        cipher_file = new_rsa_table(rsa_key().export_key())
+        self.assertEqual(self.unpack(cipher_file, self.pack(cipher_file, data)), data)
+
+    def test_small_file(self):
+        for mode, (cipher_name, cipher_args) in MODES.items():
+            with self.subTest(mode=mode):
+                cipher_file = new_table(cipher_name, cipher_args)
+                self.assertEqual(self.unpack(cipher_file, self.pack(cipher_file, b'x')), b'x')
+
+
+class ReaderTest(ProtectTestCase):
+    _SIZE = _CHUNK_SIZE * 3 + 100
+
+    def _check_reader(self, cipher_file):
+        data = sample_data(self._SIZE)
+        filepath = self.pack(cipher_file, data, _CHUNK_SIZE)
+        with self.open_protect(cipher_file, filepath).open(cache_chunks=1) as reader:
+            self.assertEqual(reader.size, len(data))
+            for position in (0, 1, _CHUNK_SIZE - 1, _CHUNK_SIZE, _CHUNK_SIZE + 1, _CHUNK_SIZE * 3 - 1,
+                             _CHUNK_SIZE * 3, len(data) - 1):
+                for size in (1, 2, _CHUNK_SIZE, _CHUNK_SIZE + 2):
+                    reader.seek(position)
+                    self.assertEqual(reader.read(size), data[position:position + size], (position, size))
+                    self.assertEqual(reader.tell(), min(position + size, len(data)))
+            reader.seek(-10, io.SEEK_END)
+            self.assertEqual(reader.read(), data[-10:])
+            self.assertEqual(reader.read(1), b'')
+            reader.seek(len(data) + 5)
+            self.assertEqual(reader.read(1), b'')
+            reader.seek(_CHUNK_SIZE - 3)
+            buffer = bytearray(6)
+            self.assertEqual(reader.readinto(buffer), 6)
+            self.assertEqual(bytes(buffer), data[_CHUNK_SIZE - 3:_CHUNK_SIZE + 3])
+            reader.seek(0)
+            self.assertEqual(reader.read(), data)
+
+    def test_seekable_modes(self):
+        for mode in ('CTR', 'GCM', 'ECB'):
+            with self.subTest(mode=mode):
+                self._check_reader(new_table(*MODES[mode]))
+
+    def test_rsa(self):
+        self._check_reader(new_rsa_table(rsa_key().export_key()))
+
+    def test_chained_mode_rejected(self):
+        cipher_file = new_table(*MODES['CBC'])
+        protect_file = self.open_protect(cipher_file, self.pack(cipher_file, sample_data(self._SIZE), _CHUNK_SIZE))
+        with self.assertRaises(CmRuntimeError):
+            protect_file.open()
+
+    def test_damaged_chunk(self):
+        cipher_file = new_table(*MODES['GCM'])
+        data = sample_data(self._SIZE)
+        filepath = self.pack(cipher_file, data, _CHUNK_SIZE)
+        with open(filepath, 'r+b') as f:
+            f.seek(-(_CHUNK_SIZE + 200), io.SEEK_END)
+            byte = f.read(1)
+            f.seek(-1, io.SEEK_CUR)
+            f.write(bytes([byte[0] ^ 1]))
+        with self.open_protect(cipher_file, filepath).open() as reader:
+            self.assertEqual(reader.read(_CHUNK_SIZE), data[:_CHUNK_SIZE])
+            with self.assertRaises(CmDamagedError):
+                reader.read()
\ No newline at end of file
@@ -0,0 +1,160 @@
+#  MIT License
+#
+#  Copyright (c) 2026 BlueWhaleMain
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+#
+"""更换密钥：只重新包装数据密钥，更换后以新密钥校验与解锁"""
+import os
+
+from cm.error import CmRuntimeError, CmValueError
+from cm.file.protect import ProtectCipherFile
+from cm.progress import CmProgress
+from tests.common import MODES, PASSWORD, new_rsa_table, new_table, rsa_key, sample_data
+from tests.test_protect import ProtectTestCase
+
+_NEW_PASSWORD = 'new password'
+
+
+def _fill(cipher_file) -> list[list[str]]:
+    """写入若干行，返回明文"""
+    rows = [[f'cell {row} {col}' for col in range(3)] for row in range(4)]
+    for row in rows:
+        cipher_file.append_row(row)
+    return rows
+
+
+def _read_all(cipher_file) -> list[list[str]]:
+    return [[cipher_file.get_cell(row, col) for col in range(3)] for row in range(4)]
+
+
+def _reload(cipher_file, key: str | bytes):
+    """以导出的字段重建表格并解锁，模拟保存后重新打开"""
+    other = type(cipher_file)(**cipher_file.model_dump())
+    other.unlock(key)
+    return other
+
+
+class TableRekeyTest(ProtectTestCase):
+
+    def test_password(self):
+        for mode, (cipher_name, cipher_args) in MODES.items():
+            with self.subTest(mode=mode):
+                cipher_file = new_table(cipher_name, cipher_args)
+                rows = _fill(cipher_file)
+                salt = cipher_file.password_salt
+                # 新建的表格在首次加密时已生成数据密钥，更换密钥不改动单元格
+                self.assertIsNotNone(cipher_file.wrapped_key)
+                records = cipher_file.model_dump()['records']
+                cipher_file.rekey(_NEW_PASSWORD)
+                self.assertEqual(cipher_file.model_dump()['records'], records)
+                self.assertNotEqual(cipher_file.password_salt, salt)
+                self.assertTrue(cipher_file.validate_key(_NEW_PASSWORD))
+                self.assertFalse(cipher_file.validate_key(PASSWORD))
+                self.assertEqual(_read_all(cipher_file), rows)
+                self.assertEqual(_read_all(_reload(cipher_file, _NEW_PASSWORD)), rows)
+                wrapped_key = cipher_file.wrapped_key
+                cipher_file.rekey(PASSWORD)
+                self.assertEqual(cipher_file.model_dump()['records'], records)
+                self.assertNotEqual(cipher_file.wrapped_key, wrapped_key)
+                self.assertTrue(cipher_file.validate_key(PASSWORD))
+                self.assertEqual(_read_all(_reload(cipher_file, PASSWORD)), rows)
+
+    def test_set_cell(self):
+        cipher_file = new_table(*MODES['CBC'])
+        cipher_file.set_cell(1, 2, 'cell')
+        self.assertIsNotNone(cipher_file.wrapped_key)
+        records = cipher_file.model_dump()['records']
+        cipher_file.rekey(_NEW_PASSWORD)
+        self.assertEqual(cipher_file.model_dump()['records'], records)
+        self.assertEqual(_reload(cipher_file, _NEW_PASSWORD).get_cell(1, 2), 'cell')
+
+    def test_rsa(self):
+        old_key, new_key = rsa_key().export_key(), rsa_key(index=1).export_key()
+        cipher_file = new_rsa_table(old_key)
+        rows = _fill(cipher_file)
+        records = cipher_file.model_dump()['records']
+        cipher_file.rekey(new_key)
+        self.assertEqual(cipher_file.model_dump()['records'], records)
+        self.assertTrue(cipher_file.validate_key(new_key))
+        self.assertFalse(cipher_file.validate_key(old_key))
+        self.assertEqual(_read_all(_reload(cipher_file, new_key)), rows)
+
+    def test_rsa_public_key_rejected(self):
+        cipher_file = new_rsa_table(rsa_key().export_key())
+        rows = _fill(cipher_file)
+        header = cipher_file.model_dump(exclude={'records'})
+        with self.assertRaises(CmValueError):
+            cipher_file.rekey(rsa_key(index=1).publickey().export_key())
+        self.assertEqual(cipher_file.model_dump(exclude={'records'}), header)
+        self.assertEqual(_read_all(cipher_file), rows)
+
+
+class ProtectRekeyTest(ProtectTestCase):
+
+    def _unpack_with(self, filepath: str, key: str | bytes) -> bytes:
+        protect_file = ProtectCipherFile.from_protect_file(filepath)
+        self.assertTrue(protect_file.validate_key(key))
+        protect_file.unlock(key)
+        out_filepath = self.path('out.bin')
+        protect_file.unpack_to(out_filepath, CmProgress())
+        with open(out_filepath, 'rb') as f:
+            return f.read()
+
+    def test_password_in_place(self):
+        data = sample_data(50_000)
+        for mode, (cipher_name, cipher_args) in MODES.items():
+            with self.subTest(mode=mode):
+                cipher_file = new_table(cipher_name, cipher_args)
+                filepath = self.pack(cipher_file, data)
+                with open(filepath, 'rb') as f:
+                    body = f.read()[-len(data):]
+                stat = os.stat(filepath)
+                self.open_protect(cipher_file, filepath).rekey_file(_NEW_PASSWORD)
+                self.assertEqual(os.path.getsize(filepath), stat.st_size)
+                self.assertEqual(os.stat(filepath).st_mtime_ns, stat.st_mtime_ns)
+                with open(filepath, 'rb') as f:
+                    self.assertEqual(f.read()[-len(data):], body)
+                self.assertFalse(ProtectCipherFile.from_protect_file(filepath).validate_key(PASSWORD))
+                self.assertEqual(self._unpack_with(filepath, _NEW_PASSWORD), data)
+                protect_file = ProtectCipherFile.from_protect_file(filepath)
+                protect_file.unlock(_NEW_PASSWORD)
+                self.assertEqual(protect_file.decrypt_filename(), 'raw.bin')
+
+    def test_rsa_longer_key(self):
+        data = sample_data(50_000)
+        old_key, new_key = rsa_key().export_key(), rsa_key(3072).export_key()
+        cipher_file = new_rsa_table(old_key)
+        filepath = self.pack(cipher_file, data)
+        size = os.path.getsize(filepath)
+        self.open_protect(cipher_file, filepath).rekey_file(new_key)
+        self.assertGreater(os.path.getsize(filepath), size)
+        self.assertFalse(os.path.exists(filepath + '.tmp'))
+        self.assertEqual(self._unpack_with(filepath, new_key), data)
+
+    def test_file_changed(self):
+        data = sample_data(10_000)
+        cipher_file = new_table(*MODES['CTR'])
+        filepath = self.pack(cipher_file, data)
+        protect_file = self.open_protect(cipher_file, filepath)
+        self.open_protect(cipher_file, filepath).rekey_file(_NEW_PASSWORD)
+        # 文件已被其他实例更换密钥，旧实例不能再覆盖文件头
+        with self.assertRaises(CmRuntimeError):
+            protect_file.rekey_file('another password')
+        self.assertEqual(self._unpack_with(filepath, _NEW_PASSWORD), data)
\ No newline at end of file